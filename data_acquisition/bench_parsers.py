@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml race page parsers against the BeautifulSoup ones.
+
+Parses every race page of a fixture directory (or of the raw HTML cache)
+with both parsers, compares race infos and result rows field by field and
+reports pages per second for each.
+
+Example:
+    python bench_parsers.py fixtures --repeat 200
+    python bench_parsers.py --cache-dir ../data/raw/html_cache
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from dg_cache import HtmlCache
+from dg_fetch_raceinfos import lxml_html, parse_race_info
+from dg_fetch_raceresults import parse_race_results
+
+SITE = "https://www.deutscher-galopp.de"
+PARSERS = ["html.parser", "lxml"]
+
+
+def load_pages(fixture_dir = None, cache_dir = None):
+    """
+    Reads race pages from a fixture directory or the HTML cache.
+
+    Args:
+        fixture_dir (str): Directory with urls.json and the HTML files.
+        cache_dir (str): Raw HTML cache directory.
+
+    Returns:
+        list: (url, html) pairs of race pages.
+    """
+    if cache_dir:
+        cache = HtmlCache(cache_dir)
+        return [(url, cache.get(url)) for url in sorted(cache.urls()) if "rennen.php" in url]
+    with open(os.path.join(fixture_dir, "urls.json"), encoding = 'utf-8') as f:
+        urls = json.load(f)
+    pages = []
+    for path, file_name in sorted(urls.items()):
+        if "rennen.php" in path:
+            with open(os.path.join(fixture_dir, file_name), encoding = 'utf-8') as f:
+                pages.append((SITE + path, f.read()))
+    return pages
+
+
+def parse_or_error(parse, html, url, parser):
+    # a page that fails to parse must fail the same way with both parsers
+    try:
+        return parse(html, url, parser)
+    except Exception as e:
+        return type(e).__name__
+
+
+def compare(pages):
+    """
+    Counts field mismatches between the two parsers.
+
+    Args:
+        pages (list): (url, html) pairs.
+
+    Returns:
+        Counter: Mismatches per field ('infos.<field>', 'results.row_count',
+        'results.col<i>', or '<kind>.error').
+    """
+    mismatches = Counter()
+    for url, html in pages:
+        ref, fast = (parse_or_error(parse_race_info, html, url, p) for p in PARSERS)
+        if isinstance(ref, str) or isinstance(fast, str):
+            mismatches["infos.error"] += ref != fast
+        else:
+            for field in ref:
+                mismatches[f"infos.{field}"] += ref[field] != fast[field]
+
+        ref, fast = (parse_or_error(parse_race_results, html, url, p) for p in PARSERS)
+        if isinstance(ref, str) or isinstance(fast, str):
+            mismatches["results.error"] += ref != fast
+        elif len(ref) != len(fast):
+            mismatches["results.row_count"] += 1
+        else:
+            for ref_row, fast_row in zip(ref, fast):
+                if len(ref_row) != len(fast_row):
+                    mismatches["results.col_count"] += 1
+                    continue
+                for i, (a, b) in enumerate(zip(ref_row, fast_row)):
+                    mismatches[f"results.col{i}"] += a != b
+    return mismatches
+
+
+def time_parser(pages, parser, repeat):
+    """
+    Times both race page parsers with one backend.
+
+    Args:
+        pages (list): (url, html) pairs.
+        parser (str): 'html.parser' or 'lxml'.
+        repeat (int): Passes over the pages.
+
+    Returns:
+        float: Pages per second (race infos and results parsed per page).
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            parse_or_error(parse_race_info, html, url, parser)
+            parse_or_error(parse_race_results, html, url, parser)
+    return repeat * len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare race page parsers")
+    parser.add_argument("fixture_dir", nargs = "?", default = "fixtures",
+                        help = "Directory with urls.json and HTML files")
+    parser.add_argument("--cache-dir", default = None, help = "Use the raw HTML cache instead")
+    parser.add_argument("--repeat", type = int, default = 100, help = "Timing passes over the pages")
+    args = parser.parse_args()
+
+    if lxml_html is None:
+        parser.error("lxml is not installed")
+    pages = load_pages(args.fixture_dir, args.cache_dir)
+    mismatches = compare(pages)
+
+    print(f"Race page parsing, {len(pages):,} pages x {args.repeat}")
+    rates = {p: time_parser(pages, p, args.repeat) for p in PARSERS}
+    for p in PARSERS:
+        print(f"  {p:<12} {rates[p]:9.1f} pages/s")
+    print(f"  speedup      {rates['lxml'] / rates['html.parser']:9.1f}x")
+
+    differing = {field: n for field, n in mismatches.items() if n}
+    if differing:
+        print("Field mismatches:")
+        for field, n in sorted(differing.items()):
+            print(f"  {field:<24} {n:,} pages")
+    else:
+        print(f"All {len(mismatches)} compared fields identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+On-disk cache of raw race page HTML for the deutscher-galopp.de scrapers.
+
+Pages are stored once per distinct content, gzip-compressed under the
+SHA-256 of the HTML (objects/ab/abcdef....html.gz). A small JSON index entry
+per URL (index/<sha256 of url>.json) points at the content and keeps the
+ETag and Last-Modified validators, so a page can be revalidated with a
+conditional request instead of being downloaded again.
+
+With a cache in place, parsing changes only need a re-parse of what is on
+disk:
+    python dg_cache.py infos races_2023_v2 --cache-dir ../data/raw/html_cache
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+from dg_output import SCHEMAS, ErrorLog, RowWriter, output_path
+
+
+def url_key(url):
+    """
+    Hashes a URL into a cache key.
+
+    Args:
+        url (str): Absolute URL.
+
+    Returns:
+        str: Hex SHA-256 of the URL.
+    """
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class HtmlCache:
+    """
+    Content-addressed, compressed store of raw HTML keyed by URL.
+
+    Args:
+        cache_dir (str): Root directory of the cache (created if missing).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_dir = os.path.join(cache_dir, "index")
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.index_dir, exist_ok = True)
+        os.makedirs(self.objects_dir, exist_ok = True)
+
+    def _entry_path(self, url):
+        return os.path.join(self.index_dir, url_key(url) + ".json")
+
+    def _object_path(self, sha):
+        return os.path.join(self.objects_dir, sha[:2], sha + ".html.gz")
+
+    def entry(self, url):
+        """
+        Reads the index entry of a URL.
+
+        Args:
+            url (str): Absolute URL.
+
+        Returns:
+            dict: Entry with url, sha256, etag, last_modified and fetched_at,
+            or None if the URL is not cached.
+        """
+        try:
+            with open(self._entry_path(url), encoding = 'utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get(self, url):
+        """
+        Reads the cached HTML of a URL.
+
+        Args:
+            url (str): Absolute URL.
+
+        Returns:
+            str: Cached HTML, or None if the URL is not cached.
+        """
+        entry = self.entry(url)
+        if entry is None:
+            return None
+        try:
+            with gzip.open(self._object_path(entry["sha256"]), 'rt', encoding = 'utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, html, etag = None, last_modified = None):
+        """
+        Stores the HTML of a URL with its validators.
+
+        Identical content is written only once, however many URLs share it.
+        Files are written to a temporary name and renamed, so a crawl killed
+        mid-write never leaves a truncated page behind.
+
+        Args:
+            url (str): Absolute URL.
+            html (str): Page HTML.
+            etag (str): ETag response header, if any.
+            last_modified (str): Last-Modified response header, if any.
+        """
+        data = html.encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(sha)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok = True)
+            tmp_path = f"{object_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel = 6))
+            os.replace(tmp_path, object_path)
+
+        entry = {
+            "url": url,
+            "sha256": sha,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        entry_path = self._entry_path(url)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+    def touch(self, url):
+        """
+        Records that a cached page was revalidated (304 Not Modified).
+
+        Args:
+            url (str): Absolute URL.
+        """
+        entry = self.entry(url)
+        if entry is not None:
+            self.put(url, self.get(url), entry["etag"], entry["last_modified"])
+
+    def conditional_headers(self, url):
+        """
+        Builds the revalidation headers for a cached URL.
+
+        Args:
+            url (str): Absolute URL.
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (empty if the URL
+            is not cached or has no validators).
+        """
+        entry = self.entry(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def urls(self):
+        """
+        Lists every cached URL.
+
+        Returns:
+            list: Cached URLs.
+        """
+        urls = []
+        for file_name in os.listdir(self.index_dir):
+            if file_name.endswith(".json"):
+                with open(os.path.join(self.index_dir, file_name), encoding = 'utf-8') as f:
+                    urls.append(json.load(f)["url"])
+        return urls
+
+
+def fetch_html(url, headers, cache = None, offline = False, revalidate = False):
+    """
+    Downloads a page through the cache.
+
+    Args:
+        url (str): URL to fetch.
+        headers (dict): Request headers.
+        cache (HtmlCache): Cache to read and fill (None fetches directly).
+        offline (bool): Only read from the cache, never the network.
+        revalidate (bool): Send a conditional request for cached pages
+            instead of trusting the cached copy.
+
+    Returns:
+        str: HTML of the page.
+
+    Raises:
+        KeyError: If `offline` is set and the page is not cached.
+    """
+    if cache is None:
+        return requests.get(url, headers = headers, timeout = 30).text
+
+    html = cache.get(url)
+    if offline:
+        if html is None:
+            raise KeyError(f"not cached: {url}")
+        return html
+    if html is not None and not revalidate:
+        return html
+
+    request_headers = dict(headers)
+    if html is not None:
+        request_headers.update(cache.conditional_headers(url))
+    response = requests.get(url, headers = request_headers, timeout = 30)
+    if response.status_code == 304 and html is not None:
+        cache.touch(url)
+        return html
+    response.raise_for_status()
+    cache.put(
+        url, response.text, response.headers.get("ETag"),
+        response.headers.get("Last-Modified")
+    )
+    return response.text
+
+
+def _parse_cached(args):
+    cache_dir, kind, url = args
+    # Imported here so worker processes pick up the current parser code
+    if kind == "infos":
+        from dg_fetch_raceinfos import parse_race_info as parse
+        errors = (AttributeError, ValueError)
+    else:
+        from dg_fetch_raceresults import MissingResultsTable
+        from dg_fetch_raceresults import parse_race_results as parse
+        errors = (MissingResultsTable, ValueError)
+    html = HtmlCache(cache_dir).get(url)
+    try:
+        return url, parse(html, url), None
+    except errors as e:
+        return url, None, e
+
+
+def reparse_cache(cache_dir, kind, output_file, errors_file, workers = None,
+                  fmt = "csv"):
+    """
+    Re-parses every cached race page without touching the network.
+
+    Pages are parsed across a process pool, so the run is bound by CPU
+    rather than by the GIL or the site.
+
+    Args:
+        cache_dir (str): Cache root directory.
+        kind (str): 'infos' (one row per race) or 'results' (one row per
+            runner).
+        output_file (str): Output CSV or Parquet dataset directory
+            (replaced).
+        errors_file (str): JSONL log of race links that failed to parse.
+        workers (int): Worker processes (None uses every CPU).
+        fmt (str): 'csv' or 'parquet'.
+
+    Returns:
+        dict: Counts of parsed and failed pages and elapsed seconds.
+    """
+    start = time.perf_counter()
+    race_links = sorted(
+        url for url in HtmlCache(cache_dir).urls() if "rennen.php" in url
+    )
+    if os.path.isdir(output_file):
+        shutil.rmtree(output_file)
+    elif os.path.exists(output_file):
+        os.remove(output_file)
+    if os.path.exists(errors_file):
+        os.remove(errors_file)
+
+    stats = {"done": 0, "failed": 0}
+    with RowWriter(output_file, SCHEMAS[kind], fmt) as writer, \
+            ErrorLog(errors_file) as error_log, \
+            ProcessPoolExecutor(max_workers = workers) as pool:
+        tasks = ((cache_dir, kind, url) for url in race_links)
+        for race_link, parsed, error in pool.map(_parse_cached, tasks, chunksize = 64):
+            if error is not None:
+                error_log.log(race_link, "parse", error)
+                stats["failed"] += 1
+            elif kind == "infos":
+                writer.write(parsed)
+                stats["done"] += 1
+            else:
+                writer.write_rows(parsed)
+                stats["done"] += 1
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Re-parse cached race pages offline")
+    parser.add_argument("kind", choices = ["infos", "results"], help = "Race infos or race results")
+    parser.add_argument("file_name", help = "Output file name without .csv")
+    parser.add_argument("--format", choices = ["csv", "parquet"], default = "csv",
+                        help = "Headerless CSV or a Parquet dataset directory")
+    parser.add_argument("--cache-dir", default = "../data/raw/html_cache", help = "Cache directory")
+    parser.add_argument("--output-dir", default = None,
+                        help = "Output directory (default: ../data/raw/race_infos or race_results)")
+    parser.add_argument("--workers", type = int, default = None, help = "Worker processes")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or f"../data/raw/race_{args.kind}/"
+    os.makedirs(output_dir, exist_ok = True)
+    output_file = output_path(output_dir, args.file_name, args.format)
+    errors_file = os.path.join(output_dir, "errors_" + args.file_name + ".jsonl")
+
+    stats = reparse_cache(
+        args.cache_dir, args.kind, output_file, errors_file, args.workers, args.format
+    )
+    print(f"{stats['done']} parsed, {stats['failed']} failed ({stats['seconds']:.1f}s)")
+    print(f"Output saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Asynchronous crawler for deutscher-galopp.de race pages.
+
+Fetches the race calendar and every race page over a pooled keep-alive
+session with bounded concurrency, a per-host rate limit and retries with
+exponential backoff, and parses pages with the extractors of
+dg_fetch_raceinfos.py and dg_fetch_raceresults.py. Rows are written in
+batches through dg_output.py, and the links of flushed races are appended to
+a progress file, so an interrupted crawl resumes where it stopped. Raw pages
+go through the HTML cache of dg_cache.py, so a parser change can be re-run
+with --offline without downloading anything.
+
+Example:
+    python dg_crawler.py infos 20230101 20231231 races_2023
+    python dg_crawler.py results 20230101 20231231 results_2023 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+from dg_cache import HtmlCache
+from dg_output import SCHEMAS, ErrorLog, RowWriter, output_path
+from dg_fetch_raceinfos import headers, parse_race_info, parse_race_links
+from dg_fetch_raceresults import (
+    MissingResultsTable, get_rennkalender_url, parse_race_results
+)
+
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# What each crawl kind parses, where it writes and which parse errors mark a
+# race page as unusable (mirroring the two fetch scripts)
+CRAWL_KINDS = {
+    "infos": {
+        "parse": parse_race_info,
+        "output_dir": "../data/raw/race_infos/",
+        "errors": (AttributeError, ValueError),
+    },
+    "results": {
+        "parse": parse_race_results,
+        "output_dir": "../data/raw/race_results/",
+        "errors": (MissingResultsTable, ValueError),
+    },
+}
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host by a minimum interval.
+
+    Args:
+        rate (float): Maximum requests per second per host (0 disables the
+            limit).
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, host):
+        """
+        Sleeps until the next request slot for a host.
+
+        Args:
+            host (str): Host name of the request.
+        """
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            now = loop.time()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+
+def rebase_url(url, base_url):
+    """
+    Points a deutscher-galopp.de URL at another host, e.g. a local stand-in.
+
+    Args:
+        url (str): Absolute URL.
+        base_url (str): Scheme and host to use instead (None keeps the URL).
+
+    Returns:
+        str: URL with the scheme and host of `base_url`.
+    """
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, ""))
+
+
+async def fetch_html(session, url, limiter, retries = 4, backoff = 1.0,
+                     cache = None, cache_url = None, offline = False,
+                     revalidate = False):
+    """
+    Downloads a page, retrying transient failures with exponential backoff.
+
+    Cached pages are returned without a request, or revalidated with a
+    conditional request if `revalidate` is set.
+
+    Args:
+        session (aiohttp.ClientSession): Pooled session.
+        url (str): URL to fetch.
+        limiter (HostRateLimiter): Per-host rate limiter.
+        retries (int): Retries after the first attempt.
+        backoff (float): Base delay in seconds, doubled on every retry.
+        cache (HtmlCache): Optional cache of raw page HTML.
+        cache_url (str): URL the page is cached under (default `url`), so
+            pages fetched from a stand-in host share the site's cache keys.
+        offline (bool): Only read from the cache, never the network.
+        revalidate (bool): Revalidate cached pages with the site.
+
+    Returns:
+        str: HTML of the page.
+
+    Raises:
+        aiohttp.ClientError: If the page cannot be fetched, immediately for
+            statuses that are not worth retrying.
+        KeyError: If `offline` is set and the page is not cached.
+    """
+    cache_url = cache_url or url
+    cached = cache.get(cache_url) if cache is not None else None
+    if offline:
+        if cached is None:
+            raise KeyError(f"not cached: {cache_url}")
+        return cached
+    if cached is not None and not revalidate:
+        return cached
+    request_headers = cache.conditional_headers(cache_url) if cached is not None else {}
+
+    host = urlsplit(url).netloc
+    for attempt in range(retries + 1):
+        await limiter.wait(host)
+        try:
+            async with session.get(url, headers = request_headers) as response:
+                if response.status == 304 and cached is not None:
+                    cache.touch(cache_url)
+                    return cached
+                if response.status in RETRY_STATUSES:
+                    retry_after = response.headers.get("Retry-After", "")
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status = response.status, message = retry_after
+                    )
+                response.raise_for_status()
+                html = await response.text()
+                if cache is not None:
+                    cache.put(
+                        cache_url, html, response.headers.get("ETag"),
+                        response.headers.get("Last-Modified")
+                    )
+                return html
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = getattr(e, "status", None)
+            if attempt == retries or (status and status not in RETRY_STATUSES):
+                raise
+            delay = backoff * 2 ** attempt * (1 + random.random())
+            if status == 429 and getattr(e, "message", "").isdigit():
+                delay = max(delay, float(e.message))
+            await asyncio.sleep(delay)
+
+
+def load_progress(progress_file):
+    """
+    Reads the race links already completed by an earlier run.
+
+    Args:
+        progress_file (str): Progress file with one link per line.
+
+    Returns:
+        set: Completed race links.
+    """
+    if not os.path.exists(progress_file):
+        return set()
+    with open(progress_file, encoding = 'utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def make_session(concurrency, timeout):
+    """
+    Opens a keep-alive session pooling up to `concurrency` connections.
+
+    Args:
+        concurrency (int): Maximum open connections.
+        timeout (float): Total timeout per request in seconds.
+
+    Returns:
+        aiohttp.ClientSession: Session sending the browser headers.
+    """
+    connector = aiohttp.TCPConnector(
+        limit = concurrency, limit_per_host = concurrency, keepalive_timeout = 30
+    )
+    return aiohttp.ClientSession(
+        connector = connector, headers = headers,
+        timeout = aiohttp.ClientTimeout(total = timeout)
+    )
+
+
+async def get_race_links_async(session, limiter, start_date, end_date,
+                               links_file, base_url = None, retries = 4,
+                               cache = None, offline = False, revalidate = False):
+    """
+    Fetches the race links of a date range, reusing a saved list on resume.
+
+    Args:
+        session (aiohttp.ClientSession): Pooled session.
+        limiter (HostRateLimiter): Per-host rate limiter.
+        start_date (str): Start date (YYYYMMDD).
+        end_date (str): End date (YYYYMMDD).
+        links_file (str): File the link list is saved to.
+        base_url (str): Optional replacement scheme and host.
+        retries (int): Retries per request.
+        cache (HtmlCache): Optional cache of raw page HTML.
+        offline (bool): Only read pages from the cache.
+        revalidate (bool): Revalidate cached pages with the site.
+
+    Returns:
+        list: URLs of the individual races.
+    """
+    if os.path.exists(links_file):
+        with open(links_file, encoding = 'utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    calendar_url = get_rennkalender_url(start_date, end_date)
+    html = await fetch_html(
+        session, rebase_url(calendar_url, base_url), limiter, retries,
+        cache = cache, cache_url = calendar_url, offline = offline,
+        revalidate = revalidate
+    )
+    race_links = parse_race_links(html)
+    with open(links_file, 'w', encoding = 'utf-8') as f:
+        f.writelines(link + "\n" for link in race_links)
+    return race_links
+
+
+async def crawl(session, limiter, kind, race_links, output_file, errors_file,
+                progress_file, concurrency = 8, retries = 4, backoff = 1.0,
+                base_url = None, cache = None, offline = False, revalidate = False,
+                fmt = "csv", batch_size = 1000):
+    """
+    Fetches and parses race pages concurrently, writing rows in batches.
+
+    A race is marked as done in the progress file only once its rows have
+    been flushed, so a crash never skips a race whose rows were lost.
+
+    Args:
+        session (aiohttp.ClientSession): Pooled session.
+        limiter (HostRateLimiter): Per-host rate limiter.
+        kind (str): 'infos' or 'results'.
+        race_links (list): Race page URLs.
+        output_file (str): Output CSV (appended to) or Parquet dataset
+            directory.
+        errors_file (str): JSONL log of race links that failed.
+        progress_file (str): File of completed race links.
+        concurrency (int): Maximum requests in flight.
+        retries (int): Retries per request.
+        backoff (float): Base retry delay in seconds.
+        base_url (str): Optional replacement scheme and host.
+        cache (HtmlCache): Optional cache of raw page HTML.
+        offline (bool): Only parse pages from the cache.
+        revalidate (bool): Revalidate cached pages with the site.
+        fmt (str): 'csv' or 'parquet'.
+        batch_size (int): Rows per flushed batch.
+
+    Returns:
+        dict: Counts of done, failed and skipped races and elapsed seconds.
+    """
+    spec = CRAWL_KINDS[kind]
+    done = load_progress(progress_file)
+    todo = [link for link in race_links if link not in done]
+    stats = {"done": 0, "failed": 0, "skipped": len(race_links) - len(todo)}
+    start = time.perf_counter()
+
+    queue = asyncio.Queue()
+    for link in todo:
+        queue.put_nowait(link)
+
+    loop = asyncio.get_running_loop()
+    # races whose rows are buffered but not yet flushed
+    pending = []
+
+    with open(progress_file, 'a+', encoding = 'utf-8') as p_out, \
+            ErrorLog(errors_file) as error_log:
+
+        def mark_done(links):
+            p_out.writelines(link + "\n" for link in links)
+            p_out.flush()
+
+        def on_flush():
+            mark_done(pending)
+            pending.clear()
+
+        with RowWriter(output_file, SCHEMAS[kind], fmt, batch_size,
+                       on_flush = on_flush) as writer:
+
+            async def worker():
+                while True:
+                    try:
+                        race_link = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        html = await fetch_html(
+                            session, rebase_url(race_link, base_url), limiter, retries, backoff,
+                            cache, race_link, offline, revalidate
+                        )
+                    except (aiohttp.ClientError, asyncio.TimeoutError, KeyError) as e:
+                        # Not marked as done, so a later run retries it
+                        error_log.log(race_link, "fetch", e)
+                        stats["failed"] += 1
+                        continue
+                    try:
+                        parsed = await loop.run_in_executor(None, spec["parse"], html, race_link)
+                        pending.append(race_link)
+                        if kind == "infos":
+                            writer.write(parsed)
+                        else:
+                            writer.write_rows(parsed)
+                        stats["done"] += 1
+                    except spec["errors"] as e:
+                        if race_link in pending:
+                            pending.remove(race_link)
+                        error_log.log(race_link, "parse", e)
+                        stats["failed"] += 1
+                        mark_done([race_link])
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+async def run(kind, start_date, end_date, output_file, errors_file, progress_file,
+              links_file, concurrency = 8, rate = 4.0, retries = 4, backoff = 1.0,
+              timeout = 30.0, base_url = None, cache_dir = None, offline = False,
+              revalidate = False, fmt = "csv", batch_size = 1000):
+    """
+    Crawls a date range: the race calendar first, then every race page.
+
+    Args:
+        kind (str): 'infos' or 'results'.
+        start_date (str): Start date (YYYYMMDD).
+        end_date (str): End date (YYYYMMDD).
+        output_file (str): Output CSV or Parquet dataset directory.
+        errors_file (str): JSONL log of race links that failed.
+        progress_file (str): File of completed race links.
+        links_file (str): File the race link list is saved to.
+        concurrency (int): Maximum requests in flight.
+        rate (float): Maximum requests per second per host.
+        retries (int): Retries per request.
+        backoff (float): Base retry delay in seconds.
+        timeout (float): Total timeout per request in seconds.
+        base_url (str): Optional replacement scheme and host.
+        cache_dir (str): Optional directory of the raw HTML cache.
+        offline (bool): Only parse pages from the cache (needs `cache_dir`).
+        revalidate (bool): Revalidate cached pages with the site.
+        fmt (str): 'csv' or 'parquet'.
+        batch_size (int): Rows per flushed batch.
+
+    Returns:
+        dict: Counts as returned by `crawl`, plus the number of links.
+    """
+    cache = HtmlCache(cache_dir) if cache_dir else None
+    async with make_session(concurrency, timeout) as session:
+        limiter = HostRateLimiter(rate)
+        race_links = await get_race_links_async(
+            session, limiter, start_date, end_date, links_file, base_url, retries,
+            cache, offline, revalidate
+        )
+        stats = await crawl(
+            session, limiter, kind, race_links, output_file, errors_file,
+            progress_file, concurrency, retries, backoff, base_url, cache,
+            offline, revalidate, fmt, batch_size
+        )
+    stats["links"] = len(race_links)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Crawl deutscher-galopp.de race pages")
+    parser.add_argument("kind", choices = list(CRAWL_KINDS), help = "Race infos or race results")
+    parser.add_argument("start_date", help = "Start date (YYYYMMDD)")
+    parser.add_argument("end_date", help = "End date (YYYYMMDD)")
+    parser.add_argument("file_name", help = "Output file name without .csv")
+    parser.add_argument("--format", choices = ["csv", "parquet"], default = "csv",
+                        help = "Headerless CSV or a Parquet dataset directory")
+    parser.add_argument("--batch-size", type = int, default = 1000, help = "Rows per flushed batch")
+    parser.add_argument("--output-dir", default = None,
+                        help = "Output directory (default: ../data/raw/race_infos or race_results)")
+    parser.add_argument("--concurrency", type = int, default = 8, help = "Requests in flight")
+    parser.add_argument("--rate", type = float, default = 4.0, help = "Requests per second per host")
+    parser.add_argument("--retries", type = int, default = 4, help = "Retries per request")
+    parser.add_argument("--backoff", type = float, default = 1.0, help = "Base retry delay (seconds)")
+    parser.add_argument("--timeout", type = float, default = 30.0, help = "Request timeout (seconds)")
+    parser.add_argument("--base-url", default = None,
+                        help = "Fetch from this host instead, e.g. http://127.0.0.1:8765 for fixture_server.py")
+    parser.add_argument("--cache-dir", default = "../data/raw/html_cache",
+                        help = "Raw HTML cache directory ('' disables the cache)")
+    parser.add_argument("--offline", action = "store_true",
+                        help = "Parse only from the cache, without network requests")
+    parser.add_argument("--revalidate", action = "store_true",
+                        help = "Revalidate cached pages with conditional requests")
+    args = parser.parse_args()
+    if args.offline and not args.cache_dir:
+        parser.error("--offline needs --cache-dir")
+
+    output_dir = args.output_dir or CRAWL_KINDS[args.kind]["output_dir"]
+    os.makedirs(output_dir, exist_ok = True)
+    output_file = output_path(output_dir, args.file_name, args.format)
+    errors_file = os.path.join(output_dir, "errors_" + args.file_name + ".jsonl")
+    progress_file = os.path.join(output_dir, args.file_name + ".progress")
+    links_file = os.path.join(output_dir, args.file_name + ".links")
+
+    stats = asyncio.run(run(
+        args.kind, args.start_date, args.end_date, output_file, errors_file,
+        progress_file, links_file, args.concurrency, args.rate, args.retries,
+        args.backoff, args.timeout, args.base_url, args.cache_dir, args.offline,
+        args.revalidate, args.format, args.batch_size
+    ))
+    print(
+        f"{stats['links']} races: {stats['done']} done, {stats['failed']} failed, "
+        f"{stats['skipped']} already done ({stats['seconds']:.1f}s)"
+    )
+    print(f"Output saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,53 @@
 
-import csv
-import requests
 from bs4 import BeautifulSoup
-from bs4 import re
+import re
 from datetime import datetime
 
-def get_race_info(url, headers):
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+from dg_cache import HtmlCache, fetch_html
+from dg_output import RACE_INFO_SCHEMA, ErrorLog, RowWriter
+
+def get_race_info(url, headers, cache = None, offline = False):
     """
     Extracts race information from the given URL.
 
     Args:
         url (str): URL of the race page.
         headers (dict): Request headers.
+        cache (HtmlCache): Optional cache of raw page HTML.
+        offline (bool): Only parse pages from the cache.
         
     Returns:
         dict: Dictionary containing scraped race information (or None if an
         error occurs).
     """
     
-    response = requests.get(url, headers = headers)
-    html = response.text
+    html = fetch_html(url, headers, cache, offline)
+    return parse_race_info(html, url)
+
+
+
+def extract_race_fields_bs4(html):
+    """
+    Pulls the raw race fields out of a race page with BeautifulSoup.
+
+    This is the reference extractor; `extract_race_fields_lxml` must return
+    the same values.
+
+    Args:
+        html (str): HTML of the race page.
+
+    Returns:
+        tuple: Course, race name, page title, race number, start time text,
+        race facts of the header, description and the tfoot facts text.
+    """
+    
     bsObj = BeautifulSoup(html, 'html.parser')
-    # gr_raceid
-    gr_raceid = re.search(r'id=\d*', url).group()
-    gr_raceid = int(gr_raceid[3:])
     # gr_course: the name of the course on german-racing.com
     gr_course = bsObj.find("span", {"class":"uppercase racetrack"}).get_text()
     # name of the race
@@ -34,7 +58,6 @@ def get_race_info(url, headers):
     race_no = bsObj.find("span", {"class":"pageNaviCurrent"}).get_text()
     # date and time of the race
     date_time = bsObj.find("span", {"class":"startzeit"}).get_text()
-    date_time = str(datetime.strptime(date_time, '%d.%m.%Y, %H:%M'))
     # header-right (race-facts-container) mit Rennklasse, Länge und Preisgeld
     # und Boden. Bei älteren Rennen wurde die Rennklasse nicht angegeben und 
     # header-right
@@ -45,6 +68,120 @@ def get_race_info(url, headers):
     race_facts_hr = []
     for item in header_right:
         race_facts_hr.append(item.get_text())
+    # race description
+    description = bsObj.find(
+        'div', {'class':'elementStandard elementText elementText_var2'}
+    ).contents[7]
+    # additional info: facts
+    facts = bsObj.findAll("tfoot")[0].td.get_text()
+    return (
+        gr_course, race_name, gr_title, race_no, date_time, race_facts_hr,
+        str(description), facts
+    )
+
+
+
+def _has_class(name):
+    # XPath test for one token of a multi-valued class attribute
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml_html is not None:
+    XP_COURSE = etree.XPath("//span[@class='uppercase racetrack']")
+    XP_RACE_NAME = etree.XPath(f"//span[{_has_class('racetitle')}]")
+    XP_TITLE = etree.XPath("//title")
+    XP_RACE_NO = etree.XPath(f"//span[{_has_class('pageNaviCurrent')}]")
+    XP_START_TIME = etree.XPath(f"//span[{_has_class('startzeit')}]")
+    XP_RACE_FACTS = etree.XPath(
+        f"//div[{_has_class('header-right-container')} and "
+        f"{_has_class('container-racefacts')}]//span"
+    )
+    XP_DESCRIPTION = etree.XPath(
+        "//div[@class='elementStandard elementText elementText_var2']"
+    )
+    XP_TFOOT = etree.XPath("//tfoot")
+
+
+def _first(xpath, tree):
+    found = xpath(tree)
+    return found[0] if found else None
+
+
+def _text(element):
+    # like Tag.get_text(); raises AttributeError for a missing element
+    return str(element.text_content())
+
+
+def _child_nodes(element):
+    # text and element children in the order of BeautifulSoup's Tag.contents
+    contents = [element.text] if element.text else []
+    for child in element:
+        contents.append(child)
+        if child.tail:
+            contents.append(child.tail)
+    return contents
+
+
+def extract_race_fields_lxml(html):
+    """
+    Pulls the raw race fields out of a race page with lxml and precompiled
+    XPath expressions.
+
+    Args:
+        html (str): HTML of the race page.
+
+    Returns:
+        tuple: Same fields as `extract_race_fields_bs4`.
+    """
+    
+    tree = lxml_html.document_fromstring(html)
+    gr_course = _text(_first(XP_COURSE, tree))
+    race_name = _text(_first(XP_RACE_NAME, tree))
+    gr_title = _text(_first(XP_TITLE, tree))
+    race_no = _text(_first(XP_RACE_NO, tree))
+    date_time = _text(_first(XP_START_TIME, tree))
+    race_facts_hr = [_text(item) for item in XP_RACE_FACTS(tree)]
+    description = _child_nodes(_first(XP_DESCRIPTION, tree))[7]
+    if not isinstance(description, str):
+        # XML serialisation matches str(Tag) of BeautifulSoup (<br/>, escaping)
+        description = etree.tostring(
+            description, encoding = str, method = "xml", with_tail = False
+        )
+    facts = _text(XP_TFOOT(tree)[0].find(".//td"))
+    return (
+        gr_course, race_name, gr_title, race_no, date_time, race_facts_hr,
+        str(description), facts
+    )
+
+
+EXTRACTORS = {
+    "html.parser": extract_race_fields_bs4,
+    "lxml": extract_race_fields_lxml,
+}
+# lxml is optional; without it pages are parsed with BeautifulSoup
+DEFAULT_PARSER = "lxml" if lxml_html is not None else "html.parser"
+
+
+
+def parse_race_info(html, url, parser = DEFAULT_PARSER):
+    """
+    Extracts race information from the HTML of a race page.
+
+    Args:
+        html (str): HTML of the race page.
+        url (str): URL of the race page (holds the race id).
+        parser (str): 'lxml' (fast path) or 'html.parser' (BeautifulSoup).
+        
+    Returns:
+        dict: Dictionary containing scraped race information.
+    """
+    
+    (gr_course, race_name, gr_title, race_no, date_time, race_facts_hr,
+     description, facts) = EXTRACTORS[parser](html)
+    # gr_raceid
+    gr_raceid = re.search(r'id=\d*', url).group()
+    gr_raceid = int(gr_raceid[3:])
+    date_time = str(datetime.strptime(date_time, '%d.%m.%Y, %H:%M'))
     race_length_idx = [
         i for i, item in enumerate(race_facts_hr) if item.endswith(' m')
         ]
@@ -80,12 +217,6 @@ def get_race_info(url, headers):
         prizemoney_cent = prizemoney_cent[:len(prizemoney_cent)-2]
         prizemoney_cent = int(prizemoney_cent.replace(".", "")) * 100
         going = race_facts_hr[3]
-    # race description
-    description = bsObj.find(
-        'div', {'class':'elementStandard elementText elementText_var2'}
-    ).contents[7]
-    # additional info: facts
-    facts = bsObj.findAll("tfoot")[0].td.get_text()
     # race_time_secs
     try:
         race_time = re.findall(r"ZEIT DES RENNENS: [0-9\:\,]*", facts)[0]
@@ -128,31 +259,48 @@ def get_race_info(url, headers):
         vw = float(re.sub(r",", ".", vw))
     else:
         vw = ""
-    race_info_vars = [
-        'gr_raceid', 'gr_course', 'race_name', 'gr_title', 'race_no', 
-        'date_time', 'race_type', 'race_length', 'prizemoney_cent', 'going', 
-        'description', 'facts', 'race_time_secs', 'zw', 'dw', 'vw'
-    ]
-    scope = locals()
-    race_info_dict = dict((k, eval(k, scope)) for k in race_info_vars)
+    race_info_dict = {
+        'gr_raceid': gr_raceid, 'gr_course': gr_course, 'race_name': race_name,
+        'gr_title': gr_title, 'race_no': race_no, 'date_time': date_time,
+        'race_type': race_type, 'race_length': race_length,
+        'prizemoney_cent': prizemoney_cent, 'going': going,
+        'description': description, 'facts': facts,
+        'race_time_secs': race_time_secs, 'zw': zw, 'dw': dw, 'vw': vw
+    }
     return race_info_dict
 
 
 
-def get_race_links(url, headers):
+def get_race_links(url, headers, cache = None, offline = False):
     """
     Extracts links to individual races from the given URL.
     
     Args:
         url (str): URL of the page containing race links.
         headers (dict): Request headers.
+        cache (HtmlCache): Optional cache of raw page HTML.
+        offline (bool): Only parse pages from the cache.
+    
+    Returns:
+        list: List of URLs for the individual races.
+    """
+    
+    html = fetch_html(url, headers, cache, offline)
+    return parse_race_links(html)
+
+
+
+def parse_race_links(html):
+    """
+    Extracts links to individual races from the HTML of a race calendar.
+    
+    Args:
+        html (str): HTML of the page containing race links.
     
     Returns:
         list: List of URLs for the individual races.
     """
     
-    response = requests.get(url, headers = headers)
-    html = response.text
     bsObj = BeautifulSoup(html, 'html.parser')
     race_url_p1 = "https://www.deutscher-galopp.de"
     
@@ -211,42 +359,43 @@ headers = {
         'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36'
 }
 
-# taking input for start date, end date and name of csv-file for output
-start_date = input("Start Date (YYYYMMDD)? ")
-end_date = input("End Date (YYYYMMDD)? ")
-start_year = start_date[0:4]
-start_month = start_date[4:6]
-start_day = start_date[6:8]
-end_year = end_date[0:4]
-end_month = end_date[4:6]
-end_day = end_date[6:8]
 
-csv_file_input = input("File Name? ")
-csv_file = "../data/raw/race_infos/" + csv_file_input + ".csv"
-errors_file = "errors_" + csv_file_input + ".csv"
+def main():
+    # taking input for start date, end date and name of csv-file for output
+    start_date = input("Start Date (YYYYMMDD)? ")
+    end_date = input("End Date (YYYYMMDD)? ")
+    start_year = start_date[0:4]
+    start_month = start_date[4:6]
+    start_day = start_date[6:8]
+    end_year = end_date[0:4]
+    end_month = end_date[4:6]
+    end_day = end_date[6:8]
 
+    csv_file_input = input("File Name? ")
+    csv_file = "../data/raw/race_infos/" + csv_file_input + ".csv"
+    errors_file = "errors_" + csv_file_input + ".jsonl"
+    # raw pages are kept so parser changes can re-run without downloading
+    cache = HtmlCache("../data/raw/html_cache")
 
-veranstaltungen = get_veranstaltungen(
-    start_year, start_month, start_day, end_year, end_month, end_day           
-)
-race_links = get_race_links(veranstaltungen, headers)
-print(race_links)
 
-race_info_list = []
+    veranstaltungen = get_veranstaltungen(
+        start_year, start_month, start_day, end_year, end_month, end_day           
+    )
+    race_links = get_race_links(veranstaltungen, headers, cache)
+    print(race_links)
+
+    # rows are written in batches as races are parsed, not collected first
+    with RowWriter(csv_file, RACE_INFO_SCHEMA) as writer, \
+            ErrorLog(errors_file) as error_log:
+        for race_link in race_links:
+            try:
+                print(race_link)
+                race_info = get_race_info(race_link, headers, cache)
+                writer.write(race_info)
+            except (AttributeError, ValueError) as e:
+                error_log.log(race_link, "parse", e)
+                continue
 
-for race_link in race_links:
-    try:
-        print(race_link)
-        race_info = get_race_info(race_link, headers)
-        race_info_list.append(race_info)
-    except (AttributeError, ValueError):
-        with open(errors_file, 'a+', newline = '') as e_out:
-            csvout = csv.writer(e_out)
-            csvout.writerow([race_link])
-        continue
-
-race_info_keys = race_info_list[0].keys()
-with open(csv_file, 'w', newline = '', encoding = 'utf-8') as fout:
-    dict_writer = csv.DictWriter(fout, race_info_keys)
-    dict_writer.writerows(race_info_list)
 
+if __name__ == "__main__":
+    main()
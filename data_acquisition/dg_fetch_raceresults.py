@@ -1,15 +1,29 @@
 #import calendar
-import csv
-import requests
 from bs4 import BeautifulSoup
-from bs4 import re
+import re
 
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
 
-def get_race_links(url, headers):
+from dg_cache import HtmlCache, fetch_html
+from dg_output import RACE_RESULT_SCHEMA, ErrorLog, RowWriter
+
+
+class MissingResultsTable(ValueError):
+    """Raised for a race page without an ergebnis (results) table."""
+
+
+def get_race_links(url, headers, cache = None, offline = False):
+    html = fetch_html(url, headers, cache, offline)
+    return parse_race_links(html)
+
+
+def parse_race_links(html):
     global race_links
     race_links = []
-    response = requests.get(url, headers = headers)
-    html = response.text
     bsObj = BeautifulSoup(html, 'html.parser')
     race_url_p1 = "https://www.deutscher-galopp.de"
     for link in bsObj.findAll(
@@ -23,32 +37,79 @@ def get_race_links(url, headers):
     return race_links
 
 
-def get_race_results(url, headers):
-    response = requests.get(url, headers = headers)
-    html = response.text
+def get_race_results(url, headers, cache = None, offline = False):
+    html = fetch_html(url, headers, cache, offline)
+    return parse_race_results(html, url)
+
+
+def extract_result_rows_bs4(html):
+    # reference extractor: per runner the cell texts, the horse link and the
+    # horse tooltip (None if the page has no ergebnis table)
     bsObj = BeautifulSoup(html, 'html.parser')
+    tables = bsObj.findAll("table",{"id":"ergebnis"})
+    if not tables:
+        return None
+    rows = tables[0].findAll("tr")
+    result_rows = []
+    for row in rows[1:-1]:
+        data = row.findAll(['td'])
+        texts = [data[0].get_text(), data[1].get_text()]
+        horse_href = data[1].find(['a']).attrs['href']
+        horse_details = data[1].find(['span']).attrs['title']
+        for i in range(2, len(data)):
+            texts.append(data[i].get_text())
+        result_rows.append((texts, horse_href, horse_details))
+    return result_rows
+
+
+if lxml_html is not None:
+    XP_ERGEBNIS = etree.XPath("//table[@id='ergebnis']")
+    XP_ROWS = etree.XPath(".//tr")
+    XP_CELLS = etree.XPath(".//td")
+
+
+def extract_result_rows_lxml(html):
+    # same rows as extract_result_rows_bs4, via lxml and precompiled XPath
+    tables = XP_ERGEBNIS(lxml_html.document_fromstring(html))
+    if not tables:
+        return None
+    rows = XP_ROWS(tables[0])
+    result_rows = []
+    for row in rows[1:-1]:
+        data = XP_CELLS(row)
+        texts = [str(data[0].text_content()), str(data[1].text_content())]
+        horse_href = data[1].find('.//a').attrib['href']
+        horse_details = data[1].find('.//span').attrib['title']
+        for i in range(2, len(data)):
+            texts.append(str(data[i].text_content()))
+        result_rows.append((texts, horse_href, horse_details))
+    return result_rows
+
+
+EXTRACTORS = {
+    "html.parser": extract_result_rows_bs4,
+    "lxml": extract_result_rows_lxml,
+}
+# lxml is optional; without it pages are parsed with BeautifulSoup
+DEFAULT_PARSER = "lxml" if lxml_html is not None else "html.parser"
+
+
+def parse_race_results(html, url, parser = DEFAULT_PARSER):
     gr_raceid = re.search(r'id=\d*', url).group()
     gr_raceid = int(gr_raceid[3:])
-    try:
-        table = bsObj.findAll("table",{"id":"ergebnis"})[0]
-    except IndexError as e:
-        print(url)
-        print(e)
-        pass
-    rows = table.findAll("tr")
+    result_rows = EXTRACTORS[parser](html)
+    if result_rows is None:
+        raise MissingResultsTable("no ergebnis table")
     table = []
-    for row in rows[1:-1]:
+    for texts, horse_href, horse_details in result_rows:
         table_row = []
         table_row.append(gr_raceid)
-        data = row.findAll(['td'])
-        pos = data[0].get_text()
+        pos = texts[0]
         table_row.append(pos)
-        horse_name = data[1].get_text()
+        horse_name = texts[1]
         table_row.append(horse_name)
-        horse_id = data[1].find(['a']).attrs['href']
-        horse_id = re.search(r'\d+', horse_id).group()
+        horse_id = re.search(r'\d+', horse_href).group()
         table_row.append(horse_id)
-        horse_details = data[1].find(['span']).attrs['title']
         table_row.append(horse_details)
         abstammung = re.search("^[^<]*", horse_details).group()
         table_row.append(abstammung)
@@ -56,58 +117,65 @@ def get_race_results(url, headers):
         table_row.append(geschlecht)
         alter = re.search("Alter[^(]*", horse_details).group()
         table_row.append(alter)
-        for i in range(2, len(data)):
-            table_row.append(data[i].get_text())
+        table_row.extend(texts[2:])
         table.append(table_row)
-    with open(csv_file, "a+", newline = '', encoding = 'utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(table)
+    return table
+
+
+def get_rennkalender_url(start_date, end_date):
+    # build variables from input to concatenate to url later
+    start_year = start_date[0:4]
+    start_month = start_date[4:6]
+    start_day = start_date[6:8]
+    end_year = end_date[0:4]
+    end_month = end_date[4:6]
+    end_day = end_date[6:8]
+    # dictionary with german months
+    ger_months = {
+        1: 'Januar', 2: 'Februar', 3: 'März', 4: 'April',
+        5: 'Mai', 6: 'Juni', 7: 'Juli', 8: 'August',
+        9: 'September', 10: 'Oktober', 11: 'November', 12: 'Dezember'
+    }
+    # string concatenation for getting the right url (start date to end date)
+    return (
+        "https://www.deutscher-galopp.de/gr/renntage/rennkalender.php?" +
+        "jahr=" + start_year + "&land=8&art=&von=" + start_day + ".+" + 
+        ger_months[int(start_month)] + "+" + start_year + "&von_submit=" +
+        start_year + "%2F" + start_month + "%2F" + start_day + 
+        "&ort=&laengevon=1000&laengebis=6800" +
+        "&bis=" + end_day + ".+" + ger_months[int(end_month)] + 
+        "+" + end_year + "&bis_submit=" + end_year + "%2F" + end_month + "%2F" +
+        end_day
+    )
 
 
 # mimicking browser
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36'}
 
-# taking input for start date, end date and name of csv-file for output
-start_date = input("Start Date (YYYYMMDD)? ")
-end_date = input("End Date (YYYYMMDD)? ")
-csv_file_input = input("File Name? ")
-csv_file = "../data/raw/race_results/" + csv_file_input + ".csv"
-errors_file = "../data/raw/race_results/" + "errors_" + csv_file_input + ".csv"
-# build variables from input to concatenate to url later
-start_year = start_date[0:4]
-start_month = start_date[4:6]
-start_day = start_date[6:8]
-end_year = end_date[0:4]
-end_month = end_date[4:6]
-end_day = end_date[6:8]
-# dictionary with german months
-ger_months = {
-    1: 'Januar', 2: 'Februar', 3: 'März', 4: 'April',
-    5: 'Mai', 6: 'Juni', 7: 'Juli', 8: 'August',
-    9: 'September', 10: 'Oktober', 11: 'November', 12: 'Dezember'
-}
-# string concatenation for getting the right url (start date to end date)
-url = (
-    "https://www.deutscher-galopp.de/gr/renntage/rennkalender.php?" +
-    "jahr=" + start_year + "&land=8&art=&von=" + start_day + ".+" + 
-    ger_months[int(start_month)] + "+" + start_year + "&von_submit=" +
-    start_year + "%2F" + start_month + "%2F" + start_day + 
-    "&ort=&laengevon=1000&laengebis=6800" +
-    "&bis=" + end_day + ".+" + ger_months[int(end_month)] + 
-    "+" + end_year + "&bis_submit=" + end_year + "%2F" + end_month + "%2F" +
-    end_day
-)
-
-race_links = get_race_links(url, headers)
-
-for race_link in race_links:
-    try:
-        get_race_results(race_link, headers)
-    except UnboundLocalError:
-        with open(errors_file, 'a+', newline = '') as e_out:
-            csvout = csv.writer(e_out)
-            csvout.writerow([race_link])
-        continue
 
+def main():
+    # taking input for start date, end date and name of csv-file for output
+    start_date = input("Start Date (YYYYMMDD)? ")
+    end_date = input("End Date (YYYYMMDD)? ")
+    csv_file_input = input("File Name? ")
+    csv_file = "../data/raw/race_results/" + csv_file_input + ".csv"
+    errors_file = "../data/raw/race_results/" + "errors_" + csv_file_input + ".jsonl"
+    # raw pages are kept so parser changes can re-run without downloading
+    cache = HtmlCache("../data/raw/html_cache")
+    url = get_rennkalender_url(start_date, end_date)
+
+    race_links = get_race_links(url, headers, cache)
+
+    # one open writer for the whole run, flushed in batches
+    with RowWriter(csv_file, RACE_RESULT_SCHEMA) as writer, \
+            ErrorLog(errors_file) as error_log:
+        for race_link in race_links:
+            try:
+                writer.write_rows(get_race_results(race_link, headers, cache))
+            except (MissingResultsTable, ValueError) as e:
+                error_log.log(race_link, "parse", e)
+                continue
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Streaming output for the deutscher-galopp.de scrapers.
+
+Parsed races are written in batches with a fixed schema, either appended to
+a headerless CSV (the layout data_processing/combine_data.R reads) or as
+numbered Parquet part files in a dataset directory. A batch is flushed when
+it is full or after a time limit, so memory stays flat over any date range
+and a crash loses at most the batch in progress. Pages that cannot be
+fetched or parsed go to a JSONL error log with the reason.
+"""
+
+import csv
+import json
+import os
+import time
+import traceback
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Race infos, one row per race, in the column order of combine_data.R
+RACE_INFO_SCHEMA = pa.schema([
+    ("gr_raceid", pa.int64()),
+    ("gr_course", pa.string()),
+    ("race_name", pa.string()),
+    ("gr_title", pa.string()),
+    ("race_no", pa.string()),
+    ("date_time", pa.string()),
+    ("race_type", pa.string()),
+    ("race_length", pa.float64()),
+    ("prizemoney_cent", pa.int64()),
+    ("going", pa.string()),
+    ("description", pa.string()),
+    ("facts", pa.string()),
+    ("race_time_secs", pa.float64()),
+    ("zw", pa.float64()),
+    ("dw", pa.float64()),
+    ("vw", pa.float64()),
+])
+
+# Race results, one row per runner: the parsed horse columns followed by
+# the remaining cells of the ergebnis table
+RACE_RESULT_SCHEMA = pa.schema(
+    [("gr_raceid", pa.int64())] +
+    [(name, pa.string()) for name in (
+        "position", "horse", "gr_horseid", "horse_infos", "pedigree", "hosex",
+        "hoage", "hono", "hostall", "dist_btn_chr", "hoprize", "owner",
+        "trainer", "jockey", "weight_chr", "odds"
+    )]
+)
+
+SCHEMAS = {"infos": RACE_INFO_SCHEMA, "results": RACE_RESULT_SCHEMA}
+
+
+def conform_row(row, schema):
+    """
+    Lays out a parsed row in schema order.
+
+    Args:
+        row (dict or list): Race info dict, or a results row in column
+            order (short rows are padded with empty cells).
+        schema (pa.Schema): Target schema.
+
+    Returns:
+        list: One value per schema field.
+
+    Raises:
+        ValueError: If the row has more cells than the schema.
+    """
+    if isinstance(row, dict):
+        return [row[name] for name in schema.names]
+    if len(row) > len(schema):
+        raise ValueError(f"row has {len(row)} cells, schema has {len(schema)}")
+    return list(row) + [""] * (len(schema) - len(row))
+
+
+class RowWriter:
+    """
+    Buffers rows and writes them in batches to CSV or a Parquet dataset.
+
+    Args:
+        path (str): CSV file, or the dataset directory for Parquet.
+        schema (pa.Schema): Fixed output schema.
+        fmt (str): 'csv' or 'parquet'.
+        batch_size (int): Rows per flushed batch.
+        flush_seconds (float): Flush a partial batch after this many seconds.
+        on_flush (callable): Called after every flush that wrote rows, e.g.
+            to mark the flushed races as done in a progress file.
+    """
+
+    def __init__(self, path, schema, fmt = "csv", batch_size = 1000,
+                 flush_seconds = 30.0, on_flush = None):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"unknown output format: {fmt}")
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.on_flush = on_flush
+        self.rows = []
+        self.rows_written = 0
+        self.last_flush = time.monotonic()
+        if fmt == "parquet":
+            os.makedirs(path, exist_ok = True)
+            # continue numbering after parts of an earlier (resumed) run
+            self.n_parts = len([f for f in os.listdir(path) if f.endswith(".parquet")])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        """
+        Adds one row, flushing when the batch is full or old enough.
+
+        Args:
+            row (dict or list): Parsed row (see `conform_row`).
+        """
+        self.rows.append(conform_row(row, self.schema))
+        if (len(self.rows) >= self.batch_size or
+                time.monotonic() - self.last_flush >= self.flush_seconds):
+            self.flush()
+
+    def write_rows(self, rows):
+        """
+        Adds several rows, e.g. all runners of a race.
+
+        Args:
+            rows (list): Parsed rows.
+        """
+        # conform all rows first, so a bad race leaves no partial rows behind
+        conformed = [conform_row(row, self.schema) for row in rows]
+        self.rows.extend(conformed)
+        if (len(self.rows) >= self.batch_size or
+                time.monotonic() - self.last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows to disk."""
+        if self.rows:
+            if self.fmt == "csv":
+                self._flush_csv()
+            else:
+                self._flush_parquet()
+            self.rows_written += len(self.rows)
+            self.rows = []
+            if self.on_flush is not None:
+                self.on_flush()
+        self.last_flush = time.monotonic()
+
+    def _flush_csv(self):
+        with open(self.path, 'a', newline = '', encoding = 'utf-8') as fout:
+            csv.writer(fout).writerows(self.rows)
+            fout.flush()
+            os.fsync(fout.fileno())
+
+    def _flush_parquet(self):
+        columns = list(zip(*self.rows))
+        arrays = [
+            pa.array([None if v == "" else v for v in values], type = field.type)
+            for values, field in zip(columns, self.schema)
+        ]
+        table = pa.Table.from_arrays(arrays, schema = self.schema)
+        part_file = os.path.join(self.path, f"part-{self.n_parts:05d}.parquet")
+        # write under a temporary name so readers never see a partial part
+        tmp_file = part_file + ".tmp"
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, part_file)
+        self.n_parts += 1
+
+    def close(self):
+        """Flushes the last batch."""
+        self.flush()
+
+
+class ErrorLog:
+    """
+    Appends one JSON object per failed race page.
+
+    Args:
+        path (str): JSONL file (appended to).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding = 'utf-8')
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def log(self, url, stage, error):
+        """
+        Records a failure.
+
+        Args:
+            url (str): Race page URL.
+            stage (str): 'fetch', 'parse' or 'write'.
+            error (Exception): The exception raised.
+        """
+        frame = traceback.extract_tb(error.__traceback__)[-1:] if error.__traceback__ else []
+        record = {
+            "url": url,
+            "stage": stage,
+            "error": type(error).__name__,
+            "reason": str(error),
+            "where": f"{frame[0].name}:{frame[0].lineno}" if frame else None,
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self.file.write(json.dumps(record, ensure_ascii = False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def output_path(output_dir, file_name, fmt):
+    """
+    Builds the output path of a scraper run.
+
+    Args:
+        output_dir (str): Output directory.
+        file_name (str): Output file name without extension.
+        fmt (str): 'csv' or 'parquet'.
+
+    Returns:
+        str: CSV file or Parquet dataset directory.
+    """
+    return os.path.join(output_dir, file_name + (".csv" if fmt == "csv" else ""))
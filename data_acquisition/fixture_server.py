@@ -0,0 +1,151 @@
+"""
+Local HTTP stand-in for deutscher-galopp.de serving saved HTML fixtures.
+
+Pages are looked up in `urls.json` of the fixture directory, which maps a
+request path with query (or just the path) to an HTML file. The server
+speaks keep-alive HTTP/1.1, sends ETags and answers matching If-None-Match
+requests with 304, counts requests and connections, and can inject
+transient 503 (or 429) responses and latency to exercise the crawler's
+retries.
+
+Example:
+    python fixture_server.py fixtures --port 8765 --fail-every 5
+    python dg_crawler.py infos 20230501 20230502 fixture_run \
+        --output-dir /tmp/dg --base-url http://127.0.0.1:8765
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def load_fixtures(fixture_dir):
+    """
+    Reads the URL to file mapping of a fixture directory.
+
+    Args:
+        fixture_dir (str): Directory with urls.json and the HTML files.
+
+    Returns:
+        dict: Request path (with or without query) -> HTML bytes.
+    """
+    with open(os.path.join(fixture_dir, "urls.json"), encoding = 'utf-8') as f:
+        urls = json.load(f)
+    pages = {}
+    for path, file_name in urls.items():
+        with open(os.path.join(fixture_dir, file_name), 'rb') as f:
+            pages[path] = f.read()
+    return pages
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves fixture pages over persistent connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            n_request = server.requests
+        if server.delay:
+            time.sleep(server.delay)
+
+        parts = urlsplit(self.path)
+        page = server.pages.get(f"{parts.path}?{parts.query}", server.pages.get(parts.path))
+        if server.fail_every and n_request % server.fail_every == 0:
+            status, body = server.fail_status, b"Try again later"
+        elif page is None:
+            status, body = 404, b"Not Found"
+        else:
+            status, body = 200, page
+        etag = None
+        if status == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+                with server.lock:
+                    server.not_modified += 1
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(fixture_dir, port = 0, fail_every = 0, delay = 0.0,
+                   fail_status = 503):
+    """
+    Starts the stand-in server on a background thread.
+
+    Args:
+        fixture_dir (str): Directory with urls.json and the HTML files.
+        port (int): Port to listen on (0 picks a free port).
+        fail_every (int): Answer every n-th request with 503 (0 never).
+        delay (float): Seconds to wait before answering each request.
+        fail_status (int): Status of the injected failures, e.g. 503 or 429
+            (sent with Retry-After: 0).
+
+    Returns:
+        ThreadingHTTPServer: Running server; its `base_url` attribute is the
+        URL to pass to the crawler, and `requests` / `connections` /
+        `not_modified` count what it has served. Call `shutdown()` to stop it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    server.pages = load_fixtures(fixture_dir)
+    server.fail_every = fail_every
+    server.delay = delay
+    server.fail_status = fail_status
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = 0
+    server.not_modified = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve saved race pages locally")
+    parser.add_argument("fixture_dir", help = "Directory with urls.json and HTML files")
+    parser.add_argument("--port", type = int, default = 8765, help = "Port to listen on")
+    parser.add_argument("--fail-every", type = int, default = 0,
+                        help = "Answer every n-th request with a failure")
+    parser.add_argument("--fail-status", type = int, default = 503,
+                        help = "Status of the injected failures (503 or 429)")
+    parser.add_argument("--delay", type = float, default = 0.0,
+                        help = "Seconds to wait before each response")
+    args = parser.parse_args()
+
+    server = serve_fixtures(
+        args.fixture_dir, args.port, args.fail_every, args.delay, args.fail_status
+    )
+    print(f"Serving {len(server.pages)} fixture pages at {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Checks the async crawler against the local fixture server: retries of
+transient failures, per-host rate limiting, resuming from the progress
+file and the rows written.
+"""
+
+import asyncio
+import csv
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dg_crawler import HostRateLimiter, run
+from dg_fetch_raceresults import parse_race_links, parse_race_results
+from dg_output import RACE_RESULT_SCHEMA
+from fixture_server import serve_fixtures
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+
+
+def fixture_rows():
+    # rows of every race page of the calendar, parsed straight from the files
+    with open(os.path.join(FIXTURES, "rennkalender.html"), encoding = 'utf-8') as f:
+        links = parse_race_links(f.read())
+    rows = []
+    for link in links:
+        race_id = link.rsplit("=", 1)[1]
+        with open(os.path.join(FIXTURES, f"rennen_{race_id}.html"), encoding = 'utf-8') as f:
+            rows += parse_race_results(f.read(), link)
+    # the CSV holds every schema column, empty where a page has fewer cells
+    width = len(RACE_RESULT_SCHEMA)
+    return links, sorted([str(v) for v in row] + [""] * (width - len(row)) for row in rows)
+
+
+def crawl_results(server, out_dir, **kwargs):
+    files = {
+        "output_file": os.path.join(out_dir, "results.csv"),
+        "errors_file": os.path.join(out_dir, "errors.jsonl"),
+        "progress_file": os.path.join(out_dir, "results.progress"),
+        "links_file": os.path.join(out_dir, "results.links"),
+    }
+    stats = asyncio.run(run(
+        "results", "20230501", "20230502", rate = 0, backoff = 0.01,
+        base_url = server.base_url, **files, **kwargs
+    ))
+    return stats, files
+
+
+def read_rows(path):
+    with open(path, encoding = 'utf-8', newline = "") as f:
+        return sorted(csv.reader(f))
+
+
+@pytest.mark.parametrize("fail_status", [503, 429])
+def test_crawl_retries_transient_failures(tmp_path, fail_status):
+    links, expected = fixture_rows()
+    server = serve_fixtures(FIXTURES, fail_every = 2, fail_status = fail_status)
+    try:
+        stats, files = crawl_results(server, str(tmp_path), concurrency = 2)
+    finally:
+        server.shutdown()
+
+    assert stats["links"] == len(links)
+    assert stats["done"] == len(links) and stats["failed"] == 0
+    # every other request failed once and was retried
+    assert server.requests >= 2 * (len(links) + 1) - 1
+    assert read_rows(files["output_file"]) == expected
+    with open(files["progress_file"], encoding = 'utf-8') as f:
+        assert sorted(f.read().split()) == sorted(links)
+
+
+def test_crawl_resumes_from_progress_file(tmp_path):
+    links, expected = fixture_rows()
+    server = serve_fixtures(FIXTURES)
+    try:
+        # an earlier run that finished the first race
+        with open(tmp_path / "results.progress", 'w', encoding = 'utf-8') as f:
+            f.write(links[0] + "\n")
+        stats, files = crawl_results(server, str(tmp_path))
+        assert stats["skipped"] == 1 and stats["done"] == len(links) - 1
+        # the calendar and the two remaining races
+        assert server.requests == len(links)
+        first_id = links[0].rsplit("=", 1)[1]
+        assert read_rows(files["output_file"]) == [r for r in expected if r[0] != first_id]
+
+        # everything is done now: no race page is requested again
+        stats, _ = crawl_results(server, str(tmp_path))
+        assert stats["skipped"] == len(links) and stats["done"] == 0
+        assert server.requests == len(links)
+    finally:
+        server.shutdown()
+
+
+def test_failed_fetch_is_not_marked_done(tmp_path):
+    server = serve_fixtures(FIXTURES)
+    try:
+        with open(tmp_path / "results.links", 'w', encoding = 'utf-8') as f:
+            f.write("https://www.deutscher-galopp.de/gr/renntage/rennen.php?id=1399999\n")
+        stats, files = crawl_results(server, str(tmp_path), retries = 3)
+    finally:
+        server.shutdown()
+
+    # a 404 is not retried, logged as a fetch error and left for a later run
+    assert stats["failed"] == 1 and server.requests == 1
+    with open(files["errors_file"], encoding = 'utf-8') as f:
+        assert '"fetch"' in f.read()
+    with open(files["progress_file"], encoding = 'utf-8') as f:
+        assert f.read() == ""
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    async def times():
+        limiter = HostRateLimiter(20)
+        stamps = {}
+
+        async def request(host):
+            await limiter.wait(host)
+            stamps.setdefault(host, []).append(time.perf_counter())
+
+        await asyncio.gather(*(request(h) for h in ["a", "b"] * 5))
+        return stamps
+
+    stamps = asyncio.run(times())
+    for host_stamps in stamps.values():
+        gaps = [b - a for a, b in zip(host_stamps, host_stamps[1:])]
+        assert min(gaps) > 0.04
+    # hosts do not wait for each other
+    assert abs(stamps["a"][0] - stamps["b"][0]) < 0.04
@@ -0,0 +1,610 @@
+"""
+Python port of base_feature_engineering.R.
+
+Computes the course record, horse, jockey, trainer, market, draw effect and
+GAG indicator features of documentation/feature_definitions.md with the
+exact semantics of the R script (including its lag-after-window conventions
+and the "Sand"/"Dirt" literals it uses), but without grouped R calls: the
+races are sorted once per entity, and every cumulative, lagged, rolling and
+date-windowed statistic is computed on the sorted NumPy arrays from group
+start offsets.
+
+The R script reads and writes .Rds files. Export the cleaned data once with
+arrow::write_parquet(races, "cleaned_german_racing_data.parquet"), and export
+the R output the same way to validate this port against it:
+    python base_feature_engineering.py \
+        --validate ../data/processed/engineered_features_r.parquet
+"""
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+
+NS_PER_DAY = 86400 * 10 ** 9
+
+# Features in the order the R script creates them
+HORSE_FEATURES = [
+    "win", "hoattend", "hoattend_turf", "hoattend_dirt", "hoattend365",
+    "hoattend730", "hoattend_sq", "hofirstrace", "howins", "howins730",
+    "howins_turf", "howins_dirt", "hosr", "hosr_turf", "hosr_dirt", "hosr730",
+    "hoearnings", "hoearnings_turf", "hoearnings_dirt", "hoearnings365",
+    "homeanearn", "homeanearn_turf", "homeanearn_dirt", "homeanearn365",
+    "hosprat", "holastsprat", "homean4sprat", "hodays", "hodays_turf",
+    "hodays_dirt", "blinkers1sttime", "hcpclass", "hohcpclassdrop",
+    "hoavgdistbtn", "hoavgdistbtn_turf", "hoavgdistbtn_dirt",
+    "hoavgdistbtn_log", "honetgag", "hoage_sq", "hoprestige", "hoprestige_sq",
+]
+JOCKEY_FEATURES = [
+    "joattend", "joattend_turf", "joattend_dirt", "joattend365", "jowins",
+    "jowins_turf", "jowins_dirt", "jowins365", "josr", "josr_turf",
+    "josr_dirt", "josr365", "joearnings", "joearnings_turf",
+    "joearnings_dirt", "jomeanearn", "jomeanearn_turf", "jomeanearn_dirt",
+]
+TRAINER_FEATURES = ["trattend", "trwins", "trsr", "trcumearnings", "trmeanearn"]
+MARKET_FEATURES = ["reciprocal_odds", "sum_rec_odds", "pub_est"]
+DRAW_FEATURES = ["hodraw", "draweffect_mean", "draweffect_median"]
+GAG_FEATURES = ["gaglastwin_turf", "gagindicator_turf"]
+FEATURES = (
+    ["course_record"] + HORSE_FEATURES + JOCKEY_FEATURES + TRAINER_FEATURES +
+    MARKET_FEATURES + DRAW_FEATURES + GAG_FEATURES
+)
+
+
+##------------- Sorted-array group primitives --------------------------------##
+
+
+class Groups:
+    """
+    Rows sorted by entity, keeping date order within each entity.
+
+    The frame passed in must already be in date order (as after the R
+    script's arrange(date_time)); a stable sort by entity code then gives
+    every entity's races in date order, ties in input order. Missing keys
+    form their own group, as with dplyr's group_by.
+
+    Args:
+        keys (array-like): Entity key per row (horse, jockey, trainer).
+    """
+
+    def __init__(self, keys):
+        codes, _ = pd.factorize(keys, use_na_sentinel = False)
+        self.order = np.argsort(codes, kind = "stable")
+        self.codes = codes[self.order]
+        n = len(self.codes)
+        new_group = np.ones(n, dtype = bool)
+        new_group[1:] = self.codes[1:] != self.codes[:-1]
+        # index of the first row of each row's group
+        self.start = np.maximum.accumulate(np.where(new_group, np.arange(n), 0))
+        self.is_first = new_group
+        # 0-based position within the group (row_number() - 1)
+        self.position = np.arange(n) - self.start
+
+    def sort(self, values):
+        """Puts a column in group order."""
+        return np.asarray(values)[self.order]
+
+    def unsort(self, values):
+        """Puts a group-ordered array back in frame order."""
+        out = np.empty_like(values)
+        out[self.order] = values
+        return out
+
+    def lag(self, x, default = np.nan):
+        """dplyr::lag within groups."""
+        x = np.asarray(x, dtype = float)
+        out = np.empty_like(x)
+        out[1:] = x[:-1]
+        out[self.is_first] = default
+        return out
+
+    def cumsum(self, x):
+        """cumsum within groups; like R, a missing value propagates."""
+        x = np.asarray(x, dtype = float)
+        missing = np.isnan(x)
+        filled = np.where(missing, 0.0, x)
+        total = np.cumsum(filled)
+        out = total - (total[self.start] - filled[self.start])
+        n_missing = np.cumsum(missing)
+        seen_missing = n_missing - (n_missing[self.start] - missing[self.start])
+        out[seen_missing > 0] = np.nan
+        return out
+
+    def locf(self, x):
+        """zoo::na.locf(na.rm = FALSE) within groups."""
+        x = np.asarray(x, dtype = float)
+        last = np.where(np.isnan(x), -1, np.arange(len(x)))
+        last = np.maximum.accumulate(last)
+        valid = last >= self.start
+        out = np.full_like(x, np.nan)
+        out[valid] = x[last[valid]]
+        return out
+
+    def rolling_mean(self, x, width):
+        """zoo::rollapplyr(x, width, mean, na.rm = TRUE, partial = TRUE)."""
+        x = np.asarray(x, dtype = float)
+        missing = np.isnan(x)
+        sums = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, x))])
+        counts = np.concatenate([[0], np.cumsum(~missing)])
+        i = np.arange(len(x))
+        left = np.maximum(i - width + 1, self.start)
+        n = counts[i + 1] - counts[left]
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            return np.where(n > 0, (sums[i + 1] - sums[left]) / n, np.nan)
+
+    def window_sum(self, x, day, k):
+        """
+        runner::sum_run(x, k, idx = day) within groups.
+
+        Sums x over the rows of the group up to and including the current
+        one whose day lies in (day - k, day]; missing values count as 0.
+
+        Args:
+            x (np.ndarray): Values in group order.
+            day (np.ndarray): Integer day numbers in group order.
+            k (int): Window length in days.
+
+        Returns:
+            np.ndarray: Window sums.
+        """
+        x = np.where(np.isnan(np.asarray(x, dtype = float)), 0.0, x)
+        day = day - day.min()
+        # one key per (group, day), with groups far enough apart that no
+        # window reaches into the previous group
+        span = int(day.max()) + k + 1
+        key = self.codes.astype(np.int64) * span + day
+        left = np.searchsorted(key, key - k, side = "right")
+        left = np.maximum(left, self.start)
+        sums = np.concatenate([[0.0], np.cumsum(x)])
+        i = np.arange(len(x))
+        return sums[i + 1] - sums[left]
+
+
+def _ratio_or_zero(num, den):
+    # ifelse(den == 0, 0, num / den)
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        return np.where(den == 0, 0.0, num / den)
+
+
+def _ratio(num, den):
+    # plain R division: x / 0 is Inf, 0 / 0 is NaN
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        return num / den
+
+
+def _logical(values):
+    # 1/0/NaN floats as a nullable boolean column, like an R logical
+    missing = np.isnan(values)
+    return pd.arrays.BooleanArray(np.where(missing, 0, values).astype(bool), missing)
+
+
+def _on_uniques(values, test):
+    # evaluates a test once per distinct value; missing values fail it
+    codes, uniques = pd.factorize(values)
+    hit = np.append(np.asarray(test(pd.Series(uniques, dtype = "object")), dtype = bool), False)
+    return hit[codes]
+
+
+def _is(values, literal):
+    # R `==` with NA treated as no match
+    return _on_uniques(values, lambda uniques: uniques == literal)
+
+
+def roman_to_int(numeral):
+    """
+    Reads a roman (or arabic) class number like R's as.roman.
+
+    Args:
+        numeral (str): e.g. 'III'.
+
+    Returns:
+        float: The number, or NaN if it is not a valid numeral.
+    """
+    numeral = numeral.strip().upper()
+    if numeral.isdigit():
+        return float(numeral)
+    if not numeral or not re.fullmatch(r"M{0,3}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})", numeral):
+        return np.nan
+    values = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
+    total = 0
+    for current, following in zip(numeral, numeral[1:] + " "):
+        value = values[current]
+        total += -value if values.get(following, 0) > value else value
+    return float(total)
+
+
+def _is_handicap(race_class_old):
+    # grepl("^Ausgleich", race_class_old)
+    return _on_uniques(
+        race_class_old, lambda uniques: uniques.str.match(r"^Ausgleich").fillna(False)
+    )
+
+
+def handicap_class(race_class_old):
+    """
+    Handicap class of 'Ausgleich' races (NaN for other races).
+
+    Args:
+        race_class_old (pd.Series): Race class names.
+
+    Returns:
+        np.ndarray: Class number per race.
+    """
+    codes, uniques = pd.factorize(race_class_old)
+    numbers = np.array([
+        roman_to_int(name.replace("Ausgleich ", "")) if name.startswith("Ausgleich") else np.nan
+        for name in uniques
+    ] + [np.nan])
+    return numbers[codes]
+
+
+##------------- Feature blocks ----------------------------------------------##
+
+
+def course_records(races):
+    """Fastest race time per course, distance and surface."""
+    keys = ["dg_course", "race_distance", "surface"]
+    record = races.groupby(keys, dropna = False)["race_time_secs"].transform("min")
+    # min(..., na.rm = TRUE) of an all-missing group is Inf in R
+    return record.fillna(np.inf).to_numpy(dtype = float)
+
+
+def horse_features(races):
+    """
+    Horse history features.
+
+    Args:
+        races (pd.DataFrame): Races in date order, with course_record.
+
+    Returns:
+        dict: Feature name -> array in frame order.
+    """
+    g = Groups(races["dg_horseid"])
+    col = lambda name: g.sort(races[name].to_numpy())
+    num = lambda name: g.sort(pd.to_numeric(races[name]).to_numpy(dtype = float))
+    date_ns = g.sort(races["date_time"].to_numpy(dtype = "datetime64[ns]").astype(np.int64))
+    day = date_ns // NS_PER_DAY
+    days = date_ns / NS_PER_DAY
+    surface = col("surface")
+    turf = _is(surface, "Turf")
+    sand = _is(surface, "Sand")
+    dirt = _is(surface, "Dirt")
+    position = num("position")
+    earnings = num("earnings")
+    present = (~pd.isna(col("dg_horseid"))).astype(float)
+
+    f = {}
+    f["win"] = np.where(np.isnan(position), 0.0, (position == 1).astype(float))
+    win = f["win"]
+    f["hoattend"] = g.position.astype(float)
+    f["hoattend_turf"] = g.lag(g.cumsum(turf), 0)
+    f["hoattend_dirt"] = g.lag(g.cumsum(sand), 0)
+    f["hoattend365"] = g.lag(g.window_sum(present, day, 365), 0)
+    f["hoattend730"] = g.lag(g.window_sum(present, day, 730), 0)
+    f["hoattend_sq"] = f["hoattend"] ** 2
+    f["hofirstrace"] = (f["hoattend"] == 0).astype(float)
+    f["howins"] = g.lag(g.cumsum(win), 0)
+    f["howins730"] = g.lag(g.window_sum(win, day, 730), 0)
+    f["howins_turf"] = g.lag(g.cumsum(np.where(turf, win, 0)), 0)
+    f["howins_dirt"] = g.lag(g.cumsum(np.where(sand, win, 0)), 0)
+    f["hosr"] = _ratio_or_zero(f["howins"], f["hoattend"])
+    f["hosr_turf"] = _ratio_or_zero(f["howins_turf"], f["hoattend_turf"])
+    f["hosr_dirt"] = _ratio_or_zero(f["howins_dirt"], f["hoattend_dirt"])
+    f["hosr730"] = _ratio_or_zero(f["howins730"], f["hoattend730"])
+    f["hoearnings"] = g.lag(g.cumsum(earnings), 0)
+    f["hoearnings_turf"] = g.lag(g.cumsum(np.where(turf, earnings, 0)), 0)
+    f["hoearnings_dirt"] = g.lag(g.cumsum(np.where(dirt, earnings, 0)), 0)
+    f["hoearnings365"] = g.lag(g.window_sum(earnings, day, 365))
+    f["homeanearn"] = _ratio_or_zero(f["hoearnings"], f["hoattend"])
+    f["homeanearn_turf"] = _ratio_or_zero(f["hoearnings_turf"], f["hoattend_turf"])
+    f["homeanearn_dirt"] = _ratio_or_zero(f["hoearnings_dirt"], f["hoattend_dirt"])
+    f["homeanearn365"] = _ratio_or_zero(f["hoearnings365"], f["hoattend365"])
+
+    hosprat = 100 + (col("course_record").astype(float) - num("hotime")) * 5
+    f["hosprat"] = np.where(hosprat < 0, 0.0, hosprat)
+    f["holastsprat"] = g.locf(g.lag(f["hosprat"], 0))
+    f["homean4sprat"] = g.lag(g.rolling_mean(f["hosprat"], 4), 0)
+
+    f["hodays"] = days - g.lag(days)
+    f["hodays_turf"] = days - g.lag(g.locf(np.where(turf, days, np.nan)))
+    f["hodays_dirt"] = days - g.lag(g.locf(np.where(dirt, days, np.nan)))
+    blinkers = num("blinkers")
+    blinkers_races = g.cumsum(np.where(np.isnan(blinkers), np.nan, blinkers == 1))
+    f["blinkers1sttime"] = np.where(
+        np.isnan(blinkers_races), np.nan, (blinkers_races == 1).astype(float)
+    )
+
+    hcpclass = g.sort(handicap_class(races["race_class_old"]))
+    f["hcpclass"] = hcpclass
+    last_hcpclass = g.lag(hcpclass)
+    with np.errstate(invalid = "ignore"):
+        f["hohcpclassdrop"] = (
+            ~np.isnan(hcpclass) & ~np.isnan(last_hcpclass) & (hcpclass > last_hcpclass)
+        )
+
+    dist_btn = num("dist_btn_cum")
+    dist_btn0 = np.where(np.isnan(dist_btn), 0.0, dist_btn)
+    placed = ~np.isnan(position)
+    f["hoavgdistbtn"] = g.lag(_ratio(g.cumsum(dist_btn0), g.cumsum(placed)))
+    f["hoavgdistbtn_turf"] = g.lag(_ratio(
+        g.cumsum(np.where(turf, dist_btn0, 0)), g.cumsum(placed & turf)
+    ))
+    f["hoavgdistbtn_dirt"] = g.lag(_ratio(
+        g.cumsum(np.where(dirt, dist_btn0, 0)), g.cumsum(placed & dirt)
+    ))
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        f["hoavgdistbtn_log"] = np.log(f["hoavgdistbtn"] + 1)
+    weight = num("weight")
+    f["honetgag"] = np.where(turf, num("gag_turf") - weight, num("gag_dirt") - weight)
+    f["hoage_sq"] = num("hoage") ** 2
+    # dplyr::cummean includes the current race
+    f["hoprestige"] = g.cumsum(num("purse")) / (g.position + 1)
+    f["hoprestige_sq"] = f["hoprestige"] ** 2
+
+    return {name: g.unsort(values) for name, values in f.items()}
+
+
+def jockey_features(races, win):
+    """
+    Jockey history features.
+
+    Args:
+        races (pd.DataFrame): Races in date order.
+        win (np.ndarray): Win indicator in frame order.
+
+    Returns:
+        dict: Feature name -> array in frame order.
+    """
+    g = Groups(races["jockey"])
+    date_ns = g.sort(races["date_time"].to_numpy(dtype = "datetime64[ns]").astype(np.int64))
+    day = date_ns // NS_PER_DAY
+    surface = g.sort(races["surface"].to_numpy())
+    turf = _is(surface, "Turf")
+    sand = _is(surface, "Sand")
+    dirt = _is(surface, "Dirt")
+    win = g.sort(win)
+    earnings = g.sort(pd.to_numeric(races["earnings"]).to_numpy(dtype = float))
+    present = (~pd.isna(g.sort(races["jockey"].to_numpy()))).astype(float)
+
+    f = {}
+    f["joattend"] = g.position.astype(float)
+    f["joattend_turf"] = g.lag(g.cumsum(turf), 0)
+    f["joattend_dirt"] = g.lag(g.cumsum(sand), 0)
+    f["joattend365"] = g.lag(g.window_sum(present, day, 365), 0)
+    f["jowins"] = g.lag(g.cumsum(win), 0)
+    f["jowins_turf"] = g.lag(g.cumsum(np.where(turf, win, 0)), 0)
+    f["jowins_dirt"] = g.lag(g.cumsum(np.where(sand, win, 0)), 0)
+    f["jowins365"] = g.lag(g.window_sum(win, day, 365), 0)
+    f["josr"] = _ratio_or_zero(f["jowins"], f["joattend"])
+    f["josr_turf"] = _ratio(f["jowins_turf"], f["joattend_turf"])
+    f["josr_dirt"] = _ratio(f["jowins_dirt"], f["joattend_dirt"])
+    f["josr365"] = _ratio_or_zero(f["jowins365"], f["joattend365"])
+    f["joearnings"] = g.lag(g.cumsum(earnings), 0)
+    f["joearnings_turf"] = g.lag(g.cumsum(np.where(turf, earnings, 0)), 0)
+    f["joearnings_dirt"] = g.lag(g.cumsum(np.where(dirt, earnings, 0)), 0)
+    f["jomeanearn"] = _ratio(f["joearnings"], f["joattend"])
+    f["jomeanearn_turf"] = _ratio(f["joearnings_turf"], f["joattend_turf"])
+    f["jomeanearn_dirt"] = _ratio(f["joearnings_dirt"], f["joattend_dirt"])
+    return {name: g.unsort(values) for name, values in f.items()}
+
+
+def trainer_features(races, win):
+    """
+    Trainer history features, taken at the trainer's first runner of a race.
+
+    Args:
+        races (pd.DataFrame): Races in date order.
+        win (np.ndarray): Win indicator in frame order.
+
+    Returns:
+        dict: Feature name -> array in frame order.
+    """
+    g = Groups(races["trainer"])
+    earnings = g.sort(pd.to_numeric(races["earnings"]).to_numpy(dtype = float))
+    per_runner = pd.DataFrame({
+        "trainer": races["trainer"].to_numpy(),
+        "dg_raceid": races["dg_raceid"].to_numpy(),
+        "trattend": g.unsort(g.position.astype(float)),
+        "trwins": g.unsort(g.lag(g.cumsum(g.sort(win)), 0)),
+        "trcumearnings": g.unsort(g.lag(g.cumsum(earnings), 0)),
+    })
+    per_race = per_runner.groupby(["trainer", "dg_raceid"], dropna = False)
+    f = {
+        name: per_race[name].transform("min").to_numpy(dtype = float)
+        for name in ("trattend", "trwins", "trcumearnings")
+    }
+    f["trsr"] = _ratio_or_zero(f["trwins"], f["trattend"])
+    f["trmeanearn"] = _ratio(f["trcumearnings"], f["trattend"])
+    return f
+
+
+def market_features(races):
+    """Reciprocal odds and the public's win probability estimate."""
+    codes, _ = pd.factorize(races["dg_raceid"], use_na_sentinel = False)
+    with np.errstate(divide = "ignore"):
+        reciprocal = 1 / pd.to_numeric(races["odds"]).to_numpy(dtype = float)
+    missing = np.isnan(reciprocal)
+    # sum() per race, NA if any runner's odds are missing
+    sums = np.bincount(codes, weights = np.where(missing, 0.0, reciprocal))
+    sums[np.bincount(codes, weights = missing) > 0] = np.nan
+    sum_rec_odds = sums[codes]
+    return {
+        "reciprocal_odds": reciprocal,
+        "sum_rec_odds": sum_rec_odds,
+        "pub_est": reciprocal / sum_rec_odds,
+    }
+
+
+def draw_features(races):
+    """
+    Draw position and the historical draw effect of Ausgleich IV turf races.
+
+    Returns:
+        dict: Feature name -> array in frame order.
+    """
+    ausgleich4 = races.loc[
+        _is(races["race_class_old"], "Ausgleich IV") & _is(races["surface"], "Turf") &
+        races["hostall"].notna(),
+        ["dg_raceid", "dg_course", "race_distance", "hostall", "dist_btn_cum", "date_time"]
+    ].copy()
+    ausgleich4["hodraw"] = ausgleich4.groupby("dg_raceid")["hostall"].rank(method = "min")
+    stall1 = ausgleich4.loc[ausgleich4["hostall"] == 1, ["dg_raceid", "dist_btn_cum"]]
+    stall1 = stall1.rename(columns = {"dist_btn_cum": "diststall1winner"})
+    ausgleich4 = ausgleich4.merge(stall1, on = "dg_raceid", how = "left")
+    ausgleich4["diststall1"] = ausgleich4["dist_btn_cum"] - ausgleich4["diststall1winner"]
+
+    keys = ["dg_course", "race_distance", "hodraw"]
+    draweffect = (
+        ausgleich4[ausgleich4["date_time"].dt.year < 2019]
+        .groupby(keys, dropna = False)["diststall1"]
+        .agg(draweffect_mean = "mean", draweffect_median = "median")
+        .reset_index()
+    )
+    hodraw = races.groupby("dg_raceid", dropna = False)["hostall"].rank(method = "min")
+    joined = pd.DataFrame({
+        "dg_course": races["dg_course"].to_numpy(),
+        "race_distance": races["race_distance"].to_numpy(),
+        "hodraw": hodraw.to_numpy(dtype = float),
+    }).merge(draweffect, on = keys, how = "left")
+    return {name: joined[name].to_numpy() for name in DRAW_FEATURES}
+
+
+def gag_features(races, hcp_race_won_turf):
+    """
+    Handicap rating before the last won turf handicap, and whether the
+    current rating is below it.
+
+    Args:
+        races (pd.DataFrame): Races in date order.
+        hcp_race_won_turf (np.ndarray): Won turf Ausgleich race per row.
+
+    Returns:
+        dict: Feature name -> array in frame order.
+    """
+    g = Groups(races["dg_horseid"])
+    gag_turf = g.sort(pd.to_numeric(races["gag_turf"]).to_numpy(dtype = float))
+    last_win_gag = g.locf(np.where(g.sort(hcp_race_won_turf), gag_turf, np.nan))
+    gaglastwin_turf = g.lag(np.where(np.isnan(last_win_gag), 0.0, last_win_gag), 0)
+    gagindicator = np.where(
+        np.isnan(gag_turf), np.nan, (gag_turf < gaglastwin_turf).astype(float)
+    )
+    return {
+        "gaglastwin_turf": g.unsort(gaglastwin_turf),
+        "gagindicator_turf": _logical(g.unsort(gagindicator)),
+    }
+
+
+def engineer_features(races):
+    """
+    Adds every feature of base_feature_engineering.R.
+
+    Args:
+        races (pd.DataFrame): Cleaned race data (one row per runner).
+
+    Returns:
+        pd.DataFrame: Races in date order with the feature columns added.
+    """
+    races = races.copy()
+    races["date_time"] = pd.to_datetime(races["date_time"])
+    races["course_record"] = course_records(races)
+    races = races.sort_values("date_time", kind = "stable").reset_index(drop = True)
+
+    features = horse_features(races)
+    features.update(jockey_features(races, features["win"]))
+    features.update(trainer_features(races, features["win"]))
+    features.update(market_features(races))
+    features.update(draw_features(races))
+    position = pd.to_numeric(races["position"]).to_numpy(dtype = float)
+    won_hcp_turf = (
+        (position == 1) & _is(races["surface"], "Turf") &
+        _is_handicap(races["race_class_old"])
+    )
+    features.update(gag_features(races, won_hcp_turf))
+
+    new_columns = pd.DataFrame(
+        {name: features[name] for name in FEATURES if name != "course_record"},
+        index = races.index
+    )
+    races = races.drop(columns = new_columns.columns, errors = "ignore")
+    return pd.concat([races, new_columns], axis = 1)
+
+
+##------------- Validation against the R output -----------------------------##
+
+
+def compare_with_r(features, r_features, keys = ("dg_raceid", "dg_horseid"),
+                   rtol = 1e-9, atol = 1e-9):
+    """
+    Compares this port's features with the output of the R script.
+
+    Rows are matched on `keys`; NaN/NA match NaN/NA and infinities match
+    infinities of the same sign.
+
+    Args:
+        features (pd.DataFrame): Output of `engineer_features`.
+        r_features (pd.DataFrame): Output of base_feature_engineering.R.
+        keys (tuple): Columns identifying a runner.
+        rtol (float): Relative tolerance.
+        atol (float): Absolute tolerance.
+
+    Returns:
+        pd.DataFrame: Per feature the number of compared rows and of
+        mismatches, plus the largest absolute difference.
+    """
+    columns = [c for c in FEATURES if c in r_features.columns]
+    merged = features[list(keys) + columns].merge(
+        r_features[list(keys) + columns], on = list(keys), suffixes = ("_py", "_r")
+    )
+    report = []
+    for column in columns:
+        py = pd.to_numeric(merged[column + "_py"].astype("Float64"), errors = "coerce").to_numpy(dtype = float, na_value = np.nan)
+        r = pd.to_numeric(merged[column + "_r"].astype("Float64"), errors = "coerce").to_numpy(dtype = float, na_value = np.nan)
+        same = np.isclose(py, r, rtol = rtol, atol = atol, equal_nan = True) | (py == r)
+        finite = np.isfinite(py) & np.isfinite(r)
+        diff = np.abs(py[finite] - r[finite])
+        report.append({
+            "feature": column,
+            "rows": len(merged),
+            "mismatches": int((~same).sum()),
+            "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        })
+    return pd.DataFrame(report)
+
+
+def read_table(path):
+    """Reads a Parquet or CSV file."""
+    if path.endswith(".csv"):
+        return pd.read_csv(path, parse_dates = ["date_time"])
+    return pd.read_parquet(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Engineer horse, jockey and trainer features")
+    parser.add_argument("--input", default = "../data/processed/cleaned_german_racing_data.parquet",
+                        help = "Cleaned race data (Parquet or CSV)")
+    parser.add_argument("--output", default = "../data/processed/engineered_features.parquet",
+                        help = "Output Parquet file")
+    parser.add_argument("--validate", default = None,
+                        help = "R output (Parquet or CSV) to compare the features with")
+    args = parser.parse_args()
+
+    races = read_table(args.input)
+    start = time.perf_counter()
+    features = engineer_features(races)
+    print(f"{len(features):,} runners, {len(FEATURES)} features in {time.perf_counter() - start:.2f}s")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok = True)
+    features.to_parquet(args.output, index = False)
+    print(f"Output saved to: {args.output}")
+
+    if args.validate:
+        report = compare_with_r(features, read_table(args.validate))
+        print(report.to_string(index = False))
+        print(f"{(report['mismatches'] > 0).sum()} of {len(report)} features differ from the R output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python port of base_feature_engineering.R.
+
+Generates synthetic German racing data shaped like the cleaned data set
+(about 3,500 races and 35,000 runners a year) and times engineer_features.
+
+Example:
+    python bench_base_features.py 20
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from base_feature_engineering import FEATURES, engineer_features
+
+COURSES = ["Köln", "Hoppegarten", "Baden-Baden", "Hamburg", "München", "Dortmund"]
+CLASSES = ["Ausgleich I", "Ausgleich II", "Ausgleich III", "Ausgleich IV", "Listenrennen", "Gruppe III", None]
+
+
+def synthetic_races(n_years, races_per_year = 3500, field_size = 10, seed = 7):
+    """
+    Builds random race data with the columns base_feature_engineering uses.
+
+    Args:
+        n_years (int): Years of racing.
+        races_per_year (int): Races per year.
+        field_size (int): Runners per race.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: One row per runner.
+    """
+    rng = np.random.default_rng(seed)
+    n_races = n_years * races_per_year
+    n = n_races * field_size
+    race = np.repeat(np.arange(n_races), field_size)
+    start = np.datetime64("2003-01-01T12:00", "ns")
+    race_time = start + (np.sort(rng.uniform(0, n_years * 365, n_races)) * 86400e9).astype("timedelta64[ns]")
+    n_horses = n_races * field_size // 12
+    position = np.tile(np.arange(1, field_size + 1), n_races).astype(float)
+    position[rng.random(n) < 0.03] = np.nan
+    race_distance = rng.choice([1200, 1400, 1600, 2000, 2400], n_races)
+    surface = rng.choice(["Turf", "Sand"], n_races, p = [0.8, 0.2])
+    return pd.DataFrame({
+        "dg_raceid": race,
+        "dg_horseid": rng.integers(0, n_horses, n),
+        "jockey": rng.integers(0, 400, n).astype(str),
+        "trainer": rng.integers(0, 300, n).astype(str),
+        "date_time": race_time[race],
+        "dg_course": np.array(COURSES)[rng.integers(0, len(COURSES), n_races)][race],
+        "race_distance": race_distance[race],
+        "surface": surface[race],
+        "race_class_old": np.array(CLASSES, dtype = object)[rng.integers(0, len(CLASSES), n_races)][race],
+        "position": position,
+        "earnings": np.where(position <= 3, rng.integers(500, 20000, n), 0).astype(float),
+        "race_time_secs": (race_distance / 16.5 + rng.normal(0, 2, n_races))[race],
+        "hotime": (race_distance / 16.5)[race] + rng.normal(1, 1.5, n),
+        "blinkers": (rng.random(n) < 0.1).astype(float),
+        "dist_btn_cum": np.where(position == 1, 0, rng.uniform(0, 20, n)),
+        "gag_turf": rng.uniform(45, 95, n).round(1),
+        "gag_dirt": rng.uniform(45, 95, n).round(1),
+        "weight": rng.uniform(52, 62, n).round(1),
+        "hoage": rng.integers(2, 10, n),
+        "purse": rng.choice([5100, 7000, 12000, 25000, 70000], n_races)[race].astype(float),
+        "odds": rng.uniform(1.5, 60, n).round(1),
+        "hostall": np.tile(np.arange(1, field_size + 1), n_races).astype(float),
+    })
+
+
+def main():
+    """Time feature engineering on the requested number of years."""
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    races = synthetic_races(n_years)
+
+    start = time.perf_counter()
+    features = engineer_features(races)
+    elapsed = time.perf_counter() - start
+
+    print(f"Base feature engineering, {n_years} years synthetic")
+    print(f"  {len(features):,} runners, {len(FEATURES)} features")
+    print(f"  {elapsed:6.2f}s  {len(features) / elapsed:,.0f} runners/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,631 @@
+"""
+Incremental entity-state store for horse, jockey and trainer career features.
+
+Instead of recomputing base_feature_engineering.py over the whole history
+for every new race day, the store keeps per-entity running state (counts,
+sums, last race dates, a ring buffer of the last 4 speed ratings and the
+events inside the 365/730-day windows) and is updated one race at a time.
+Pre-race feature rows for a race card are read straight from that state.
+
+The features follow base_feature_engineering.py exactly, so replaying a
+history race by race and emitting each race's rows before recording its
+result gives the same values as a full recompute (see `verify`). Speed
+ratings are computed when emitted, from raw finishing times and the store's
+course records, because the R script rates every race against the record
+over all races, including later ones.
+
+Example:
+    python entity_state.py replay ../data/processed/cleaned_german_racing_data.parquet
+    python entity_state.py emit next_card.parquet --output card_features.parquet
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from base_feature_engineering import (
+    compare_with_r, course_records, engineer_features, roman_to_int
+)
+
+
+NS_PER_DAY = 86400 * 10 ** 9
+NA_KEY = "<NA>"
+# Longest date window kept per entity (hoattend730, howins730)
+MAX_WINDOW_DAYS = 730
+
+# Pre-race features the store emits, in base_feature_engineering order
+HORSE_FEATURES = [
+    "hoattend", "hoattend_turf", "hoattend_dirt", "hoattend365",
+    "hoattend730", "hoattend_sq", "hofirstrace", "howins", "howins730",
+    "howins_turf", "howins_dirt", "hosr", "hosr_turf", "hosr_dirt", "hosr730",
+    "hoearnings", "hoearnings_turf", "hoearnings_dirt", "hoearnings365",
+    "homeanearn", "homeanearn_turf", "homeanearn_dirt", "homeanearn365",
+    "holastsprat", "homean4sprat", "hodays", "hodays_turf", "hodays_dirt",
+    "blinkers1sttime", "hcpclass", "hohcpclassdrop", "hoavgdistbtn",
+    "hoavgdistbtn_turf", "hoavgdistbtn_dirt", "hoavgdistbtn_log", "honetgag",
+    "hoage_sq", "hoprestige", "hoprestige_sq",
+]
+JOCKEY_FEATURES = [
+    "joattend", "joattend_turf", "joattend_dirt", "joattend365", "jowins",
+    "jowins_turf", "jowins_dirt", "jowins365", "josr", "josr_turf",
+    "josr_dirt", "josr365", "joearnings", "joearnings_turf",
+    "joearnings_dirt", "jomeanearn", "jomeanearn_turf", "jomeanearn_dirt",
+]
+TRAINER_FEATURES = ["trattend", "trwins", "trsr", "trcumearnings", "trmeanearn"]
+GAG_FEATURES = ["gaglastwin_turf", "gagindicator_turf"]
+STORE_FEATURES = HORSE_FEATURES + JOCKEY_FEATURES + TRAINER_FEATURES + GAG_FEATURES
+
+
+def _key(value):
+    # entity / course key; missing values share one key like in group_by
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return NA_KEY
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _num(value):
+    # card value as float, NaN if missing
+    try:
+        return float(value) if value is not None and value is not pd.NA else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _div(num, den):
+    # R division: x / 0 is +-Inf, 0 / 0 and NA are NaN
+    if math.isnan(num) or math.isnan(den):
+        return math.nan
+    if den == 0:
+        return math.nan if num == 0 else math.copysign(math.inf, num)
+    return num / den
+
+
+def _div_or_zero(num, den):
+    # ifelse(den == 0, 0, num / den)
+    return 0.0 if den == 0 else _div(num, den)
+
+
+def _handicap_class(race_class_old):
+    if isinstance(race_class_old, str) and race_class_old.startswith("Ausgleich"):
+        return roman_to_int(race_class_old.replace("Ausgleich ", ""))
+    return math.nan
+
+
+def _window_sums(window, day, k, fields):
+    # runner::sum_run over the events with day in (day - k, day]
+    sums = [0.0] * len(fields)
+    for event in window:
+        if event[0] > day - k:
+            for n, field in enumerate(fields):
+                value = event[field]
+                if not math.isnan(value):
+                    sums[n] += value
+    return sums
+
+
+def _records(rows):
+    # runner dicts with date_time as int nanoseconds
+    if isinstance(rows, list):
+        return rows
+    rows = rows.assign(date_time = pd.to_datetime(rows["date_time"]).astype("int64"))
+    return rows.to_dict("records")
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns = ["dg_raceid", "dg_horseid"] + STORE_FEATURES)
+
+
+def new_horse_state():
+    """Career state of a horse before its first race."""
+    return {
+        "attend": 0, "attend_turf": 0, "attend_sand": 0,
+        "wins": 0.0, "wins_turf": 0.0, "wins_sand": 0.0,
+        "earnings": 0.0, "earnings_turf": 0.0, "earnings_dirt": 0.0,
+        # (day, present, win, earnings) of races inside the longest window
+        "window": deque(),
+        # windowed sums as of the horse's last race (the R script lags them)
+        "attend365": 0.0, "attend730": 0.0, "wins730": 0.0, "earnings365": math.nan,
+        "last_ns": None, "last_turf_ns": None, "last_dirt_ns": None,
+        # (course key, finishing time) of the last 4 races, and of the last
+        # race with a time
+        "sprat_buffer": deque(maxlen = 4), "last_timed": None,
+        "blinkers": 0.0, "last_hcpclass": math.nan,
+        "dist_btn": 0.0, "dist_btn_turf": 0.0, "dist_btn_dirt": 0.0,
+        "placed": 0, "placed_turf": 0, "placed_dirt": 0,
+        "purse": 0.0, "last_win_gag": math.nan,
+    }
+
+
+def new_jockey_state():
+    """Career state of a jockey before the first ride."""
+    return {
+        "attend": 0, "attend_turf": 0, "attend_sand": 0,
+        "wins": 0.0, "wins_turf": 0.0, "wins_sand": 0.0,
+        "earnings": 0.0, "earnings_turf": 0.0, "earnings_dirt": 0.0,
+        "window": deque(), "attend365": 0.0, "wins365": 0.0,
+    }
+
+
+def new_trainer_state():
+    """Career state of a trainer before the first runner."""
+    return {"attend": 0, "wins": 0.0, "earnings": 0.0}
+
+
+class EntityStateStore:
+    """
+    Per-horse, per-jockey and per-trainer running state.
+
+    Args:
+        course_records (dict): Optional fixed course records, course key ->
+            record time; by default records are the fastest times recorded
+            so far.
+    """
+
+    def __init__(self, course_records = None):
+        self.horses = {}
+        self.jockeys = {}
+        self.trainers = {}
+        self.course_records = dict(course_records or {})
+        self.fixed_records = course_records is not None
+        self.races_recorded = 0
+
+    ##------------- Persistence ----------------------------------------------##
+
+    def save(self, path):
+        """
+        Writes the store to a JSON file (atomically).
+
+        Args:
+            path (str): Output file.
+        """
+        def plain(states):
+            return {
+                key: {k: list(v) if isinstance(v, deque) else v for k, v in state.items()}
+                for key, state in states.items()
+            }
+        data = {
+            "horses": plain(self.horses),
+            "jockeys": plain(self.jockeys),
+            "trainers": plain(self.trainers),
+            "course_records": self.course_records,
+            "fixed_records": self.fixed_records,
+            "races_recorded": self.races_recorded,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a store written by `save`.
+
+        Args:
+            path (str): Store file.
+
+        Returns:
+            EntityStateStore: The store.
+        """
+        with open(path, encoding = 'utf-8') as f:
+            data = json.load(f)
+        store = cls(data["course_records"] if data["fixed_records"] else None)
+        store.course_records = data["course_records"]
+        store.races_recorded = data["races_recorded"]
+        for key, state in data["horses"].items():
+            state["window"] = deque(state["window"])
+            state["sprat_buffer"] = deque(state["sprat_buffer"], maxlen = 4)
+            store.horses[key] = state
+        for key, state in data["jockeys"].items():
+            state["window"] = deque(state["window"])
+            store.jockeys[key] = state
+        store.trainers = data["trainers"]
+        return store
+
+    ##------------- Features --------------------------------------------------##
+
+    def _sprat(self, course_key, hotime):
+        record = self.course_records.get(course_key, math.inf)
+        hosprat = 100 + (record - hotime) * 5
+        return 0.0 if hosprat < 0 else hosprat
+
+    def horse_row(self, runner):
+        """Pre-race horse and GAG features of one card row."""
+        h = self.horses.get(_key(runner["dg_horseid"])) or new_horse_state()
+        turf = runner["surface"] == "Turf"
+        date_ns = runner["date_time"]
+        first = h["last_ns"] is None
+        f = {}
+        f["hoattend"] = float(h["attend"])
+        f["hoattend_turf"] = float(h["attend_turf"])
+        f["hoattend_dirt"] = float(h["attend_sand"])
+        f["hoattend365"] = h["attend365"]
+        f["hoattend730"] = h["attend730"]
+        f["hoattend_sq"] = f["hoattend"] ** 2
+        f["hofirstrace"] = float(f["hoattend"] == 0)
+        f["howins"] = h["wins"]
+        f["howins730"] = h["wins730"]
+        f["howins_turf"] = h["wins_turf"]
+        f["howins_dirt"] = h["wins_sand"]
+        f["hosr"] = _div_or_zero(f["howins"], f["hoattend"])
+        f["hosr_turf"] = _div_or_zero(f["howins_turf"], f["hoattend_turf"])
+        f["hosr_dirt"] = _div_or_zero(f["howins_dirt"], f["hoattend_dirt"])
+        f["hosr730"] = _div_or_zero(f["howins730"], f["hoattend730"])
+        f["hoearnings"] = h["earnings"]
+        f["hoearnings_turf"] = h["earnings_turf"]
+        f["hoearnings_dirt"] = h["earnings_dirt"]
+        f["hoearnings365"] = h["earnings365"]
+        f["homeanearn"] = _div_or_zero(f["hoearnings"], f["hoattend"])
+        f["homeanearn_turf"] = _div_or_zero(f["hoearnings_turf"], f["hoattend_turf"])
+        f["homeanearn_dirt"] = _div_or_zero(f["hoearnings_dirt"], f["hoattend_dirt"])
+        f["homeanearn365"] = _div_or_zero(f["hoearnings365"], f["hoattend365"])
+
+        f["holastsprat"] = 0.0 if h["last_timed"] is None else self._sprat(*h["last_timed"])
+        if first:
+            f["homean4sprat"] = 0.0
+        else:
+            sprats = [self._sprat(c, t) for c, t in h["sprat_buffer"] if not math.isnan(t)]
+            f["homean4sprat"] = sum(sprats) / len(sprats) if sprats else math.nan
+        f["hodays"] = math.nan if first else (date_ns - h["last_ns"]) / NS_PER_DAY
+        f["hodays_turf"] = (
+            math.nan if h["last_turf_ns"] is None else (date_ns - h["last_turf_ns"]) / NS_PER_DAY
+        )
+        f["hodays_dirt"] = (
+            math.nan if h["last_dirt_ns"] is None else (date_ns - h["last_dirt_ns"]) / NS_PER_DAY
+        )
+        blinkers = _num(runner["blinkers"])
+        blinkers_races = h["blinkers"] + (math.nan if math.isnan(blinkers) else float(blinkers == 1))
+        f["blinkers1sttime"] = math.nan if math.isnan(blinkers_races) else float(blinkers_races == 1)
+        f["hcpclass"] = _handicap_class(runner["race_class_old"])
+        f["hohcpclassdrop"] = bool(
+            not math.isnan(f["hcpclass"]) and not math.isnan(h["last_hcpclass"]) and
+            f["hcpclass"] > h["last_hcpclass"]
+        )
+        if first:
+            f["hoavgdistbtn"] = f["hoavgdistbtn_turf"] = f["hoavgdistbtn_dirt"] = math.nan
+        else:
+            f["hoavgdistbtn"] = _div(h["dist_btn"], h["placed"])
+            f["hoavgdistbtn_turf"] = _div(h["dist_btn_turf"], h["placed_turf"])
+            f["hoavgdistbtn_dirt"] = _div(h["dist_btn_dirt"], h["placed_dirt"])
+        avg = f["hoavgdistbtn"]
+        f["hoavgdistbtn_log"] = math.nan if math.isnan(avg) or avg <= -1 else math.log(avg + 1)
+        weight = _num(runner["weight"])
+        f["honetgag"] = (_num(runner["gag_turf"]) if turf else _num(runner["gag_dirt"])) - weight
+        f["hoage_sq"] = _num(runner["hoage"]) ** 2
+        f["hoprestige"] = (h["purse"] + _num(runner["purse"])) / (h["attend"] + 1)
+        f["hoprestige_sq"] = f["hoprestige"] ** 2
+
+        gag_turf = _num(runner["gag_turf"])
+        f["gaglastwin_turf"] = 0.0 if math.isnan(h["last_win_gag"]) else h["last_win_gag"]
+        f["gagindicator_turf"] = (
+            math.nan if math.isnan(gag_turf) else float(gag_turf < f["gaglastwin_turf"])
+        )
+        return f
+
+    def jockey_row(self, runner):
+        """Pre-race jockey features of one card row."""
+        j = self.jockeys.get(_key(runner["jockey"])) or new_jockey_state()
+        f = {}
+        f["joattend"] = float(j["attend"])
+        f["joattend_turf"] = float(j["attend_turf"])
+        f["joattend_dirt"] = float(j["attend_sand"])
+        f["joattend365"] = j["attend365"]
+        f["jowins"] = j["wins"]
+        f["jowins_turf"] = j["wins_turf"]
+        f["jowins_dirt"] = j["wins_sand"]
+        f["jowins365"] = j["wins365"]
+        f["josr"] = _div_or_zero(f["jowins"], f["joattend"])
+        f["josr_turf"] = _div(f["jowins_turf"], f["joattend_turf"])
+        f["josr_dirt"] = _div(f["jowins_dirt"], f["joattend_dirt"])
+        f["josr365"] = _div_or_zero(f["jowins365"], f["joattend365"])
+        f["joearnings"] = j["earnings"]
+        f["joearnings_turf"] = j["earnings_turf"]
+        f["joearnings_dirt"] = j["earnings_dirt"]
+        f["jomeanearn"] = _div(f["joearnings"], f["joattend"])
+        f["jomeanearn_turf"] = _div(f["joearnings_turf"], f["joattend_turf"])
+        f["jomeanearn_dirt"] = _div(f["joearnings_dirt"], f["joattend_dirt"])
+        return f
+
+    def trainer_row(self, runner):
+        """Pre-race trainer features of one card row."""
+        t = self.trainers.get(_key(runner["trainer"])) or new_trainer_state()
+        attend = float(t["attend"])
+        return {
+            "trattend": attend,
+            "trwins": t["wins"],
+            "trsr": _div_or_zero(t["wins"], attend),
+            "trcumearnings": t["earnings"],
+            "trmeanearn": _div(t["earnings"], attend),
+        }
+
+    def race_features(self, card):
+        """
+        Emits pre-race feature rows for one race.
+
+        Runners of the same trainer all get the trainer's state before the
+        race, as in the R script.
+
+        Args:
+            card (pd.DataFrame or list): Card rows of one race (a list of
+                row dicts must hold date_time as int nanoseconds).
+
+        Returns:
+            pd.DataFrame: One row per runner with dg_raceid, dg_horseid and
+            STORE_FEATURES.
+        """
+        return _frame(self._race_rows(_records(card)))
+
+    def _race_rows(self, runners):
+        rows = []
+        for runner in runners:
+            row = {"dg_raceid": runner["dg_raceid"], "dg_horseid": runner["dg_horseid"]}
+            row.update(self.horse_row(runner))
+            row.update(self.jockey_row(runner))
+            row.update(self.trainer_row(runner))
+            rows.append(row)
+        return rows
+
+    def card_features(self, card):
+        """
+        Emits pre-race features for a whole card from the current state.
+
+        Results of earlier races on the card are not known yet, so jockeys
+        and trainers with several rides see their state before the meeting.
+
+        Args:
+            card (pd.DataFrame): Card rows of one or more races.
+
+        Returns:
+            pd.DataFrame: As `race_features`, for every runner.
+        """
+        return self.race_features(card)
+
+    ##------------- Updates ---------------------------------------------------##
+
+    def record_race(self, results):
+        """
+        Adds the results of one race to the state.
+
+        Args:
+            results (pd.DataFrame or list): Result rows of one race (see
+                `race_features`).
+        """
+        results = _records(results)
+        # course records first: the R script rates every race against them
+        if not self.fixed_records:
+            for runner in results:
+                course_key = self.course_key(runner)
+                record = self.course_records.get(course_key, math.inf)
+                race_time = _num(runner["race_time_secs"])
+                if not math.isnan(race_time) and race_time < record:
+                    record = race_time
+                self.course_records[course_key] = record
+
+        trainer_updates = []
+        for runner in results:
+            position = _num(runner["position"])
+            win = 0.0 if math.isnan(position) else float(position == 1)
+            earnings = _num(runner["earnings"])
+            self._record_horse(runner, position, win, earnings)
+            self._record_jockey(runner, win, earnings)
+            trainer_updates.append((_key(runner["trainer"]), win, earnings))
+        # trainer state moves on after the whole race
+        for trainer, win, earnings in trainer_updates:
+            t = self.trainers.setdefault(trainer, new_trainer_state())
+            t["attend"] += 1
+            t["wins"] += win
+            t["earnings"] += earnings
+        self.races_recorded += 1
+
+    def record_meeting(self, results):
+        """
+        Adds the results of a meeting (or any span of races) race by race.
+
+        Args:
+            results (pd.DataFrame): Result rows, any order.
+        """
+        for _, race in iter_races(results):
+            self.record_race(race)
+
+    @staticmethod
+    def course_key(runner):
+        """Course record key of a result row."""
+        return "|".join(_key(runner[c]) for c in ("dg_course", "race_distance", "surface"))
+
+    def _record_horse(self, runner, position, win, earnings):
+        horse = _key(runner["dg_horseid"])
+        h = self.horses.get(horse)
+        if h is None:
+            h = self.horses[horse] = new_horse_state()
+        surface = runner["surface"]
+        turf, sand, dirt = surface == "Turf", surface == "Sand", surface == "Dirt"
+        date_ns = runner["date_time"]
+        day = date_ns // NS_PER_DAY
+
+        h["attend"] += 1
+        h["attend_turf"] += turf
+        h["attend_sand"] += sand
+        h["wins"] += win
+        h["wins_turf"] += win if turf else 0.0
+        h["wins_sand"] += win if sand else 0.0
+        h["earnings"] += earnings
+        h["earnings_turf"] += earnings if turf else 0.0
+        h["earnings_dirt"] += earnings if dirt else 0.0
+
+        present = 0.0 if horse == NA_KEY else 1.0
+        window = h["window"]
+        window.append((day, present, win, earnings))
+        while window[0][0] <= day - MAX_WINDOW_DAYS:
+            window.popleft()
+        h["attend365"], h["earnings365"] = _window_sums(window, day, 365, (1, 3))
+        h["attend730"], h["wins730"] = _window_sums(window, day, 730, (1, 2))
+
+        h["last_ns"] = date_ns
+        if turf:
+            h["last_turf_ns"] = date_ns
+        if dirt:
+            h["last_dirt_ns"] = date_ns
+        hotime = _num(runner["hotime"])
+        course_key = self.course_key(runner)
+        h["sprat_buffer"].append((course_key, hotime))
+        if not math.isnan(hotime):
+            h["last_timed"] = (course_key, hotime)
+        blinkers = _num(runner["blinkers"])
+        h["blinkers"] += math.nan if math.isnan(blinkers) else float(blinkers == 1)
+        h["last_hcpclass"] = _handicap_class(runner["race_class_old"])
+
+        dist_btn = _num(runner["dist_btn_cum"])
+        dist_btn = 0.0 if math.isnan(dist_btn) else dist_btn
+        placed = not math.isnan(position)
+        h["dist_btn"] += dist_btn
+        h["placed"] += placed
+        if turf:
+            h["dist_btn_turf"] += dist_btn
+            h["placed_turf"] += placed
+        if dirt:
+            h["dist_btn_dirt"] += dist_btn
+            h["placed_dirt"] += placed
+        h["purse"] += _num(runner["purse"])
+        if (position == 1 and turf and isinstance(runner["race_class_old"], str) and
+                runner["race_class_old"].startswith("Ausgleich")):
+            gag_turf = _num(runner["gag_turf"])
+            if not math.isnan(gag_turf):
+                h["last_win_gag"] = gag_turf
+
+    def _record_jockey(self, runner, win, earnings):
+        jockey = _key(runner["jockey"])
+        j = self.jockeys.get(jockey)
+        if j is None:
+            j = self.jockeys[jockey] = new_jockey_state()
+        surface = runner["surface"]
+        turf, sand, dirt = surface == "Turf", surface == "Sand", surface == "Dirt"
+        day = runner["date_time"] // NS_PER_DAY
+
+        j["attend"] += 1
+        j["attend_turf"] += turf
+        j["attend_sand"] += sand
+        j["wins"] += win
+        j["wins_turf"] += win if turf else 0.0
+        j["wins_sand"] += win if sand else 0.0
+        j["earnings"] += earnings
+        j["earnings_turf"] += earnings if turf else 0.0
+        j["earnings_dirt"] += earnings if dirt else 0.0
+
+        present = 0.0 if jockey == NA_KEY else 1.0
+        window = j["window"]
+        window.append((day, present, win, earnings))
+        while window[0][0] <= day - 365:
+            window.popleft()
+        j["attend365"], j["wins365"] = _window_sums(window, day, 365, (1, 2))
+
+
+def iter_races(races):
+    """
+    Yields the races of a frame in the order of the full recompute.
+
+    Args:
+        races (pd.DataFrame): Runner rows.
+
+    Yields:
+        tuple: (dg_raceid, list of row dicts).
+    """
+    races = races.assign(date_time = pd.to_datetime(races["date_time"]))
+    races = races.sort_values("date_time", kind = "stable")
+    by_race = {}
+    # dicts keep insertion order, so races come in the order of their first row
+    for runner in _records(races):
+        by_race.setdefault(runner["dg_raceid"], []).append(runner)
+    yield from by_race.items()
+
+
+def replay(races, store = None, emit = True):
+    """
+    Runs a history through a store race by race.
+
+    Args:
+        races (pd.DataFrame): Runner rows with results.
+        store (EntityStateStore): Store to update (a new one by default).
+        emit (bool): Emit each race's pre-race rows before recording it.
+
+    Returns:
+        tuple: (store, emitted rows or None).
+    """
+    store = store or EntityStateStore()
+    emitted = []
+    for _, race in iter_races(races):
+        if emit:
+            emitted.extend(store._race_rows(race))
+        store.record_race(race)
+    return store, (_frame(emitted) if emit else None)
+
+
+def verify(races):
+    """
+    Compares a race-by-race replay with a full recompute.
+
+    Course records are fixed to those of the full history, as in the R
+    script, so speed ratings are comparable.
+
+    Args:
+        races (pd.DataFrame): Runner rows with results.
+
+    Returns:
+        pd.DataFrame: Per-feature mismatch report (see compare_with_r).
+    """
+    full = engineer_features(races)
+    records = {}
+    keys = ["dg_course", "race_distance", "surface"]
+    records_frame = races[keys].assign(record = course_records(races)).drop_duplicates(keys)
+    for runner in records_frame.to_dict("records"):
+        records[EntityStateStore.course_key(runner)] = runner["record"]
+    _, emitted = replay(races, EntityStateStore(records))
+    return compare_with_r(emitted, full[["dg_raceid", "dg_horseid"] + STORE_FEATURES])
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Incremental career-feature state store")
+    parser.add_argument("command", choices = ["replay", "update", "emit", "verify"],
+                        help = "replay: build from history; update: add results; "
+                               "emit: features for a card; verify: compare with a full recompute")
+    parser.add_argument("input", help = "Runner rows (Parquet or CSV)")
+    parser.add_argument("--store", default = "../data/processed/entity_state.json", help = "State file")
+    parser.add_argument("--output", default = None, help = "Feature rows output (emit)")
+    args = parser.parse_args()
+
+    from base_feature_engineering import read_table
+    races = read_table(args.input)
+    start = time.perf_counter()
+    if args.command == "verify":
+        report = verify(races)
+        print(report.to_string(index = False))
+        print(f"{(report['mismatches'] > 0).sum()} of {len(report)} features differ from a full recompute")
+    elif args.command == "replay":
+        store, _ = replay(races, emit = False)
+        store.save(args.store)
+        print(f"{store.races_recorded:,} races recorded in {time.perf_counter() - start:.1f}s")
+    elif args.command == "update":
+        store = EntityStateStore.load(args.store)
+        store.record_meeting(races)
+        store.save(args.store)
+        print(f"{store.races_recorded:,} races recorded")
+    else:
+        store = EntityStateStore.load(args.store)
+        features = store.card_features(races)
+        print(f"{len(features)} runners in {(time.perf_counter() - start) * 1000:.1f}ms")
+        if args.output:
+            features.to_parquet(args.output, index = False)
+            print(f"Output saved to: {args.output}")
+        else:
+            print(features.to_string(index = False))
+
+
+if __name__ == "__main__":
+    main()
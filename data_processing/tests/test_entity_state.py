@@ -0,0 +1,36 @@
+"""
+Checks that replaying races through the entity-state store gives the
+features of a full recompute.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_base_features import synthetic_races
+from entity_state import EntityStateStore, STORE_FEATURES, replay, verify
+
+
+def small_history():
+    """A year of synthetic races, one ride per horse and jockey per race."""
+    races = synthetic_races(1, races_per_year = 150)
+    return races.drop_duplicates(["dg_raceid", "dg_horseid"]).drop_duplicates(["dg_raceid", "jockey"])
+
+
+def test_replay_matches_full_recompute():
+    report = verify(small_history())
+    assert (report["mismatches"] == 0).all(), report[report["mismatches"] > 0].to_string()
+
+
+def test_saved_store_resumes(tmp_path):
+    races = small_history()
+    race_ids = races.sort_values("date_time", kind = "stable")["dg_raceid"].unique()
+    first = races[races["dg_raceid"].isin(race_ids[:100])]
+    last = races[races["dg_raceid"].isin(race_ids[100:])]
+
+    store, _ = replay(first, emit = False)
+    store.save(str(tmp_path / "state.json"))
+    _, resumed = replay(last, EntityStateStore.load(str(tmp_path / "state.json")))
+    _, straight = replay(last, replay(first, emit = False)[0])
+
+    assert resumed[STORE_FEATURES].equals(straight[STORE_FEATURES])
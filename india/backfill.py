@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Backfill every meeting under data/raw through the India pipeline.
+Runs the parse, feature and replay stages in-process and spreads meetings
+across a process pool, writing a per-stage timing report. Stages whose
+inputs and parameters are unchanged since the last run are skipped.
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
+from india.ingestion.tokenizer import MEETING_DOCUMENTS, meeting_text_file, parse_meeting
+from india.ingestion.bronze_store import BRONZE_FORMATS, DEFAULT_BRONZE_FORMAT, bronze_path, write_bronze
+from india.features.make_features_india import build_features
+from india.features.name_matching import ALIAS_FILE, load_aliases, save_aliases
+from india.features.silver_store import dataset_root, meeting_partition_path, write_meeting_features
+from india.backtest.replay_snapshots import replay_meeting
+from india.model.combiner_india import WEIGHTS_FILE
+from india.manifest import bytes_digest, file_digest, is_current, load_manifest, save_manifest
+
+# PDFs converted to text for every meeting (mirrors ingestion/to_text.sh)
+PDF_DOCUMENTS = ("racecard", "odds_morning", "odds_opening", "results")
+
+# Pipeline stages in execution order
+STAGES = ("text", "parse", "features", "replay")
+
+# Manual odds fixes under data/raw, one row per runner: meeting, race_no,
+# horse and decimal odds
+CORRECTIONS_FILE = "india_odds_corrections.csv"
+
+# Bump a stage's version when its code changes what it writes
+STAGE_VERSIONS = {"text": 2, "parse": 1, "features": 6, "replay": 4}
+
+def discover_meetings(data_root: pathlib.Path) -> List[str]:
+    """
+    Find every meeting directory under data/raw.
+    
+    Args:
+        data_root: Root of the data directory
+        
+    Returns:
+        Sorted list of meeting ids
+    """
+    raw_dir = data_root / "raw"
+    if not raw_dir.exists():
+        return []
+    return sorted(p.name for p in raw_dir.iterdir() if p.is_dir())
+
+def meeting_paths(meeting: str, data_root: pathlib.Path,
+                  bronze_format: str = DEFAULT_BRONZE_FORMAT) -> Dict[str, pathlib.Path]:
+    """
+    Input and output locations for one meeting.
+    
+    Args:
+        meeting: Meeting id such as '2025-08-27-kolkata'
+        data_root: Root of the data directory
+        bronze_format: Format of the parsed bronze files
+        
+    Returns:
+        Dictionary of named paths
+    """
+    return {
+        "raw": data_root / "raw" / meeting,
+        "txt": data_root / "txt" / meeting,
+        "card": bronze_path(data_root / "bronze", meeting, "card", bronze_format),
+        "odds": bronze_path(data_root / "bronze", meeting, "odds", bronze_format),
+        "results": bronze_path(data_root / "bronze", meeting, "results", bronze_format),
+        "silver": dataset_root(data_root),
+        "features": meeting_partition_path(dataset_root(data_root), meeting),
+        "report": data_root / "reports" / f"{meeting}-meeting.csv",
+        "unmatched": data_root / "reports" / f"{meeting}-unmatched.csv",
+        "odds_matches": data_root / "reports" / f"{meeting}-odds-matches.csv",
+        "results_matches": data_root / "reports" / f"{meeting}-results-matches.csv",
+        "aliases": data_root / "silver" / ALIAS_FILE,
+        "weights": data_root / "silver" / WEIGHTS_FILE,
+        "corrections": data_root / "raw" / CORRECTIONS_FILE,
+        "text_manifest": data_root / "txt" / f"{meeting}-manifest.json",
+        "parse_manifest": data_root / "bronze" / f"{meeting}-manifest.json",
+        "features_manifest": data_root / "silver" / f"{meeting}-manifest.json",
+        "replay_manifest": data_root / "reports" / f"{meeting}-manifest.json",
+    }
+
+@functools.lru_cache(maxsize=4)
+def _read_odds_corrections(path: str, mtime_ns: int) -> pd.DataFrame:
+    """Read the India odds corrections once per worker and file version."""
+    return pd.read_csv(path, dtype={"meeting": str, "horse": str})
+
+@functools.lru_cache(maxsize=4)
+def _read_aliases(path: str, mtime_ns: int) -> Dict[str, str]:
+    """Read the horse alias table once per worker and file version."""
+    return load_aliases(pathlib.Path(path))
+
+def meeting_aliases(paths: Dict[str, pathlib.Path]) -> Dict[str, str]:
+    """Horse alias table shared by every meeting (empty if not yet written)."""
+    path = paths["aliases"]
+    if not path.exists():
+        return {}
+    return _read_aliases(str(path), path.stat().st_mtime_ns)
+
+def update_aliases(data_root: pathlib.Path, meetings: List[str]) -> int:
+    """
+    Add fuzzy name matches found for the given meetings to the alias table.
+    
+    Args:
+        data_root: Root of the data directory
+        meetings: Meeting ids whose match reports are read
+        
+    Returns:
+        Number of aliases in the table
+    """
+    frames = []
+    for meeting in meetings:
+        paths = meeting_paths(meeting, data_root)
+        for name in ("odds_matches", "results_matches"):
+            if paths[name].exists():
+                frames.append(pd.read_csv(paths[name], dtype={"alias": str, "canonical": str}))
+    
+    matches = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["method"])
+    matches = matches[matches["method"] == "fuzzy"]
+    path = data_root / "silver" / ALIAS_FILE
+    if matches.empty:
+        return len(load_aliases(path))
+    return save_aliases(path, matches)
+
+def meeting_corrections(meeting: str, paths: Dict[str, pathlib.Path]) -> pd.DataFrame:
+    """
+    Odds corrections that apply to one meeting.
+    
+    Rows are matched to the meeting by meeting id, so editing the corrections
+    file only changes the result (and the manifest) of the affected meetings.
+    
+    Args:
+        meeting: Meeting id
+        paths: Paths from `meeting_paths`
+        
+    Returns:
+        Correction rows (race_no, horse, odds) for the meeting (possibly empty)
+    """
+    path = paths["corrections"]
+    if not path.exists():
+        return pd.DataFrame(columns=["race_no", "horse", "odds"])
+    corrections = _read_odds_corrections(str(path), path.stat().st_mtime_ns)
+    rows = corrections[corrections["meeting"] == meeting]
+    return rows.drop(columns="meeting").reset_index(drop=True)
+
+def stage_plan(paths: Dict[str, pathlib.Path], corrections: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Inputs, outputs and parameters of every stage for one meeting.
+    
+    Args:
+        paths: Paths from `meeting_paths`
+        corrections: Odds corrections for the meeting
+        
+    Returns:
+        Dictionary keyed by stage name
+    """
+    text_files = {stem: meeting_text_file(paths["txt"], stem) for stem in MEETING_DOCUMENTS.values()}
+    return {
+        "text": {
+            "inputs": {stem: paths["raw"] / f"{stem}.pdf" for stem in PDF_DOCUMENTS},
+            "outputs": text_files,
+            "params": {},
+        },
+        "parse": {
+            "inputs": text_files,
+            "outputs": {doc: paths[doc] for doc in MEETING_DOCUMENTS},
+            "params": {"documents": MEETING_DOCUMENTS},
+        },
+        "features": {
+            "inputs": {"card": paths["card"], "odds": paths["odds"], "aliases": paths["aliases"]},
+            "outputs": {"features": paths["features"], "unmatched": paths["unmatched"],
+                        "matches": paths["odds_matches"]},
+            "params": {"odds_corrections": bytes_digest(corrections.to_csv(index=False).encode())},
+        },
+        "replay": {
+            "inputs": {"features": paths["features"], "results": paths["results"],
+                       "aliases": paths["aliases"], "weights": paths["weights"]},
+            "outputs": {"report": paths["report"], "matches": paths["results_matches"]},
+            "params": {"use": "p_opening"},
+        },
+    }
+
+def run_text(paths: Dict[str, pathlib.Path], context: Dict[str, Any]) -> Optional[str]:
+    """
+    Convert the meeting PDFs to text; text files without a PDF are kept as they are.
+    
+    Returns:
+        A warning when pdftotext is not installed, in which case the existing
+        text files in data/txt are kept; None after converting
+    """
+    if shutil.which("pdftotext") is None:
+        return "pdftotext not found, kept existing text files"
+    
+    paths["txt"].mkdir(parents=True, exist_ok=True)
+    for stem in PDF_DOCUMENTS:
+        pdf = paths["raw"] / f"{stem}.pdf"
+        if pdf.exists():
+            try:
+                subprocess.run(["pdftotext", "-layout", str(pdf), str(paths["txt"] / f"{stem}.txt")],
+                               check=True)
+            except FileNotFoundError:
+                return "pdftotext not found, kept existing text files"
+
+def run_parse(paths: Dict[str, pathlib.Path], context: Dict[str, Any]) -> None:
+    """Parse racecard, odds and results text into bronze files."""
+    parsed = {doc: [] for doc in MEETING_DOCUMENTS}
+    for doc, record in parse_meeting(paths["txt"]):
+        parsed[doc].append(record)
+    
+    for doc, records in parsed.items():
+        paths[doc].parent.mkdir(parents=True, exist_ok=True)
+        write_bronze(records, doc, paths[doc])
+
+def run_features(paths: Dict[str, pathlib.Path], context: Dict[str, Any]) -> None:
+    """Combine bronze card and odds into the silver features dataset, reporting unmatched runners."""
+    paths["unmatched"].parent.mkdir(parents=True, exist_ok=True)
+    features = build_features(str(paths["card"]), str(paths["odds"]), context["corrections"],
+                              unmatched_file=str(paths["unmatched"]), aliases=context["aliases"],
+                              matches_file=str(paths["odds_matches"]))
+    write_meeting_features(features, context["meeting"], paths["silver"])
+
+def run_replay(paths: Dict[str, pathlib.Path], context: Dict[str, Any]) -> None:
+    """Replay the meeting through the Benter model."""
+    paths["report"].parent.mkdir(parents=True, exist_ok=True)
+    replay_meeting(str(paths["features"]), str(paths["results"]), str(paths["report"]),
+                   aliases=context["aliases"], matches_file=str(paths["results_matches"]),
+                   weights_file=str(paths["weights"]))
+
+STAGE_FUNCTIONS = {
+    "text": run_text,
+    "parse": run_parse,
+    "features": run_features,
+    "replay": run_replay,
+}
+
+def digest_files(files: Dict[str, pathlib.Path], previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Digest a name -> path mapping, reusing unchanged digests from `previous`."""
+    return {name: file_digest(path, previous.get(name)) for name, path in files.items()}
+
+def process_meeting(meeting: str, data_root: pathlib.Path, force: bool = False,
+                    bronze_format: str = DEFAULT_BRONZE_FORMAT) -> Dict[str, Any]:
+    """
+    Run every out-of-date pipeline stage for one meeting in the current process.
+    
+    Args:
+        meeting: Meeting id
+        data_root: Root of the data directory
+        force: Run every stage even if its manifest is current
+        bronze_format: Format of the parsed bronze files
+        
+    Returns:
+        Dictionary with status, error message, skipped stages, warnings and
+        seconds spent per stage
+    """
+    paths = meeting_paths(meeting, data_root, bronze_format)
+    row = {"meeting": meeting, "status": "ok", "error": "", "skipped": "", "warnings": ""}
+    skipped, warnings = [], []
+    start = time.perf_counter()
+    
+    # Stage scripts print progress; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            corrections = meeting_corrections(meeting, paths)
+            aliases = meeting_aliases(paths)
+        except Exception as e:
+            corrections = None
+            row["status"] = "failed"
+            row["error"] = f"corrections: {e}"
+        
+        for stage in STAGES if corrections is not None else ():
+            stage_start = time.perf_counter()
+            try:
+                plan = stage_plan(paths, corrections)[stage]
+                params = dict(plan["params"], version=STAGE_VERSIONS[stage])
+                manifest = load_manifest(paths[f"{stage}_manifest"])
+                entry = manifest.get(stage)
+                inputs = digest_files(plan["inputs"], (entry or {}).get("inputs", {}))
+                outputs = digest_files(plan["outputs"], (entry or {}).get("outputs", {}))
+                
+                if not force and is_current(entry, inputs, params, outputs):
+                    skipped.append(stage)
+                    continue
+                
+                warning = STAGE_FUNCTIONS[stage](paths, {"meeting": meeting, "corrections": corrections,
+                                                          "aliases": aliases})
+                if warning:
+                    # Not recorded as done, so the stage runs again next time
+                    warnings.append(f"{stage}: {warning}")
+                    continue
+                
+                # Re-plan: the text stage may have produced .txt files
+                outputs = digest_files(stage_plan(paths, corrections)[stage]["outputs"], {})
+                manifest[stage] = {"inputs": inputs, "params": params, "outputs": outputs}
+                save_manifest(paths[f"{stage}_manifest"], manifest)
+            except Exception as e:
+                row["status"] = "failed"
+                row["error"] = f"{stage}: {e}"
+                break
+            finally:
+                row[f"{stage}_s"] = time.perf_counter() - stage_start
+    
+    row["skipped"] = ";".join(skipped)
+    row["warnings"] = ";".join(warnings)
+    row["total_s"] = time.perf_counter() - start
+    return row
+
+def backfill(data_root: pathlib.Path,
+             meetings: Optional[List[str]] = None,
+             workers: Optional[int] = None,
+             force: bool = False,
+             bronze_format: str = DEFAULT_BRONZE_FORMAT) -> pd.DataFrame:
+    """
+    Process many meetings, in parallel when more than one worker is used.
+    
+    Args:
+        data_root: Root of the data directory
+        meetings: Meeting ids to process; defaults to every meeting in data/raw
+        workers: Number of worker processes; defaults to the CPU count
+        force: Run every stage even if its manifest is current
+        bronze_format: Format of the parsed bronze files
+        
+    Returns:
+        Per-meeting timing report
+    """
+    if meetings is None:
+        meetings = discover_meetings(data_root)
+    workers = workers or os.cpu_count() or 1
+    
+    rows = []
+    if workers == 1 or len(meetings) <= 1:
+        for meeting in meetings:
+            rows.append(process_meeting(meeting, data_root, force, bronze_format))
+            print(f"  {rows[-1]['status']:<6} {meeting} ({rows[-1]['total_s']:.2f}s)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_meeting, m, data_root, force, bronze_format) for m in meetings]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                print(f"  {rows[-1]['status']:<6} {rows[-1]['meeting']} ({rows[-1]['total_s']:.2f}s)")
+    
+    # Learn aliases from this run's fuzzy matches for the next one
+    n_aliases = update_aliases(data_root, meetings)
+    print(f"  Alias table: {n_aliases} horse aliases")
+    
+    columns = ["meeting", "status", "error", "skipped", "warnings"] + [f"{s}_s" for s in STAGES] + ["total_s"]
+    return pd.DataFrame(rows, columns=columns).sort_values("meeting", ignore_index=True)
+
+def main():
+    """Main function to parse command line arguments and run the backfill."""
+    parser = argparse.ArgumentParser(description="Backfill India racing meetings")
+    parser.add_argument("meetings", nargs="*", help="Meeting ids (default: all under data/raw)")
+    parser.add_argument("--data-root", default="data", help="Data directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-run stages even if up to date")
+    parser.add_argument("--bronze-format", choices=list(BRONZE_FORMATS), default=DEFAULT_BRONZE_FORMAT,
+                        help="Format of parsed bronze files (json for export)")
+    parser.add_argument("--report", default=None,
+                        help="Timing report CSV (default: <data-root>/reports/backfill-timings.csv)")
+    args = parser.parse_args()
+    
+    data_root = pathlib.Path(args.data_root)
+    meetings = args.meetings or discover_meetings(data_root)
+    if not meetings:
+        print(f"No meetings found under {data_root / 'raw'}")
+        sys.exit(1)
+    
+    print(f"Backfilling {len(meetings)} meetings")
+    start = time.perf_counter()
+    report = backfill(data_root, meetings, args.workers, args.force, args.bronze_format)
+    wall = time.perf_counter() - start
+    
+    report_file = pathlib.Path(args.report) if args.report else data_root / "reports" / "backfill-timings.csv"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(report_file, index=False)
+    
+    print("\n=== Stage Timings ===")
+    for stage in STAGES:
+        print(f"  {stage:<9} {report[f'{stage}_s'].sum():8.2f}s")
+    print(f"  {'wall':<9} {wall:8.2f}s")
+    print(f"\nSucceeded: {(report['status'] == 'ok').sum()}/{len(report)}")
+    print(f"Up to date: {(report['skipped'].str.count(';') + 1).where(report['skipped'] != '', 0).sum()} "
+          f"of {len(report) * len(STAGES)} stage runs skipped")
+    for _, row in report[report["status"] != "ok"].iterrows():
+        print(f"  ✗ {row['meeting']}: {row['error']}")
+    for _, row in report[report["warnings"] != ""].iterrows():
+        print(f"  ⚠️  {row['meeting']}: {row['warnings']}")
+    print(f"Timing report saved to: {report_file}")
+    
+    sys.exit(0 if (report["status"] == "ok").all() else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Time-ordered bet ledger with bankroll compounding.
+Replays races in date order and stakes Kelly fractions of the running
+bankroll, recording exposure, earnings, bankroll and drawdown per race
+like the notebook's cumulative-earnings plot.
+"""
+
+import pathlib
+import sys
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import load_weights, posterior_tensor, kelly_stakes
+from india.features.race_tensor import cached_race_tensor
+
+def race_exposure(stake: np.ndarray,
+                  p_market: np.ndarray,
+                  won: np.ndarray,
+                  offsets: np.ndarray,
+                  max_exposure: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Share of the bankroll staked on and paid back by every race.
+    
+    Only the bets (runners with a stake) are touched. Races with a single
+    bet, the common case, take that bet's stake and payout directly;
+    races with several bets are summed with one `np.bincount`.
+    
+    Args:
+        stake: Stake per runner as a fraction of bankroll, each race contiguous
+        p_market: Market probabilities (inverse decimal odds), same order
+        won: Whether each runner won
+        offsets: Start offset of each race
+        max_exposure: Largest fraction of the bankroll staked on one race;
+            the bets of a race over it are scaled down together
+        
+    Returns:
+        Tuple of (bets, staked, returned) per race; staked and returned are
+        fractions of the bankroll before the race
+    """
+    n_races = len(offsets)
+    bets = np.flatnonzero(stake > 0)
+    race = np.searchsorted(offsets, bets, side="right") - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paid = np.where(won[bets], stake[bets] / p_market[bets], 0.0)
+    
+    n_bets = np.bincount(race, minlength=n_races)
+    staked = np.zeros(n_races)
+    returned = np.zeros(n_races)
+    single = n_bets[race] == 1
+    staked[race[single]] = stake[bets[single]]
+    returned[race[single]] = paid[single]
+    
+    multi = ~single
+    if multi.any():
+        staked += np.bincount(race[multi], stake[bets[multi]], n_races)
+        returned += np.bincount(race[multi], paid[multi], n_races)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(staked > max_exposure, max_exposure / staked, 1.0)
+    return n_bets, staked * scale, returned * scale
+
+def simulate_ledger(stake: np.ndarray,
+                    p_market: np.ndarray,
+                    won: np.ndarray,
+                    offsets: np.ndarray,
+                    bankroll: float = 1.0,
+                    max_exposure: float = 1.0) -> Dict[str, np.ndarray]:
+    """
+    Bankroll path of staking Kelly fractions race by race.
+    
+    Every race settles before the next one is bet, and its stakes are
+    fractions of the bankroll at that point, so each race multiplies the
+    bankroll by 1 - staked + returned and the whole path is a cumulative
+    product instead of a loop over races.
+    
+    Args:
+        stake: Stake per runner as a fraction of bankroll, races in time order
+        p_market: Market probabilities (inverse decimal odds), same order
+        won: Whether each runner won
+        offsets: Start offset of each race
+        bankroll: Starting bankroll
+        max_exposure: Largest fraction of the bankroll staked on one race
+        
+    Returns:
+        Dictionary of per-race arrays: bets, exposure (fraction staked),
+        staked, returned, earnings, bankroll (after the race),
+        cumulative_earnings, peak and drawdown (fraction below the peak)
+    """
+    n_bets, exposure, returned = race_exposure(np.asarray(stake, dtype=float),
+                                               np.asarray(p_market, dtype=float),
+                                               np.asarray(won, dtype=bool),
+                                               np.asarray(offsets), max_exposure)
+    after = bankroll * np.cumprod(1 - exposure + returned)
+    before = np.r_[bankroll, after[:-1]]
+    peak = np.maximum(np.maximum.accumulate(after), bankroll) if len(after) else after
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peak > 0, 1 - after / peak, 0.0)
+    
+    return {
+        "bets": n_bets,
+        "exposure": exposure,
+        "staked": exposure * before,
+        "returned": returned * before,
+        "earnings": after - before,
+        "bankroll": after,
+        "cumulative_earnings": after - bankroll,
+        "peak": peak,
+        "drawdown": drawdown,
+    }
+
+def ledger_summary(ledger: Dict[str, np.ndarray], bankroll: float = 1.0) -> Dict[str, float]:
+    """
+    Headline numbers of a ledger.
+    
+    Args:
+        ledger: Per-race arrays from `simulate_ledger`
+        bankroll: Starting bankroll
+        
+    Returns:
+        Dictionary with races, races_bet, bets, final_bankroll,
+        total_return, total_staked, max_exposure and max_drawdown
+    """
+    final = float(ledger["bankroll"][-1]) if len(ledger["bankroll"]) else bankroll
+    return {
+        "races": len(ledger["bets"]),
+        "races_bet": int((ledger["bets"] > 0).sum()),
+        "bets": int(ledger["bets"].sum()),
+        "final_bankroll": final,
+        "total_return": final / bankroll - 1,
+        "total_staked": float(ledger["staked"].sum()),
+        "max_exposure": float(ledger["exposure"].max(initial=0.0)),
+        "max_drawdown": float(ledger["drawdown"].max(initial=0.0)),
+    }
+
+def tensor_ledger(tensor: Dict[str, Any],
+                  bankroll: float = 1.0,
+                  alpha: float = 0.5,
+                  beta: float = 0.5,
+                  confidence_threshold: float = 0.15,
+                  max_stake: float = 0.10,
+                  mode: str = "single",
+                  fraction: float = 0.5,
+                  max_exposure: float = 1.0) -> pd.DataFrame:
+    """
+    Ledger of Kelly betting on every race of a race tensor.
+    
+    Races are in tensor order: by meeting id, which starts with the date,
+    and race number within a meeting.
+    
+    Args:
+        tensor: Race tensor with finishing positions
+        bankroll: Starting bankroll
+        alpha: Weight of the prior in the combination
+        beta: Weight of the market in the combination
+        confidence_threshold: Minimum probability to consider betting
+        max_stake: Maximum stake as fraction of bankroll (see `kelly_stakes`)
+        mode: Kelly mode, 'single', 'fractional' or 'simultaneous'
+        fraction: Kelly multiplier for the fractional mode
+        max_exposure: Largest fraction of the bankroll staked on one race
+        
+    Returns:
+        DataFrame with meeting, race_no and race_date plus the columns of
+        `simulate_ledger`, one row per race
+    """
+    offsets = np.asarray(tensor["offsets"])
+    post = posterior_tensor(tensor, use="p_opening", alpha=alpha, beta=beta)
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], offsets,
+                         confidence_threshold, max_stake, mode, fraction)
+    ledger = simulate_ledger(stake, post["p_market"], np.asarray(tensor["pos"]) == 1, offsets,
+                             bankroll, max_exposure)
+    races = pd.DataFrame({
+        "meeting": np.asarray(tensor["meeting_names"])[np.asarray(tensor["race_meeting"])],
+        "race_no": np.asarray(tensor["race_no"]),
+        "race_date": np.asarray(tensor["race_date"]),
+    })
+    return pd.concat([races, pd.DataFrame(ledger)], axis=1)
+
+def main():
+    """Main function to simulate a bankroll over a features history."""
+    if len(sys.argv) < 4:
+        print("Usage: python ledger.py <features_parquet> <results_json> <output_csv> [bankroll] [weights_json]")
+        sys.exit(1)
+    
+    features_file = sys.argv[1]
+    results_file = sys.argv[2]
+    output_file = sys.argv[3]
+    bankroll = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+    alpha, beta = load_weights(sys.argv[5] if len(sys.argv) > 5 else None)
+    
+    try:
+        start = time.perf_counter()
+        tensor = cached_race_tensor(features_file, results_file)
+        ledger = tensor_ledger(tensor, bankroll, alpha, beta)
+        summary = ledger_summary({k: ledger[k].to_numpy() for k in ledger.columns}, bankroll)
+        elapsed = time.perf_counter() - start
+        
+        print("=== Bet Ledger ===")
+        print(f"Races: {summary['races']} ({summary['races_bet']} bet, {summary['bets']} bets)")
+        print(f"Final Bankroll: {summary['final_bankroll']:.4f} ({summary['total_return']*100:.2f}%)")
+        print(f"Total Staked: {summary['total_staked']:.4f}")
+        print(f"Max Exposure: {summary['max_exposure']*100:.1f}% of bankroll")
+        print(f"Max Drawdown: {summary['max_drawdown']*100:.1f}%")
+        print(f"Simulated in {elapsed:.2f}s")
+        
+        ledger.to_csv(output_file, index=False)
+        print(f"\nLedger saved to: {output_file}")
+        
+    except Exception as e:
+        print(f"Error during ledger simulation: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """
 Calculate performance metrics for the Benter model.
-Includes logloss, hit rate, and ROI calculations.
+Includes logloss, hit rate, ROI and calibration, computed per race from
+segment offsets and summed into groups (meeting, distance, venue, month)
+with `np.bincount` in one pass.
 """
 
+import pathlib
 import pandas as pd
 import numpy as np
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import RACE_KEYS, race_segments
+
+# Race-level groups reported by `grouped_metrics`
+METRIC_GROUPS = ("meeting", "dist_m", "venue", "month")
 
 def calculate_logloss(group: pd.DataFrame) -> float:
     """
@@ -50,17 +60,66 @@ def calculate_roi(group: pd.DataFrame, stake_col: str = "kelly_stake") -> float:
     # Calculate returns (assuming 1 unit stake)
     winner_row = group[group["pos"] == 1]
     if len(winner_row) == 0:
-        return -total_stake
+        return -1.0  # Lost entire stake
     
     winner_stake = winner_row[stake_col].iloc[0]
     market_odds = 1 / winner_row["p_market"].iloc[0]
     
-    # Return = (odds - 1) * stake - total_stake
-    returns = (market_odds - 1) * winner_stake - total_stake
+    # Return = odds * stake on the winner - total_stake
+    returns = market_odds * winner_stake - total_stake
     roi = returns / total_stake if total_stake > 0 else 0
     
     return roi
 
+def calibration_edges(p: np.ndarray, n_bins: int = 10) -> np.ndarray:
+    """
+    Equal-width bin edges over the range of `p`, as `pd.cut(p, n_bins)`.
+    
+    Args:
+        p: Predicted probabilities (NaN ignored)
+        n_bins: Number of bins
+        
+    Returns:
+        Array of n_bins + 1 edges; bins are right-closed
+    """
+    mn, mx = float(np.nanmin(p)), float(np.nanmax(p))
+    if mn == mx:
+        mn -= 0.001 * abs(mn) if mn != 0 else 0.001
+        mx += 0.001 * abs(mx) if mx != 0 else 0.001
+        return np.linspace(mn, mx, n_bins + 1)
+    edges = np.linspace(mn, mx, n_bins + 1)
+    edges[0] -= (mx - mn) * 0.001
+    return edges
+
+def calibration_table(p: np.ndarray, won: np.ndarray, n_bins: int = 10) -> pd.DataFrame:
+    """
+    Average prediction and win rate per probability bin.
+    
+    Args:
+        p: Predicted probabilities, one per runner
+        won: Whether each runner won
+        n_bins: Number of equal-width bins over the range of `p`
+        
+    Returns:
+        DataFrame with bin, avg_predicted, actual_rate and count for every
+        non-empty bin
+    """
+    columns = ["bin", "avg_predicted", "actual_rate", "count"]
+    known = ~np.isnan(p)
+    if not known.any():
+        return pd.DataFrame(columns=columns)
+    p, won = p[known], won[known]
+    bins = np.clip(np.searchsorted(calibration_edges(p, n_bins), p, side="left") - 1, 0, n_bins - 1)
+    
+    count = np.bincount(bins, minlength=n_bins)
+    used = np.flatnonzero(count)
+    return pd.DataFrame({
+        "bin": used,
+        "avg_predicted": np.bincount(bins, p, n_bins)[used] / count[used],
+        "actual_rate": np.bincount(bins, won, n_bins)[used] / count[used],
+        "count": count[used],
+    }, columns=columns)
+
 def calculate_calibration(df: pd.DataFrame, n_bins: int = 10) -> Dict[str, Any]:
     """
     Calculate probability calibration metrics.
@@ -72,32 +131,301 @@ def calculate_calibration(df: pd.DataFrame, n_bins: int = 10) -> Dict[str, Any]:
     Returns:
         Dictionary with calibration metrics
     """
-    # Create probability bins
-    df_binned = df.copy()
-    df_binned["prob_bin"] = pd.cut(df_binned["p_posterior"], 
-                                   bins=n_bins, 
-                                   labels=False)
-    
-    calibration_data = []
-    
-    for bin_idx in range(n_bins):
-        bin_data = df_binned[df_binned["prob_bin"] == bin_idx]
-        if len(bin_data) == 0:
-            continue
-            
-        avg_pred = bin_data["p_posterior"].mean()
-        actual_wins = (bin_data["pos"] == 1).sum()
-        total_runners = len(bin_data)
-        actual_rate = actual_wins / total_runners if total_runners > 0 else 0
+    table = calibration_table(df["p_posterior"].to_numpy(dtype=float),
+                              (df["pos"] == 1).to_numpy(), n_bins)
+    return {"calibration_data": table.to_dict("records")}
+
+def race_metrics(p: np.ndarray,
+                 pos: np.ndarray,
+                 offsets: np.ndarray,
+                 stake: np.ndarray = None,
+                 p_market: np.ndarray = None) -> Dict[str, np.ndarray]:
+    """
+    Logloss, top-pick hit, stake and profit of every race, from arrays.
+    
+    Per race the numbers are those of `calculate_logloss`, the top pick of
+    `print_metrics` and `calculate_roi`: races without a winner have logloss
+    0 and lose everything staked on them.
+    
+    Args:
+        p: Posterior probabilities, ordered so that each race is contiguous
+        pos: Finishing positions, same order
+        offsets: Start offset of each race
+        stake: Optional stakes; nothing is staked without them
+        p_market: Market probabilities, needed with `stake`
+        
+    Returns:
+        Dictionary of per-race arrays: runners, logloss, hit, staked, profit
+        and roi
+    """
+    n = len(p)
+    if len(offsets) == 0:
+        empty = np.zeros(0)
+        return {"runners": np.zeros(0, dtype=int), "logloss": empty, "hit": empty,
+                "staked": empty, "profit": empty, "roi": empty}
+    idx = np.arange(n)
+    counts = np.diff(np.r_[offsets, n])
+    won = pos == 1
+    
+    # First winner and first top pick of every race
+    winner = np.minimum.reduceat(np.where(won, idx, n), offsets)
+    has_winner = winner < n
+    w = np.minimum(winner, n - 1)
+    with np.errstate(divide="ignore"):
+        logloss = np.where(has_winner, -np.log(p[w]), 0.0)
+    top = np.repeat(np.maximum.reduceat(p, offsets), counts)
+    pick = np.minimum.reduceat(np.where(p == top, idx, n), offsets)
+    hit = won[np.minimum(pick, n - 1)] & (pick < n)
+    
+    staked = np.zeros(len(offsets))
+    profit = np.zeros(len(offsets))
+    if stake is not None:
+        staked = np.add.reduceat(stake, offsets)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            paid = np.where(has_winner & (stake[w] > 0), stake[w] / p_market[w], 0.0)
+        profit = paid - staked
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(staked > 0, profit / staked, 0.0)
+    
+    return {
+        "runners": counts,
+        "logloss": logloss,
+        "hit": hit.astype(float),
+        "staked": staked,
+        "profit": profit,
+        "roi": roi,
+    }
+
+def tensor_metrics(p: np.ndarray,
+                   pos: np.ndarray,
+                   offsets: np.ndarray,
+                   stake: np.ndarray = None,
+                   p_market: np.ndarray = None) -> Dict[str, float]:
+    """
+    Logloss, top-pick hit rate and ROI averaged over races, from arrays.
+    
+    Args:
+        p: Posterior probabilities, ordered so that each race is contiguous
+        pos: Finishing positions, same order
+        offsets: Start offset of each race
+        stake: Optional stakes; ROI is 0 without them
+        p_market: Market probabilities, needed with `stake`
+        
+    Returns:
+        Dictionary with logloss, hit_rate and roi
+    """
+    if len(offsets) == 0:
+        return {"logloss": 0.0, "hit_rate": 0.0, "roi": 0.0}
+    race = race_metrics(p, pos, offsets, stake, p_market)
+    return {
+        "logloss": float(race["logloss"].mean()),
+        "hit_rate": float(race["hit"].mean()),
+        "roi": float(race["roi"].mean()),
+    }
+
+def race_labels(meeting: Optional[np.ndarray] = None,
+                dist_m: Optional[np.ndarray] = None,
+                meeting_date: Optional[np.ndarray] = None,
+                venue: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Group labels of every race for `grouped_metrics`.
+    
+    Venue and month default to the parts of the meeting id (see
+    `parse_meeting_id` in features/silver_store.py).
+    
+    Args:
+        meeting: Meeting id per race
+        dist_m: Distance per race
+        meeting_date: Meeting date per race
+        venue: Venue per race
+        
+    Returns:
+        Dictionary of label arrays for the groups that can be derived
+    """
+    labels = {}
+    if meeting is not None:
+        meeting = np.asarray(meeting, dtype=str)
+        labels["meeting"] = meeting
+        if venue is None:
+            venue = pd.Series(meeting).str[11:].replace("", "unknown").to_numpy()
+    if dist_m is not None:
+        labels["dist_m"] = np.asarray(dist_m)
+    if venue is not None:
+        labels["venue"] = np.asarray(venue, dtype=str)
+    if meeting_date is None and meeting is not None:
+        meeting_date = pd.to_datetime(pd.Series(meeting).str[:10], errors="coerce").to_numpy()
+    if meeting_date is not None:
+        month = np.asarray(meeting_date, dtype="datetime64[M]")
+        if not np.isnat(month).all():
+            labels["month"] = np.where(np.isnat(month), None, np.datetime_as_string(month)).astype(object)
+    return labels
+
+def tensor_labels(tensor: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Group labels of every race of a race tensor.
+    
+    Args:
+        tensor: Race tensor (see features/race_tensor.py)
+        
+    Returns:
+        Dictionary of label arrays, as `race_labels`
+    """
+    offsets = np.asarray(tensor["offsets"])
+    dist = np.asarray(tensor["X"][offsets, tensor["columns"].index("dist_m")]).astype(int)
+    meeting = np.asarray(tensor["meeting_names"])[np.asarray(tensor["race_meeting"])]
+    return race_labels(meeting, dist, np.asarray(tensor["race_date"]))
+
+def group_table(race: Dict[str, np.ndarray], labels: np.ndarray, name: str) -> pd.DataFrame:
+    """
+    Sum per-race metrics into groups with `np.bincount`.
+    
+    Args:
+        race: Per-race arrays from `race_metrics`
+        labels: Group label of every race; races labelled None/NaN are left out
+        name: Name of the group index
+        
+    Returns:
+        DataFrame indexed by label with races, runners, logloss, hit_rate and
+        roi (means over races), staked and profit (sums)
+    """
+    codes, uniques = pd.factorize(labels, sort=True)
+    known = codes >= 0
+    codes = codes[known]
+    k = len(uniques)
+    races = np.bincount(codes, minlength=k)
+    
+    def total(key: str) -> np.ndarray:
+        return np.bincount(codes, race[key][known], k)
+    
+    return pd.DataFrame({
+        "races": races,
+        "runners": total("runners").astype(int),
+        "logloss": total("logloss") / races,
+        "hit_rate": total("hit") / races,
+        "roi": total("roi") / races,
+        "staked": total("staked"),
+        "profit": total("profit"),
+    }, index=pd.Index(uniques, name=name))
+
+def grouped_metrics(p: np.ndarray,
+                    pos: np.ndarray,
+                    offsets: np.ndarray,
+                    stake: np.ndarray = None,
+                    p_market: np.ndarray = None,
+                    labels: Optional[Dict[str, np.ndarray]] = None,
+                    n_bins: int = 10) -> Dict[str, Any]:
+    """
+    All metrics overall, per group and per probability bin, from arrays.
+    
+    Every race is reduced once with `race_metrics`; groups and calibration
+    bins are then single `np.bincount` passes, so the cost is a few passes
+    over the runners however many groups there are.
+    
+    Args:
+        p: Posterior probabilities, ordered so that each race is contiguous
+        pos: Finishing positions, same order
+        offsets: Start offset of each race
+        stake: Optional stakes
+        p_market: Market probabilities, needed with `stake`
+        labels: Group name -> label of every race (see `race_labels`)
+        n_bins: Number of calibration bins
+        
+    Returns:
+        Dictionary with overall (as `tensor_metrics` plus races, runners,
+        staked and profit), calibration and one `group_table` per group
+    """
+    offsets = np.asarray(offsets)
+    race = race_metrics(p, pos, offsets, stake, p_market)
+    n_races = max(len(offsets), 1)
+    out: Dict[str, Any] = {
+        "overall": {
+            "races": len(offsets),
+            "runners": len(p),
+            "logloss": float(race["logloss"].sum() / n_races),
+            "hit_rate": float(race["hit"].sum() / n_races),
+            "roi": float(race["roi"].sum() / n_races),
+            "staked": float(race["staked"].sum()),
+            "profit": float(race["profit"].sum()),
+        },
+        "calibration": calibration_table(np.asarray(p, dtype=float), pos == 1, n_bins),
+    }
+    for name, values in (labels or {}).items():
+        out[name] = group_table(race, values, name)
+    return out
+
+def frame_metrics(df: pd.DataFrame,
+                  keys: Sequence[str] = RACE_KEYS,
+                  stake_col: str = "kelly_stake",
+                  n_bins: int = 10) -> Dict[str, Any]:
+    """
+    `grouped_metrics` of a replay frame.
+    
+    Args:
+        df: DataFrame with p_posterior and pos, optionally stakes, p_market
+            and the group columns (meeting, dist_m, venue, meeting_date)
+        keys: Columns identifying a race; missing columns are ignored
+        stake_col: Column name for stake amounts
+        n_bins: Number of calibration bins
         
-        calibration_data.append({
-            "bin": bin_idx,
-            "avg_predicted": avg_pred,
-            "actual_rate": actual_rate,
-            "count": total_runners
-        })
+    Returns:
+        Dictionary as `grouped_metrics`
+    """
+    order, offsets = race_segments(df, keys)
+    first = df.iloc[order[offsets]]
+    
+    def race_column(name: str) -> Optional[np.ndarray]:
+        return first[name].to_numpy() if name in first.columns else None
     
-    return {"calibration_data": calibration_data}
+    labels = race_labels(race_column("meeting"), race_column("dist_m"),
+                         race_column("meeting_date"), race_column("venue"))
+    stake = p_market = None
+    if stake_col in df.columns:
+        stake = df[stake_col].to_numpy(dtype=float)[order]
+        p_market = df["p_market"].to_numpy(dtype=float)[order]
+    return grouped_metrics(df["p_posterior"].to_numpy(dtype=float)[order],
+                           df["pos"].to_numpy()[order], offsets, stake, p_market, labels, n_bins)
+
+def print_metrics(df: pd.DataFrame) -> None:
+    """
+    Calculate and display metrics for a replayed meeting or history.
+    
+    Args:
+        df: DataFrame with posterior probabilities and finishing positions
+    """
+    print("=== Benter Model Performance Metrics ===\n")
+    metrics = frame_metrics(df)
+    overall = metrics["overall"]
+    
+    print(f"Average Logloss: {overall['logloss']:.3f}")
+    print(f"Top-Pick Hit Rate: {overall['hit_rate']*100:.1f}%")
+    
+    # ROI (if Kelly stakes available)
+    if "kelly_stake" in df.columns:
+        print(f"Average ROI: {overall['roi']*100:.2f}%")
+    
+    # Race-level statistics
+    print(f"\nTotal Races: {overall['races']}")
+    print(f"Total Runners: {overall['runners']}")
+    
+    # Distance analysis
+    if "dist_m" in metrics:
+        print("\nDistance Analysis:")
+        for dist, row in metrics["dist_m"].iterrows():
+            print(f"  {dist}m: {row['hit_rate']*100:.1f}% hit rate")
+    
+    # Venue and month analysis, for replays of several meetings
+    for name, title in (("venue", "Venue"), ("month", "Month")):
+        if name in metrics and len(metrics[name]) > 1:
+            print(f"\n{title} Analysis:")
+            for label, row in metrics[name].iterrows():
+                print(f"  {label}: {row['races']} races, logloss {row['logloss']:.3f}, "
+                      f"{row['hit_rate']*100:.1f}% hit rate")
+    
+    # Calibration analysis
+    print("\nCalibration Analysis:")
+    for _, bin_data in metrics["calibration"].iterrows():
+        print(f"  Bin {int(bin_data['bin'])}: Pred={bin_data['avg_predicted']:.3f}, "
+              f"Actual={bin_data['actual_rate']:.3f}, Count={int(bin_data['count'])}")
 
 def main():
     """Main function to calculate and display metrics."""
@@ -111,47 +439,7 @@ def main():
         # Read results
         df = pd.read_csv(results_file)
         
-        print("=== Benter Model Performance Metrics ===\n")
-        
-        # Calculate logloss
-        logloss_by_race = df.groupby("race_no").apply(calculate_logloss)
-        avg_logloss = logloss_by_race.mean()
-        print(f"Average Logloss: {avg_logloss:.3f}")
-        
-        # Calculate top-pick hit rate
-        top_picks = (df.sort_values(["race_no", "p_posterior"], 
-                                   ascending=[True, False])
-                    .groupby("race_no")
-                    .head(1))
-        hit_rate = (top_picks["pos"] == 1).mean()
-        print(f"Top-Pick Hit Rate: {hit_rate*100:.1f}%")
-        
-        # Calculate ROI (if Kelly stakes available)
-        if "kelly_stake" in df.columns:
-            roi_by_race = df.groupby("race_no").apply(calculate_roi)
-            avg_roi = roi_by_race.mean()
-            print(f"Average ROI: {avg_roi*100:.2f}%")
-        
-        # Race-level statistics
-        print(f"\nTotal Races: {df['race_no'].nunique()}")
-        print(f"Total Runners: {len(df)}")
-        
-        # Distance analysis
-        if "dist_m" in df.columns:
-            print(f"\nDistance Analysis:")
-            for dist in sorted(df["dist_m"].unique()):
-                dist_data = df[df["dist_m"] == dist]
-                dist_hit_rate = (dist_data.sort_values("p_posterior", ascending=False)
-                               .groupby("race_no")
-                               .head(1)["pos"] == 1).mean()
-                print(f"  {dist}m: {dist_hit_rate*100:.1f}% hit rate")
-        
-        # Calibration analysis
-        calibration = calculate_calibration(df)
-        print(f"\nCalibration Analysis:")
-        for bin_data in calibration["calibration_data"]:
-            print(f"  Bin {bin_data['bin']}: Pred={bin_data['avg_predicted']:.3f}, "
-                  f"Actual={bin_data['actual_rate']:.3f}, Count={bin_data['count']}")
+        print_metrics(df)
         
     except Exception as e:
         print(f"Error calculating metrics: {e}")
@@ -6,77 +6,80 @@ Applies the model to historical data and records predictions vs actual results.
 
 import pandas as pd
 import numpy as np
-import json
 import pathlib
 import sys
+from typing import Dict, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
-from india.model.combiner_india import posterior_for_race
+from india.model.combiner_india import load_weights, posterior_batch
+from india.backtest.results_join import join_positions, reconcile_results
+from india.features.feature_store import iter_meetings
+from india.features.silver_store import FEATURE_SCHEMA
 
-def replay_meeting(features_file: str, results_file: str, output_file: str) -> None:
+# Report columns, for the header of a replay without any meeting
+REPORT_COLUMNS = FEATURE_SCHEMA.names + ["p_market", "p_prior", "p_posterior", "pos"]
+
+def replay_meeting(features_file: str, results_file: str, output_file: str,
+                   aliases: Optional[Dict[str, str]] = None,
+                   matches_file: Optional[str] = None,
+                   weights_file: Optional[str] = None) -> None:
     """
     Replay a meeting using the Benter model.
     
     Args:
-        features_file: Path to features Parquet file
-        results_file: Path to results JSON file
+        features_file: Path to features Parquet file or silver dataset
+        results_file: Path to results bronze file, or bronze directory for
+            a multi-meeting dataset
         output_file: Path to output CSV file
+        aliases: Alias key -> canonical key mapping for result names
+        matches_file: Optional CSV path for result names matched by alias or
+            fuzzy matching
+        weights_file: Fitted Benter weights JSON from `clogit.py`; the
+            geometric mean is used if it is missing
     """
-    # Read features
-    features = pd.read_parquet(features_file)
-    
-    # Read results
-    with open(results_file, 'r') as f:
-        results = json.load(f)
-    
-    # Create mapping of race number to horse positions
-    res_map = {}
-    for r in results:
-        race_no = r["race_no"]
-        horse_positions = {}
-        for p in r["placings"]:
-            horse_positions[p["horse"].lower()] = p["pos"]
-        res_map[race_no] = horse_positions
-    
-    rows = []
+    alpha, beta = load_weights(weights_file)
     
-    # Process each race
-    for rno, group in features.groupby("race_no"):
-        # Apply Benter model
-        df = posterior_for_race(group, use="p_opening")
+    # Stream the features meeting by meeting with each meeting's results,
+    # so a multi-year dataset is never held in memory at once
+    n_rows = 0
+    all_matches = []
+    for _, features, results in iter_meetings(features_file, results_file):
+        # Apply Benter model to all races in one pass
+        out = posterior_batch(features, use="p_opening", alpha=alpha, beta=beta)
+        out = out.sort_values("race_no", kind="stable", ignore_index=True)
         
-        # Add actual finishing positions
-        h2pos = res_map.get(rno, {})
-        df["pos"] = (df["horse"]
-                    .str.lower()
-                    .map(h2pos)
-                    .fillna(99)
-                    .astype(int))
+        # Add actual finishing positions, reconciling misspelt result names
+        results, matches = reconcile_results(out, results, aliases)
+        out = join_positions(out, results)
+        all_matches.append(matches)
         
-        rows.append(df)
+        # Save results
+        out.to_csv(output_file, mode="a" if n_rows else "w", header=not n_rows, index=False)
+        n_rows += len(out)
     
-    # Combine all races
-    out = pd.concat(rows, ignore_index=True)
+    if not n_rows:
+        pd.DataFrame(columns=REPORT_COLUMNS).to_csv(output_file, index=False)
     
-    # Save results
-    out.to_csv(output_file, index=False)
+    if matches_file is not None and all_matches:
+        pd.concat(all_matches, ignore_index=True).to_csv(matches_file, index=False)
     
-    print(f"Replay complete for {len(out)} horse entries")
+    print(f"Replay complete for {n_rows} horse entries")
     print(f"Results saved to: {output_file}")
 
 def main():
     """Main function to parse command line arguments and process files."""
-    if len(sys.argv) != 4:
-        print("Usage: python replay_snapshots.py <features_parquet> <results_json> <output_csv>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python replay_snapshots.py <features_parquet> <results_json> <output_csv> [weights_json]")
         sys.exit(1)
     
     features_file = sys.argv[1]
     results_file = sys.argv[2]
     output_file = sys.argv[3]
+    weights_file = sys.argv[4] if len(sys.argv) > 4 else None
     
     try:
-        replay_meeting(features_file, results_file, output_file)
+        replay_meeting(features_file, results_file, output_file, weights_file=weights_file)
     except Exception as e:
         print(f"Error during replay: {e}")
         sys.exit(1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Attach finishing positions from parsed results to runner-level frames.
+Builds a keyed results table once and joins it with a single hash merge.
+"""
+
+import pathlib
+import sys
+import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.features.make_features_india import normalize_horse_names
+from india.ingestion.bronze_store import BRONZE_FORMATS, read_bronze
+from india.features.name_matching import reconcile_keys
+
+# Finishing position assigned to runners missing from the results
+UNPLACED = 99
+
+def results_frame(results: List[Dict[str, Any]],
+                  meeting: Optional[str] = None) -> pd.DataFrame:
+    """
+    Flatten parsed results into one row per placed horse.
+    
+    Args:
+        results: Parsed results as written by parse_results_india
+        meeting: Optional meeting id for records without their own
+        
+    Returns:
+        DataFrame with race_no, horse_key, pos (and meeting if known)
+    """
+    rows = [(r.get("meeting", meeting), r["race_no"], p["horse"], p["pos"])
+            for r in results for p in r["placings"]]
+    df = pd.DataFrame(rows, columns=["meeting", "race_no", "horse", "pos"])
+    return keyed_results(df)
+
+def keyed_results(placings: pd.DataFrame, meeting: Optional[str] = None) -> pd.DataFrame:
+    """
+    Key flat result placings by normalized horse name.
+    
+    Args:
+        placings: One row per placing with race_no, horse and pos (rows
+            without a horse mark races with no placings)
+        meeting: Optional meeting id to tag every row with
+        
+    Returns:
+        DataFrame with race_no, horse_key, pos (and meeting if known)
+    """
+    df = placings[placings["horse"].notna()].copy()
+    if meeting is not None:
+        df["meeting"] = meeting
+    df["horse_key"] = normalize_horse_names(df["horse"])
+    if "meeting" in df.columns and df["meeting"].isna().all():
+        df = df.drop(columns="meeting")
+    return df.drop(columns="horse")
+
+def results_files(bronze_dir: pathlib.Path) -> Dict[str, pathlib.Path]:
+    """
+    Find one results file per meeting in a bronze directory.
+    
+    Args:
+        bronze_dir: Directory of '<meeting>-results.<ext>' files
+        
+    Returns:
+        Mapping of meeting id to results file, preferring columnar formats
+        over JSON when a meeting has several
+    """
+    files = {}
+    for suffix in reversed(list(BRONZE_FORMATS.values())):
+        for f in bronze_dir.glob(f"*-results{suffix}"):
+            files[f.name[:-len(f"-results{suffix}")]] = f
+    return dict(sorted(files.items()))
+
+def load_results(results_file: str, meeting: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read bronze results into a keyed results table.
+    
+    Args:
+        results_file: Path to a results bronze file (Parquet, Arrow IPC or
+            JSON), or a bronze directory whose '<meeting>-results' files are
+            all read and tagged by meeting
+        meeting: Optional meeting id to tag every row of a single file with
+        
+    Returns:
+        DataFrame as returned by `keyed_results`
+    """
+    path = pathlib.Path(results_file)
+    if path.is_dir():
+        frames = [load_results(f, meeting=m) for m, f in results_files(path).items()]
+        if not frames:
+            return pd.DataFrame(columns=["meeting", "race_no", "pos", "horse_key"])
+        return pd.concat(frames, ignore_index=True)
+    
+    return keyed_results(read_bronze(path, "results"), meeting=meeting)
+
+def results_source(results_file: Optional[str]) -> Union[None, Dict[str, pathlib.Path], pd.DataFrame]:
+    """
+    Prepare results for reading meeting by meeting.
+    
+    Args:
+        results_file: Results file, bronze directory or None
+        
+    Returns:
+        None, the '<meeting>-results' files of a bronze directory, or the
+        keyed results table of a single file
+    """
+    if results_file is None:
+        return None
+    path = pathlib.Path(results_file)
+    if path.is_dir():
+        return results_files(path)
+    return load_results(results_file)
+
+def meeting_results(source: Union[None, Dict[str, pathlib.Path], pd.DataFrame],
+                    meetings: List[str]) -> Optional[pd.DataFrame]:
+    """
+    Keyed results of some meetings, reading only their files.
+    
+    Args:
+        source: As returned by `results_source`
+        meetings: Meeting ids
+        
+    Returns:
+        DataFrame as returned by `keyed_results` (a single file without a
+        meeting column is returned whole), or None without results
+    """
+    if source is None:
+        return None
+    if isinstance(source, dict):
+        frames = [read_bronze(source[m], "results").assign(meeting=m) for m in meetings if m in source]
+        if not frames:
+            return pd.DataFrame(columns=["meeting", "race_no", "pos", "horse_key"])
+        return keyed_results(pd.concat(frames, ignore_index=True))
+    if "meeting" in source.columns:
+        return source[source["meeting"].isin(meetings)]
+    return source
+
+def join_keys(features: pd.DataFrame, results: pd.DataFrame) -> List[str]:
+    """Race key columns carried by both tables (meeting only if both have it)."""
+    return [k for k in ("meeting", "race_no") if k in features.columns and k in results.columns]
+
+def reconcile_results(features: pd.DataFrame,
+                      results: pd.DataFrame,
+                      aliases: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rename misspelt result names to the runner names of the same race.
+    
+    Args:
+        features: Runner-level DataFrame with race_no and horse
+        results: Keyed results table from `keyed_results`
+        aliases: Alias key -> canonical key mapping
+        
+    Returns:
+        Tuple of (results with reconciled horse_key, matches as returned by
+        `reconcile_keys`)
+    """
+    keys = join_keys(features, results)
+    runners = features[keys].assign(horse_key=normalize_horse_names(features["horse"]))
+    results = results.reset_index(drop=True)
+    mapped, matches = reconcile_keys(runners, results, keys, aliases)
+    return results.assign(horse_key=mapped), matches
+
+def attach_positions(features: pd.DataFrame, results: pd.DataFrame,
+                     aliases: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Add a `pos` column to runner rows with one hash join.
+    
+    Runners are matched on (meeting, race_no, normalized horse name); the
+    meeting key is only used when both tables carry it. Result names
+    without an exact match are reconciled by alias and fuzzy matching first.
+    
+    Args:
+        features: Runner-level DataFrame with race_no and horse
+        results: Keyed results table from `results_frame`
+        aliases: Alias key -> canonical key mapping
+        
+    Returns:
+        Copy of `features` in the same row order with `pos` added; unplaced
+        or unmatched runners get UNPLACED
+    """
+    results, _ = reconcile_results(features, results, aliases)
+    return join_positions(features, results)
+
+def join_positions(features: pd.DataFrame, results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add a `pos` column from results already reconciled to the runner names.
+    
+    Args:
+        features: Runner-level DataFrame with race_no and horse
+        results: Results from `reconcile_results`
+        
+    Returns:
+        Copy of `features` in the same row order with `pos` added; unplaced
+        or unmatched runners get UNPLACED
+    """
+    keys = join_keys(features, results) + ["horse_key"]
+    
+    # Later placings win, as they did with the old per-race dict
+    index = results.drop_duplicates(keys, keep="last").set_index(keys)["pos"]
+    
+    left = features[keys[:-1]].copy()
+    left["horse_key"] = normalize_horse_names(features["horse"])
+    pos = left.join(index, on=keys)["pos"]
+    
+    out = features.drop(columns="pos", errors="ignore")
+    out["pos"] = pos.fillna(UNPLACED).astype(int).to_numpy()
+    return out
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep over prior coefficients, combination weights and staking.
+Reads the hand-set parameters and their grids from config/settings.yaml
+and evaluates every combination on a cached race tensor, with the
+parameter sets of a batch as columns of one array, instead of replaying
+the meetings once per combination.
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from typing import Dict, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import PRIOR_PARAMS, posterior_tensor, kelly_stakes, single_kelly
+from india.backtest.metrics import race_metrics
+from india.features.race_tensor import cached_race_tensor, tensor_column
+
+# Configuration file read by default
+SETTINGS_FILE = pathlib.Path(__file__).parent.parent / "config" / "settings.yaml"
+
+# Swept parameters, slowest-varying first, with the values used when the
+# settings do not give one; runs of grid points share a posterior
+MODEL_PARAMS = tuple(PRIOR_PARAMS) + ("alpha", "beta")
+STAKE_PARAMS = ("confidence_threshold", "max_stake")
+DEFAULT_PARAMS = dict(PRIOR_PARAMS, alpha=0.5, beta=0.5, confidence_threshold=0.15, max_stake=0.10)
+
+# Runner x parameter-set cells evaluated at once
+BATCH_CELLS = 1 << 22
+
+# Metrics where lower is better
+LOWER_IS_BETTER = ("logloss",)
+
+def load_settings(path: pathlib.Path = SETTINGS_FILE) -> Dict[str, Any]:
+    """Read a settings YAML file."""
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+def settings_params(settings: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Parameter values of a settings file, with defaults for missing ones.
+    
+    Args:
+        settings: Parsed settings.yaml
+        
+    Returns:
+        Dictionary with a value for every swept parameter
+    """
+    racing = settings.get("racing") or {}
+    params = dict(DEFAULT_PARAMS)
+    for section in ("features", "defaults", "combiner", "kelly"):
+        params.update({k: float(v) for k, v in (racing.get(section) or {}).items() if k in params})
+    return params
+
+def grid_values(spec: Any) -> np.ndarray:
+    """Values of one grid entry: a number, a list, or start/stop/num."""
+    if isinstance(spec, dict):
+        return np.linspace(spec["start"], spec["stop"], int(spec["num"]))
+    return np.atleast_1d(np.asarray(spec, dtype=float))
+
+def parameter_grid(settings: Dict[str, Any],
+                   grid: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Cartesian product of the parameter grids.
+    
+    Args:
+        settings: Parsed settings.yaml
+        grid: Parameter -> values, instead of the settings' `sweep` section
+        
+    Returns:
+        DataFrame with one row per combination and one column per parameter,
+        ordered so that the staking parameters vary fastest
+    """
+    params = settings_params(settings)
+    grid = (settings.get("sweep") or {}) if grid is None else grid
+    unknown = sorted(set(grid) - set(params))
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)}")
+    
+    names = MODEL_PARAMS + STAKE_PARAMS
+    axes = np.meshgrid(*[grid_values(grid.get(k, params[k])) for k in names], indexing="ij")
+    return pd.DataFrame({k: a.ravel() for k, a in zip(names, axes)})
+
+def prior_design(tensor: Dict[str, Any]) -> np.ndarray:
+    """
+    Runner features that the prior is linear in.
+    
+    `prior_vector` is base_prior + rating_weight * rating - penalty * (weight
+    - 55) + bonus, so with one column per coefficient of MODEL_PARAMS[:5]
+    the unfloored prior of many coefficient sets is a single matrix product.
+    
+    Args:
+        tensor: Race tensor
+        
+    Returns:
+        Array of shape (runners, 5)
+    """
+    rating = tensor_column(tensor, "rating")
+    route = tensor_column(tensor, "dist_m") >= 1600
+    over = tensor_column(tensor, "weight_kg") - 55.0
+    age3 = tensor_column(tensor, "age") == 3
+    return np.column_stack([np.ones(len(rating)), rating, -np.where(route, over, 0.0),
+                            -np.where(route, 0.0, over), (age3 & route).astype(float)])
+
+def grid_posterior(design: np.ndarray,
+                   log_market: np.ndarray,
+                   offsets: np.ndarray,
+                   models: np.ndarray) -> np.ndarray:
+    """
+    Posterior probabilities of several parameter sets at once.
+    
+    Normalizing the prior within a race scales every score of the race by
+    the same factor, which the final normalization removes, so the scores
+    are built from the unnormalized prior and normalized once.
+    
+    Args:
+        design: Output of `prior_design`
+        log_market: Log of the normalized market probabilities
+        offsets: Start offset of each race
+        models: Array of shape (sets, len(MODEL_PARAMS))
+        
+    Returns:
+        Array of shape (sets, runners), normalized within every race
+    """
+    counts = np.diff(np.r_[offsets, len(design)])
+    score = models[:, :5] @ design.T
+    # Same semantics as the floor of `prior_vector`, including NaN -> floor
+    np.fmax(score, models[:, 5:6], out=score)
+    np.log(score, out=score)
+    score *= models[:, 6:7]
+    score += models[:, 7:8] * log_market
+    np.exp(score, out=score)
+    score /= np.repeat(np.add.reduceat(score, offsets, axis=1), counts, axis=1)
+    return score
+
+def stake_summary(rows: np.ndarray,
+                  stake: np.ndarray,
+                  won: np.ndarray,
+                  p_market: np.ndarray,
+                  offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Staking metrics of several stake vectors from their betting runners.
+    
+    Race totals of all the vectors are one flat `np.bincount`; payouts are
+    only placed for the winners among the rows.
+    
+    Args:
+        rows: Runners with a stake in any vector, in tensor order
+        stake: Stakes of those runners, shape (vectors, len(rows))
+        won: Whether each runner is its race's (first) winner
+        p_market: Market probabilities of all runners
+        offsets: Start offset of each race
+        
+    Returns:
+        Dictionary with roi (mean over all races, as `race_metrics`), staked,
+        profit and bets per vector
+    """
+    n_vectors = len(stake)
+    if len(rows) == 0:
+        zeros = np.zeros(n_vectors)
+        return {"roi": zeros, "staked": zeros, "profit": zeros, "bets": zeros}
+    race = np.searchsorted(offsets, rows, side="right") - 1
+    code = np.cumsum(np.r_[False, race[1:] != race[:-1]])
+    k = code[-1] + 1
+    flat = (np.arange(n_vectors)[:, None] * k + code).ravel()
+    staked = np.bincount(flat, stake.ravel(), n_vectors * k).reshape(n_vectors, k)
+    
+    winners = np.flatnonzero(won[rows])
+    profit = -staked
+    profit[:, code[winners]] += stake[:, winners] / p_market[rows[winners]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(staked > 0, profit / staked, 0.0).sum(axis=1) / len(offsets)
+    return {"roi": roi, "staked": staked.sum(axis=1), "profit": profit.sum(axis=1),
+            "bets": (stake > 0).sum(axis=1)}
+
+def evaluate_grid(tensor: Dict[str, Any],
+                  grid: pd.DataFrame,
+                  use: str = "p_opening",
+                  mode: str = "single",
+                  fraction: float = 0.5) -> pd.DataFrame:
+    """
+    Metrics of every parameter combination on the races of a tensor.
+    
+    Distinct models (prior and combination parameters) are evaluated
+    BATCH_CELLS / runners at a time as the rows of one array, and the
+    logloss and hit rate of each are computed once. All the staking
+    parameters of a model are then evaluated together, as rows over only
+    the runners that any of them bets on.
+    
+    Args:
+        tensor: Race tensor with finishing positions
+        grid: Output of `parameter_grid`
+        use: Which market odds to use
+        mode: Kelly mode (see `kelly_stakes`)
+        fraction: Kelly multiplier for the fractional mode
+        
+    Returns:
+        `grid` with logloss, hit_rate, roi (means over races), staked,
+        profit (sums, as fractions of a constant bankroll) and bets
+    """
+    offsets = np.asarray(tensor["offsets"])
+    pos = np.asarray(tensor["pos"])
+    n = len(pos)
+    p_market = posterior_tensor(tensor, use=use)["p_market"]
+    log_market = np.log(p_market)
+    design = prior_design(tensor)
+    
+    # Only the first winner of a race is paid, as in `race_metrics`
+    winner = np.minimum.reduceat(np.where(pos == 1, np.arange(n), n), offsets)
+    won = np.zeros(n, dtype=bool)
+    won[winner[winner < n]] = True
+    
+    models, inverse = np.unique(grid[list(MODEL_PARAMS)].to_numpy(), axis=0, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind="stable")
+    bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(models) + 1))
+    threshold, cap = (grid[k].to_numpy() for k in STAKE_PARAMS)
+    out = {k: np.zeros(len(grid)) for k in ("logloss", "hit_rate", "roi", "staked", "profit", "bets")}
+    
+    batch = max(1, BATCH_CELLS // max(n, 1))
+    for first in range(0, len(models), batch):
+        p = grid_posterior(design, log_market, offsets, models[first:first + batch])
+        for j, pj in enumerate(p):
+            points = order[bounds[first + j]:bounds[first + j + 1]]
+            race = race_metrics(pj, pos, offsets)
+            out["logloss"][points] = race["logloss"].mean()
+            out["hit_rate"][points] = race["hit"].mean()
+    
+            if mode == "simultaneous":
+                stake = np.array([kelly_stakes(pj, p_market, offsets, threshold[i], cap[i], mode)
+                                  for i in points])
+                rows = np.flatnonzero((stake > 0).any(axis=0))
+                stake = stake[:, rows]
+            else:
+                # Kelly fractions of the runners above the lowest threshold
+                rows = np.flatnonzero(pj > threshold[points].min())
+                kelly = single_kelly(pj[rows], p_market[rows])
+                if mode == "fractional":
+                    kelly = fraction * kelly
+                rows, kelly = rows[kelly > 0], kelly[kelly > 0]
+                stake = np.where(pj[rows] > threshold[points, None],
+                                 np.minimum(kelly, cap[points, None]), 0.0)
+            for key, values in stake_summary(rows, stake, won, p_market, offsets).items():
+                out[key][points] = values
+    
+    out["bets"] = out["bets"].astype(int)
+    return grid.join(pd.DataFrame(out, index=grid.index))
+
+def rank_grid(results: pd.DataFrame, rank_by: str = "roi") -> pd.DataFrame:
+    """
+    Sort sweep results best first and number them.
+    
+    Args:
+        results: Output of `evaluate_grid`
+        rank_by: Metric to rank by; lower is better for LOWER_IS_BETTER
+        
+    Returns:
+        Results sorted by the metric with a leading `rank` column (1 = best)
+    """
+    ranked = results.sort_values(rank_by, ascending=rank_by in LOWER_IS_BETTER,
+                                 kind="stable", ignore_index=True)
+    ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+    return ranked
+
+def run_sweep(features_file: str,
+              results_file: str,
+              output_file: str,
+              settings_file: pathlib.Path = SETTINGS_FILE,
+              rank_by: str = "roi") -> pd.DataFrame:
+    """
+    Evaluate the settings' parameter grid and write the ranked table.
+    
+    Args:
+        features_file: Path to features Parquet file or silver dataset
+        results_file: Path to results JSON file or bronze directory
+        output_file: Path to the output Parquet file
+        settings_file: Settings YAML with the parameters and `sweep` grids
+        rank_by: Metric to rank by
+        
+    Returns:
+        Ranked results
+    """
+    settings = load_settings(settings_file)
+    kelly = (settings.get("racing") or {}).get("kelly") or {}
+    grid = parameter_grid(settings)
+    tensor = cached_race_tensor(features_file, results_file)
+    print(f"Sweeping {len(grid):,} parameter sets over {len(tensor['offsets']):,} races, "
+          f"{len(tensor['horse']):,} runners")
+    
+    start = time.perf_counter()
+    results = evaluate_grid(tensor, grid, mode=kelly.get("mode", "single"),
+                            fraction=float(kelly.get("fraction", 0.5)))
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated in {elapsed:.2f}s ({elapsed / len(grid) * 1e6:.0f} µs per parameter set)")
+    
+    ranked = rank_grid(results, rank_by)
+    ranked.to_parquet(output_file, index=False)
+    print(f"\nTop parameter sets by {rank_by}:")
+    print(ranked.head(10).to_string(index=False))
+    print(f"\nRanked results saved to: {output_file}")
+    return ranked
+
+def main():
+    """Main function to run a parameter sweep."""
+    parser = argparse.ArgumentParser(description="Sweep prior, combination and staking parameters")
+    parser.add_argument("features", help="Features Parquet file or silver dataset directory")
+    parser.add_argument("results", help="Results JSON file or bronze directory")
+    parser.add_argument("output", help="Output Parquet file with the ranked parameter sets")
+    parser.add_argument("--settings", default=str(SETTINGS_FILE), help="Settings YAML with sweep grids")
+    parser.add_argument("--rank-by", default="roi",
+                        choices=["logloss", "hit_rate", "roi", "profit"], help="Metric to rank by")
+    args = parser.parse_args()
+    
+    try:
+        run_sweep(args.features, args.results, args.output, pathlib.Path(args.settings), args.rank_by)
+    except Exception as e:
+        print(f"Error during parameter sweep: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
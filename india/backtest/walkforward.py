@@ -1,183 +1,228 @@
 #!/usr/bin/env python3
 """
 Walkforward backtesting for the Benter model.
-Splits data by time periods and evaluates performance across folds.
+Splits data by time periods, refits the combination weights on all earlier
+dates and evaluates each following period, with folds in parallel.
 """
 
 import pandas as pd
 import numpy as np
-import json
+import os
 import pathlib
+import resource
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Tuple
-from india.model.combiner_india import posterior_for_race, calculate_kelly_stakes
 
-def split_data_by_date(df: pd.DataFrame, 
-                       date_col: str = "meeting_date",
-                       n_folds: int = 5) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import posterior_tensor, kelly_stakes
+from india.backtest.metrics import tensor_metrics
+from india.model.clogit import fit_benter_tensor
+from india.features.race_tensor import cached_race_tensor, load_race_tensor, race_slice
+
+def date_fold_bounds(race_date: np.ndarray, n_folds: int = 5) -> List[Tuple[int, int]]:
     """
-    Split data into training and validation folds by date.
+    Race ranges of equal date blocks of a race tensor.
     
     Args:
-        df: DataFrame with racing data
-        date_col: Column name for date
+        race_date: Date of every race, in tensor (date) order
         n_folds: Number of folds
         
     Returns:
-        List of (train, validation) DataFrame pairs
-    """
-    if date_col not in df.columns:
-        # If no date column, split by race number
-        unique_races = sorted(df["race_no"].unique())
-        fold_size = len(unique_races) // n_folds
+        List of (first race, one past the last race) per validation fold
         
-        folds = []
-        for i in range(n_folds):
-            start_idx = i * fold_size
-            end_idx = start_idx + fold_size if i < n_folds - 1 else len(unique_races)
-            
-            val_races = unique_races[start_idx:end_idx]
-            train_races = [r for r in unique_races if r not in val_races]
-            
-            train_df = df[df["race_no"].isin(train_races)]
-            val_df = df[df["race_no"].isin(val_races)]
-            
-            folds.append((train_df, val_df))
+    Raises:
+        ValueError: If only some of the races have a date
+    """
+    # Races without any date (legacy single-meeting files) split by position;
+    # a partly dated history cannot be cut into date blocks
+    undated = np.isnat(race_date)
+    if undated.all():
+        keys = np.arange(len(race_date))
+    elif undated.any():
+        raise ValueError(f"{int(undated.sum())} of {len(race_date)} races have no date; "
+                         "date or drop them before a walkforward")
     else:
-        # Split by date
-        unique_dates = sorted(df[date_col].unique())
-        fold_size = len(unique_dates) // n_folds
-        
-        folds = []
-        for i in range(n_folds):
-            start_idx = i * fold_size
-            end_idx = start_idx + fold_size if i < n_folds - 1 else len(unique_dates)
-            
-            val_dates = unique_dates[start_idx:end_idx]
-            train_dates = [d for d in unique_dates if d not in val_dates]
-            
-            train_df = df[df[date_col].isin(train_dates)]
-            val_df = df[df[date_col].isin(val_dates)]
-            
-            folds.append((train_df, val_df))
-    
-    return folds
+        keys = race_date
+    unique_dates = np.unique(keys)
+    fold_size = len(unique_dates) // n_folds
+    
+    bounds = []
+    for i in range(n_folds):
+        start_idx = i * fold_size
+        end_idx = start_idx + fold_size if i < n_folds - 1 else len(unique_dates)
+        if start_idx >= end_idx:
+            bounds.append((0, 0))
+            continue
+        start = int(np.searchsorted(keys, unique_dates[start_idx], side="left"))
+        stop = int(np.searchsorted(keys, unique_dates[end_idx - 1], side="right"))
+        bounds.append((start, stop))
+    return bounds
 
-def evaluate_fold(val_df: pd.DataFrame) -> Dict[str, float]:
+def evaluate_races(tensor: Dict[str, Any],
+                   alpha: float = 0.5,
+                   beta: float = 0.5) -> Dict[str, float]:
     """
-    Evaluate performance on a validation fold.
+    Evaluate performance on the races of a tensor, without pandas.
     
     Args:
-        val_df: Validation DataFrame
+        tensor: Race tensor (or `race_slice`) with finishing positions
+        alpha: Weight of the prior in the combination
+        beta: Weight of the market in the combination
         
     Returns:
-        Dictionary with performance metrics
+        Dictionary with logloss, hit_rate and roi
     """
-    # Apply Benter model
-    results = []
-    for rno, group in val_df.groupby("race_no"):
-        df = posterior_for_race(group, use="p_opening")
-        df = calculate_kelly_stakes(df)
-        results.append(df)
-    
-    if not results:
+    if len(tensor["offsets"]) == 0:
         return {"logloss": 0.0, "hit_rate": 0.0, "roi": 0.0}
     
-    combined = pd.concat(results, ignore_index=True)
-    
-    # Calculate metrics
-    logloss_by_race = combined.groupby("race_no").apply(
-        lambda g: -np.log(g[g["pos"] == 1]["p_posterior"].iloc[0]) 
-        if len(g[g["pos"] == 1]) > 0 else 0.0
-    )
-    avg_logloss = logloss_by_race.mean()
-    
-    top_picks = (combined.sort_values(["race_no", "p_posterior"], 
-                                     ascending=[True, False])
-                .groupby("race_no")
-                .head(1))
-    hit_rate = (top_picks["pos"] == 1).mean()
-    
-    # Calculate ROI
-    roi_by_race = combined.groupby("race_no").apply(
-        lambda g: calculate_roi_for_race(g)
-    )
-    avg_roi = roi_by_race.mean()
-    
-    return {
-        "logloss": avg_logloss,
-        "hit_rate": hit_rate,
-        "roi": avg_roi
-    }
+    post = posterior_tensor(tensor, use="p_opening", alpha=alpha, beta=beta)
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], tensor["offsets"])
+    return tensor_metrics(post["p_posterior"], np.asarray(tensor["pos"]), tensor["offsets"],
+                          stake, post["p_market"])
+
+def reset_peak_rss() -> bool:
+    """
+    Reset this process's peak resident memory (VmHWM), where Linux allows it.
+    
+    Returns:
+        Whether the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process in MB.
+    
+    Falls back to ru_maxrss, the lifetime peak, where /proc is missing.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def expanding_folds(race_date: np.ndarray, n_folds: int = 5) -> List[Tuple[int, int]]:
+    """
+    Validation race ranges of an expanding-window walkforward.
+    
+    The races are cut into `n_folds` date blocks as in `date_fold_bounds`;
+    every block after the first is predicted by a model fitted on all the
+    races before it.
+    
+    Args:
+        race_date: Date of every race, in tensor (date) order
+        n_folds: Number of date blocks
+        
+    Returns:
+        List of (first race, one past the last race) per validation fold;
+        the training races of a fold are 0..first race - 1
+    """
+    return [(start, stop) for start, stop in date_fold_bounds(race_date, n_folds)[1:]
+            if stop > start]
 
-def calculate_roi_for_race(group: pd.DataFrame) -> float:
-    """Calculate ROI for a single race."""
-    total_stake = group["kelly_stake"].sum()
-    if total_stake == 0:
-        return 0.0
+def run_fold(task: Tuple[str, int, int, int, str]) -> Dict[str, Any]:
+    """
+    Fit on the races before a fold and evaluate the fold.
     
-    winner_row = group[group["pos"] == 1]
-    if len(winner_row) == 0:
-        return -1.0  # Lost entire stake
+    Runs in a worker process: the tensor is memory-mapped from its directory,
+    so folds share its pages instead of receiving copies.
     
-    winner_stake = winner_row["kelly_stake"].iloc[0]
-    market_odds = 1 / winner_row["p_market"].iloc[0]
+    Args:
+        task: Tuple of (tensor directory, fold number, first race, one past
+            the last race, market odds column)
+        
+    Returns:
+        Fold metrics with alpha, beta, race counts, seconds and peak_mb, the
+        peak memory of the fold; where the peak cannot be reset (no /proc),
+        the peak of the process so far, as flagged by peak_is_fold
+    """
+    path, fold, start, stop, use = task
+    # Workers run several folds, and workers=1 runs all of them in-process
+    peak_is_fold = reset_peak_rss()
+    begin = time.perf_counter()
     
-    returns = (market_odds - 1) * winner_stake - total_stake
-    roi = returns / total_stake if total_stake > 0 else 0
+    tensor = load_race_tensor(path)
+    train = race_slice(tensor, 0, start)
+    val = race_slice(tensor, start, stop)
+    try:
+        fit = fit_benter_tensor(train, use=use)
+        alpha, beta = fit["alpha"], fit["beta"]
+    except ValueError:
+        # No training race with a winner; keep the hand-set weights
+        alpha, beta = np.nan, np.nan
+    metrics = evaluate_races(val, *((0.5, 0.5) if np.isnan(alpha) else (alpha, beta)))
     
-    return roi
+    metrics.update({
+        "fold": fold,
+        "train_races": start,
+        "train_entries": len(train["horse"]),
+        "val_races": stop - start,
+        "val_entries": len(val["horse"]),
+        "alpha": alpha,
+        "beta": beta,
+        "seconds": time.perf_counter() - begin,
+        "peak_mb": peak_rss_mb(),
+        "peak_is_fold": peak_is_fold,
+    })
+    return metrics
 
 def walkforward_backtest(features_file: str, 
                          results_file: str,
                          output_file: str,
-                         n_folds: int = 5) -> None:
+                         n_folds: int = 5,
+                         workers: int = None) -> None:
     """
-    Perform walkforward backtesting.
+    Perform expanding-window walkforward backtesting.
+    
+    The races are cut into `n_folds` date blocks; each block after the
+    first is predicted with alpha and beta refitted on every earlier race,
+    and the folds run in parallel worker processes.
     
     Args:
-        features_file: Path to features Parquet file
-        results_file: Path to results JSON file
+        features_file: Path to features Parquet file or silver dataset
+        results_file: Path to results JSON file or bronze directory
         output_file: Path to output results file
-        n_folds: Number of folds for cross-validation
+        n_folds: Number of date blocks (n_folds - 1 validation folds)
+        workers: Worker processes; defaults to the CPU count, 1 runs the
+            folds in-process
     """
-    # Read data
-    features = pd.read_parquet(features_file)
-    
-    with open(results_file, 'r') as f:
-        results = json.load(f)
-    
-    # Add results to features
-    res_map = {}
-    for r in results:
-        race_no = r["race_no"]
-        horse_positions = {}
-        for p in r["placings"]:
-            horse_positions[p["horse"].lower()] = p["pos"]
-        res_map[race_no] = horse_positions
-    
-    features["pos"] = (features["horse"]
-                      .str.lower()
-                      .map(lambda x: res_map.get(features.loc[features["horse"] == x, "race_no"].iloc[0], {}).get(x, 99))
-                      .fillna(99)
-                      .astype(int))
-    
-    # Perform walkforward validation
-    folds = split_data_by_date(features, n_folds=n_folds)
-    
-    fold_results = []
-    for i, (train_df, val_df) in enumerate(folds):
-        print(f"Processing fold {i+1}/{len(folds)}")
-        print(f"  Train: {len(train_df)} entries, {train_df['race_no'].nunique()} races")
-        print(f"  Validation: {len(val_df)} entries, {val_df['race_no'].nunique()} races")
-        
-        metrics = evaluate_fold(val_df)
-        metrics["fold"] = i + 1
-        fold_results.append(metrics)
-        
+    # Race tensor of features and positions, built once and memory-mapped
+    tensor = cached_race_tensor(features_file, results_file)
+    folds = expanding_folds(tensor["race_date"], n_folds=n_folds)
+    tasks = [(tensor["path"], i + 1, start, stop, "p_opening") for i, (start, stop) in enumerate(folds)]
+    if not tasks:
+        raise ValueError(f"Need at least 2 date blocks with races, got {len(tensor['offsets'])} races")
+    
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    start = time.perf_counter()
+    if workers == 1:
+        fold_results = [run_fold(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fold_results = list(pool.map(run_fold, tasks))
+    elapsed = time.perf_counter() - start
+    
+    for metrics in fold_results:
+        print(f"Fold {metrics['fold']}/{len(tasks)}")
+        print(f"  Train: {metrics['train_entries']} entries, {metrics['train_races']} races")
+        print(f"  Validation: {metrics['val_entries']} entries, {metrics['val_races']} races")
+        print(f"  Fitted alpha={metrics['alpha']:.3f}, beta={metrics['beta']:.3f}")
         print(f"  Logloss: {metrics['logloss']:.3f}")
         print(f"  Hit Rate: {metrics['hit_rate']*100:.1f}%")
         print(f"  ROI: {metrics['roi']*100:.2f}%")
+        peak = "peak memory" if metrics["peak_is_fold"] else "process peak memory"
+        print(f"  Time: {metrics['seconds']:.2f}s, {peak} {metrics['peak_mb']:.0f} MB")
         print()
     
     # Aggregate results
@@ -187,6 +232,8 @@ def walkforward_backtest(features_file: str,
     print(f"Average Logloss: {results_df['logloss'].mean():.3f} ± {results_df['logloss'].std():.3f}")
     print(f"Average Hit Rate: {results_df['hit_rate'].mean()*100:.1f}% ± {results_df['hit_rate'].std()*100:.1f}%")
     print(f"Average ROI: {results_df['roi'].mean()*100:.2f}% ± {results_df['roi'].std()*100:.2f}%")
+    print(f"{len(tasks)} folds on {workers} workers in {elapsed:.2f}s "
+          f"(sum of fold times {results_df['seconds'].sum():.2f}s)")
     
     # Save results
     results_df.to_csv(output_file, index=False)
@@ -195,16 +242,17 @@ def walkforward_backtest(features_file: str,
 def main():
     """Main function to run walkforward backtesting."""
     if len(sys.argv) < 4:
-        print("Usage: python walkforward.py <features_parquet> <results_json> <output_csv> [n_folds]")
+        print("Usage: python walkforward.py <features_parquet> <results_json> <output_csv> [n_folds] [workers]")
         sys.exit(1)
     
     features_file = sys.argv[1]
     results_file = sys.argv[2]
     output_file = sys.argv[3]
     n_folds = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else None
     
     try:
-        walkforward_backtest(features_file, results_file, output_file, n_folds)
+        walkforward_backtest(features_file, results_file, output_file, n_folds, workers)
     except Exception as e:
         print(f"Error during walkforward backtesting: {e}")
         sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark bronze storage formats.
+Parses synthetic meeting text once, writes card, odds and results as JSON,
+Parquet and Arrow IPC, and reports file size, write time, read time and the
+time to build features from each format.
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.tokenizer import MEETING_DOCUMENTS, parse_meeting
+from india.ingestion.bronze_store import BRONZE_FORMATS, bronze_path, read_bronze, write_bronze
+from india.features.make_features_india import build_features
+from india.benchmarks.bench_ingestion import write_meeting_text
+
+def main():
+    """Run the benchmark for the requested number of races."""
+    n_races = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        write_meeting_text(tmp, n_races)
+        parsed = {doc: [] for doc in MEETING_DOCUMENTS}
+        for doc, record in parse_meeting(tmp):
+            parsed[doc].append(record)
+        
+        print(f"Bronze formats for {n_races:,} races")
+        print(f"  {'format':<8} {'size MB':>8} {'write s':>8} {'read s':>8} {'features s':>11}")
+        for fmt in BRONZE_FORMATS:
+            paths = {doc: bronze_path(tmp, "bench", doc, fmt) for doc in MEETING_DOCUMENTS}
+            
+            start = time.perf_counter()
+            for doc, records in parsed.items():
+                write_bronze(records, doc, paths[doc])
+            write_s = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            for doc, path in paths.items():
+                read_bronze(path, doc)
+            read_s = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            build_features(str(paths["card"]), str(paths["odds"]))
+            features_s = time.perf_counter() - start
+            
+            size = sum(p.stat().st_size for p in paths.values()) / 1e6
+            print(f"  {fmt:<8} {size:8.1f} {write_s:8.2f} {read_s:8.2f} {features_s:11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark the conditional logit fitter.
+Draws winners from a known Benter combination and times the fits of the
+second-stage weights and of a fundamental model.
+"""
+
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.clogit import fit_benter, fit_fundamental, segment_softmax
+from india.model.combiner_india import combine, market_and_prior, race_segments
+
+def draw_winners(df, alpha: float, beta: float, seed: int = 1) -> np.ndarray:
+    """Positions with one winner per race drawn from ppri^alpha * pmkt^beta."""
+    rng = np.random.default_rng(seed)
+    order, offsets = race_segments(df)
+    pmkt, ppri = market_and_prior(df, order, offsets)
+    p, _ = segment_softmax(np.log(combine(ppri, pmkt, alpha, beta)), offsets)
+    counts = np.diff(np.r_[offsets, len(df)])
+    # Inverse-CDF draw per race on the cumulative probabilities
+    cum = np.cumsum(p)
+    before = np.r_[0.0, cum][offsets]
+    u = before + rng.random(len(offsets)) * (cum[offsets + counts - 1] - before)
+    winner = np.minimum(np.searchsorted(cum, u), offsets + counts - 1)
+    pos = np.full(len(df), 2)
+    pos[winner] = 1
+    out = np.empty(len(df), dtype=int)
+    out[order] = pos
+    return out
+
+def main():
+    """Run the benchmark for the requested number of runners."""
+    n_runners = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    
+    df = make_features_frame(n_runners)
+    df["pos"] = draw_winners(df, alpha=0.3, beta=0.9)
+    print(f"Conditional logit on {len(df):,} runners")
+    
+    start = time.perf_counter()
+    fit = fit_benter(df)
+    elapsed = time.perf_counter() - start
+    print(f"  benter       {elapsed:6.3f}s  alpha={fit['alpha']:.3f} beta={fit['beta']:.3f} "
+          f"(true 0.3, 0.9) iterations={fit['n_iter']}")
+    
+    features = ["rating", "weight_kg", "age", "dist_m"]
+    start = time.perf_counter()
+    fit = fit_fundamental(df, features)
+    elapsed = time.perf_counter() - start
+    print(f"  fundamental  {elapsed:6.3f}s  {len(features)} features iterations={fit['n_iter']}")
+
+if __name__ == "__main__":
+    main()
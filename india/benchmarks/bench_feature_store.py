@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark building race tensors from a multi-year silver dataset.
+Compares peak memory of loading the whole dataset into pandas with
+streaming it through the memory-mapped feature store, each in a fresh
+process, and shows the store's peak staying flat as history grows.
+"""
+
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.features.silver_store import write_meeting_features
+
+def write_dataset(root: pathlib.Path, n_runners: int) -> int:
+    """Write a synthetic frame into the dataset, one file per meeting."""
+    features = make_features_frame(n_runners)
+    # A population of 30,000 horses with careers of many runs, rather than
+    # one name per runner
+    features["horse"] = "HORSE " + (features.index % 30_000).astype(str)
+    for meeting, group in features.groupby("meeting", sort=False):
+        write_meeting_features(group.drop(columns=["pos"]), meeting, root)
+    return len(features)
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process in MB.
+    
+    ru_maxrss is inherited from the parent across fork and exec, so the
+    per-process VmHWM is used where /proc has it.
+    """
+    status = pathlib.Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(mode: str, root: str, cache_dir: str) -> None:
+    """Build a tensor one way and print seconds and peak RSS in MB."""
+    start = time.perf_counter()
+    if mode == "pandas":
+        from india.features.race_tensor import build_race_tensor
+        from india.features.silver_store import load_features
+        tensor = build_race_tensor(load_features(root))
+    else:
+        from india.features.race_tensor import cached_race_tensor
+        tensor = cached_race_tensor(root, cache_dir=cache_dir)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    print(f"{elapsed:.3f} {peak:.0f} {len(tensor['horse'])}")
+
+def run(mode: str, root: pathlib.Path, cache_dir: pathlib.Path):
+    """Run `measure` in a fresh interpreter."""
+    out = subprocess.run([sys.executable, __file__, "--measure", mode, str(root), str(cache_dir)],
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), float(out[1])
+
+def main():
+    """Time tensor builds for growing datasets."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        measure(*sys.argv[2:5])
+        return
+    
+    sizes = [int(s) for s in sys.argv[1:]] or [100_000, 400_000, 1_600_000]
+    print(f"{'runners':>10} {'pandas s':>9} {'pandas MB':>10} {'store s':>8} {'store MB':>9} {'cached s':>9} {'cached MB':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = pathlib.Path(tmp) / "features"
+            n = write_dataset(root, size)
+            cache_dir = pathlib.Path(tmp) / "tensors"
+            pandas_s, pandas_mb = run("pandas", root, cache_dir)
+            store_s, store_mb = run("store", root, cache_dir)
+            cached_s, cached_mb = run("store", root, cache_dir)
+            print(f"{n:>10,} {pandas_s:>9.2f} {pandas_mb:>10.0f} {store_s:>8.2f} {store_mb:>9.0f} "
+                  f"{cached_s:>9.3f} {cached_mb:>10.0f}")
+
+if __name__ == "__main__":
+    main()
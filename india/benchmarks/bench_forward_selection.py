@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark AIC forward selection over clogit candidates.
+Adds random candidate features to a synthetic frame, a few of which drive
+the winner, and times the selection serially and across a process pool.
+"""
+
+import os
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.clogit import segment_softmax
+from india.model.combiner_india import race_segments
+from india.model.forward_selection import forward_select
+
+def main():
+    """Run the benchmark for the requested runners and candidate features."""
+    n_runners = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_features = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    
+    rng = np.random.default_rng(3)
+    df = make_features_frame(n_runners)
+    features = [f"f{i:02d}" for i in range(n_features)]
+    X = rng.normal(size=(len(df), n_features))
+    for i, name in enumerate(features):
+        df[name] = X[:, i]
+    
+    # Winners driven by the first five features
+    order, offsets = race_segments(df)
+    true_coef = np.zeros(n_features)
+    true_coef[:5] = [0.8, -0.6, 0.4, 0.3, -0.2]
+    p, _ = segment_softmax((X @ true_coef)[order], offsets)
+    counts = np.diff(np.r_[offsets, len(df)])
+    cum = np.cumsum(p)
+    before = np.r_[0.0, cum][offsets]
+    u = before + rng.random(len(offsets)) * (cum[offsets + counts - 1] - before)
+    winner = order[np.minimum(np.searchsorted(cum, u), offsets + counts - 1)]
+    df["pos"] = 2
+    df.loc[winner, "pos"] = 1
+    
+    print(f"Forward selection on {len(df):,} runners, {n_features} candidates")
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        result = forward_select(df, features, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"  workers={workers:<3} {elapsed:7.2f}s  selected={result['selected']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming ingestion throughput.
+Writes synthetic racecard, odds and results text for many meetings and
+reports MB/s for each document type.
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.tokenizer import MEETING_DOCUMENTS, parse_meeting
+
+ODDS = ["2/1", "5/2", "3/1", "7/2", "4/1", "9/2", "5/1", "6/1", "8/1", "10/1"]
+
+def letters(i: int) -> str:
+    """Spell a number in capital letters, since horse names have no digits."""
+    out = ""
+    while True:
+        i, r = divmod(i, 26)
+        out = chr(65 + r) + out
+        if i == 0:
+            return out
+
+def write_meeting_text(txt_dir: pathlib.Path, n_races: int) -> None:
+    """Write converted-text files shaped like the sample meeting."""
+    card, odds, results = [], [], []
+    for r in range(1, n_races + 1):
+        header = f"THE SYNTHETIC PLATE {r} ({1000 + 200 * (r % 6)}m) Rated 20-45 Terms"
+        card += ["", header, ""]
+        odds += ["", header, ""]
+        results += ["", f"RACE {r}: {header}", ""]
+        for h in range(1, 10):
+            name = f"HORSE {letters(h)} {letters(r)}"
+            card.append(f"{h}  {name}, {3 + h % 4}y R-{20 + h} {52 + h % 6}.5")
+            odds.append(f"{h}  {name}  {ODDS[h % 10]}  {ODDS[(h + 1) % 10]}  {ODDS[(h + 2) % 10]}")
+            results.append(f"{h}{'st' if h == 1 else 'th'} : {name}")
+    
+    for doc, lines in (("card", card), ("odds", odds), ("results", results)):
+        (txt_dir / f"{MEETING_DOCUMENTS[doc]}.txt").write_text("\n".join(lines) + "\n")
+
+def main():
+    """Run the benchmark for the requested number of races."""
+    n_races = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        txt_dir = pathlib.Path(tmp)
+        write_meeting_text(txt_dir, n_races)
+        sizes = {doc: (txt_dir / f"{stem}.txt").stat().st_size
+                 for doc, stem in MEETING_DOCUMENTS.items()}
+        
+        counts = Counter()
+        elapsed = Counter()
+        start = time.perf_counter()
+        for doc, _ in parse_meeting(txt_dir):
+            now = time.perf_counter()
+            elapsed[doc] += now - start
+            counts[doc] += 1
+            start = now
+    
+    print(f"Streaming ingestion of {n_races:,} races")
+    for doc in MEETING_DOCUMENTS:
+        mb = sizes[doc] / 1e6
+        print(f"  {doc:<8} {mb:7.1f} MB {elapsed[doc]:6.2f}s {mb / elapsed[doc]:7.1f} MB/s  records={counts[doc]:,}")
+    total_mb = sum(sizes.values()) / 1e6
+    total_s = sum(elapsed.values())
+    print(f"  {'total':<8} {total_mb:7.1f} MB {total_s:6.2f}s {total_mb / total_s:7.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized Kelly staking modes.
+Times single, fractional and simultaneous Kelly on a large backtest frame.
+"""
+
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.combiner_india import KELLY_MODES, calculate_kelly_stakes, posterior_batch
+
+def main():
+    """Run the benchmark for the requested number of runners."""
+    n_runners = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    
+    df = posterior_batch(make_features_frame(n_runners))
+    print(f"Kelly staking on {len(df):,} runners")
+    
+    for mode in KELLY_MODES:
+        start = time.perf_counter()
+        out = calculate_kelly_stakes(df, mode=mode)
+        elapsed = time.perf_counter() - start
+        print(f"  {mode:<13} {elapsed:6.3f}s  bets={int((out['kelly_stake'] > 0).sum()):,}")
+
+if __name__ == "__main__":
+    main()
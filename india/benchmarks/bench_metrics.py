@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark the metrics engine on a synthetic ten-year replay.
+Compares per-race groupby/apply with the one-pass engine on the replay
+frame and on a race tensor, and checks they agree.
+"""
+
+import pathlib
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.combiner_india import posterior_batch, calculate_kelly_stakes, posterior_tensor, kelly_stakes
+from india.features.race_tensor import build_race_tensor
+from india.backtest.metrics import (calculate_logloss, calculate_roi, calculate_calibration,
+                                    frame_metrics, grouped_metrics, tensor_labels)
+
+def main():
+    """Time metrics over ten years of daily meetings (about 290,000 runners)."""
+    n_runners = int(sys.argv[1]) if len(sys.argv) > 1 else 292_000
+    df = calculate_kelly_stakes(posterior_batch(make_features_frame(n_runners), use="p_opening"))
+    
+    start = time.perf_counter()
+    races = df.groupby(["meeting", "race_no"])
+    logloss = races.apply(calculate_logloss).mean()
+    roi = races.apply(calculate_roi).mean()
+    for dist in sorted(df["dist_m"].unique()):
+        dist_data = df[df["dist_m"] == dist]
+        (dist_data.sort_values("p_posterior", ascending=False)
+         .groupby(["meeting", "race_no"]).head(1)["pos"] == 1).mean()
+    calculate_calibration(df)
+    apply_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    metrics = frame_metrics(df)
+    frame_s = time.perf_counter() - start
+    assert np.isclose(metrics["overall"]["logloss"], logloss)
+    assert np.isclose(metrics["overall"]["roi"], roi)
+    
+    tensor = build_race_tensor(df)
+    post = posterior_tensor(tensor, use="p_opening")
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], tensor["offsets"])
+    start = time.perf_counter()
+    grouped_metrics(post["p_posterior"], tensor["pos"], tensor["offsets"], stake,
+                    post["p_market"], tensor_labels(tensor))
+    tensor_s = time.perf_counter() - start
+    
+    print(f"{len(df):,} runners, {metrics['overall']['races']:,} races, "
+          + ", ".join(f"{len(metrics[g])} {g}" for g in ("meeting", "dist_m", "venue", "month")))
+    print(f"groupby/apply: {apply_s:.2f}s; engine on frame: {frame_s:.3f}s; on tensor: {tensor_s:.3f}s")
+
+if __name__ == "__main__":
+    main()
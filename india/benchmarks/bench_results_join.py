@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark the results join used by replay, walkforward and the web app.
+Shows time per runner staying flat as the number of runners grows.
+"""
+
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.backtest.results_join import attach_positions, results_frame
+
+def make_results(features):
+    """Build parsed-results records for the synthetic frame."""
+    results = []
+    for (meeting, rno), g in features.groupby(["meeting", "race_no"], sort=False):
+        results.append({
+            "meeting": meeting,
+            "race_no": rno,
+            "placings": [{"pos": int(p), "horse": h} for p, h in zip(g["pos"], g["horse"]) if p <= 4]
+        })
+    return results
+
+def main():
+    """Time the join for 10^3 .. 10^6 runners."""
+    max_exp = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    
+    print(f"{'runners':>10} {'seconds':>9} {'us/runner':>10}")
+    for exp in range(3, max_exp + 1):
+        features = make_features_frame(10 ** exp)
+        placed = features.drop(columns="pos")
+        records = make_results(features)
+        
+        start = time.perf_counter()
+        results = results_frame(records)
+        out = attach_positions(placed, results)
+        elapsed = time.perf_counter() - start
+        
+        assert (out["pos"] == features["pos"].where(features["pos"] <= 4, 99)).all()
+        print(f"{len(features):>10,} {elapsed:>9.3f} {elapsed / len(features) * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the parameter sweep on a synthetic race tensor.
+Times the settings' grid evaluated in batches against evaluating
+parameter sets one at a time (on the tensor, and through the pandas replay
+path), and checks the default parameters give the same metrics as the
+walkforward's evaluation.
+"""
+
+import pathlib
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.features.race_tensor import build_race_tensor, tensor_column
+from india.model.combiner_india import (posterior_tensor, kelly_stakes, prior_vector,
+                                        posterior_batch, calculate_kelly_stakes)
+from india.backtest.metrics import tensor_metrics, frame_metrics
+from india.backtest.walkforward import evaluate_races
+from india.backtest.sweep import (load_settings, parameter_grid, evaluate_grid, rank_grid,
+                                  MODEL_PARAMS, STAKE_PARAMS)
+
+def one_at_a_time(tensor, row):
+    """Metrics of one parameter set through the per-set tensor functions."""
+    prior = prior_vector(*(tensor_column(tensor, c) for c in ("rating", "dist_m", "weight_kg", "age")),
+                         params={k: row[k] for k in MODEL_PARAMS[:6]})
+    post = posterior_tensor(tensor, alpha=row["alpha"], beta=row["beta"], prior=prior)
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], tensor["offsets"],
+                         *(row[k] for k in STAKE_PARAMS))
+    return tensor_metrics(post["p_posterior"], tensor["pos"], tensor["offsets"], stake, post["p_market"])
+
+def main():
+    """Sweep the settings' grid over 10,000 races (about 100,000 runners)."""
+    n_runners = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    features = make_features_frame(n_runners)
+    tensor = build_race_tensor(features)
+    settings = load_settings()
+    grid = parameter_grid(settings)
+    
+    start = time.perf_counter()
+    results = evaluate_grid(tensor, grid)
+    batched_s = time.perf_counter() - start
+    
+    sample = grid.sample(20, random_state=0)
+    start = time.perf_counter()
+    single = [one_at_a_time(tensor, row) for _, row in sample.iterrows()]
+    single_s = (time.perf_counter() - start) / len(sample)
+    for (i, _), metrics in zip(sample.iterrows(), single):
+        for key in ("logloss", "hit_rate", "roi"):
+            assert np.isclose(results.loc[i, key], metrics[key]), (key, results.loc[i, key], metrics[key])
+    
+    start = time.perf_counter()
+    for _ in range(3):
+        frame_metrics(calculate_kelly_stakes(posterior_batch(features, use="p_opening")))
+    replay_s = (time.perf_counter() - start) / 3
+    
+    default = evaluate_grid(tensor, parameter_grid(settings, grid={})).iloc[0]
+    reference = evaluate_races(tensor)
+    assert all(np.isclose(default[k], reference[k]) for k in ("logloss", "hit_rate", "roi"))
+    
+    print(f"{len(grid):,} parameter sets, {len(tensor['offsets']):,} races, {len(tensor['horse']):,} runners")
+    print(f"Replay path: {replay_s * 1e3:.0f} ms per set; tensor one at a time: {single_s * 1e3:.1f} ms per set; "
+          f"batched: {batched_s:.2f}s, {batched_s / len(grid) * 1e3:.2f} ms per set")
+    print(rank_grid(results).head(5).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
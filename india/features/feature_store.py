@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped columnar store of silver features for multi-year backtests.
+Meetings are streamed one at a time into one .npy file per column, with the
+meeting, race_name and horse columns dictionary-encoded against name tables
+that are .npy files too, so building and opening a store needs memory for
+one meeting rather than for the whole history.
+"""
+
+import json
+import pathlib
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.features.silver_store import FEATURE_SCHEMA, PARTITION_SCHEMA
+from india.backtest.results_join import attach_positions, meeting_results, results_files, results_source
+from india.manifest import bytes_digest, file_digest
+
+# Bump when the on-disk layout changes
+STORE_VERSION = 1
+
+# Columns stored as int32 codes into a '<column>_names' table
+DICTIONARY_COLUMNS = ("meeting", "race_name", "horse")
+
+# Directory layout of the dataset's partition columns
+PARTITIONING = ds.HivePartitioning(PARTITION_SCHEMA)
+
+# Runners per batch of meetings joined with their results at once
+BATCH_ROWS = 1 << 18
+
+# Stored columns and their dtypes (FEATURE_SCHEMA plus pos from results)
+STORE_DTYPES = {
+    "meeting": np.int32,
+    "meeting_date": "datetime64[D]",
+    "race_no": np.int16,
+    "race_name": np.int32,
+    "dist_m": np.int32,
+    "horse": np.int32,
+    "age": np.int8,
+    "rating": np.int16,
+    "weight_kg": np.float64,
+    "p_night": np.float32,
+    "p_morning": np.float32,
+    "p_opening": np.float32,
+    "pos": np.int16,
+}
+
+def legacy_meeting_id(path: pathlib.Path) -> str:
+    """Meeting id of a legacy '<meeting>-features.parquet' file."""
+    name = pathlib.Path(path).name
+    suffix = "-features.parquet"
+    return name[:-len(suffix)] if name.endswith(suffix) else pathlib.Path(path).stem
+
+def meeting_files(root: pathlib.Path) -> List[Tuple[str, pathlib.Path]]:
+    """
+    Meeting files of a dataset in meeting id (and so date) order.
+    
+    Files are listed and read directly: an Arrow dataset scan keeps state
+    for every fragment it has read, which grows with the history, and
+    costs more per file than `ParquetFile.read` on small meeting files.
+    
+    Args:
+        root: Dataset root directory
+        
+    Returns:
+        List of (meeting id, file)
+    """
+    files = [p for p in pathlib.Path(root).rglob("*.parquet") if not p.name.startswith((".", "_"))]
+    return sorted((p.stem, p) for p in files)
+
+def read_meeting_file(path: pathlib.Path, root: pathlib.Path) -> pa.Table:
+    """
+    Read one meeting file with the partition columns of its directory.
+    
+    Args:
+        path: Meeting file
+        root: Dataset root directory
+        
+    Returns:
+        Table with the columns `read_features` would give for the meeting
+    """
+    table = pq.ParquetFile(path).read(use_threads=False)
+    keys = ds.get_partition_keys(PARTITIONING.parse(path.relative_to(root).as_posix()))
+    for field in PARTITION_SCHEMA:
+        table = table.append_column(field, pa.array([keys.get(field.name)] * table.num_rows, field.type))
+    return table
+
+def meeting_features(features_path: str) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Read features one meeting at a time, in meeting id (and so date) order.
+    
+    A dataset is read file by file; a single Parquet file is read whole and
+    split by its meeting column, or taken as one meeting named after the file.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+    
+    Yields:
+        Tuples of (meeting id, features of that meeting in file order)
+    """
+    path = pathlib.Path(features_path)
+    if path.is_dir():
+        for meeting, file in meeting_files(path):
+            yield meeting, read_meeting_file(file, path).to_pandas()
+        return
+    
+    features = pd.read_parquet(path)
+    if "meeting" not in features.columns:
+        yield legacy_meeting_id(path), features
+        return
+    for meeting, group in features.groupby(features["meeting"].astype(str), sort=True, observed=True):
+        yield meeting, group
+
+def iter_meetings(features_path: str,
+                  results_file: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame, Optional[pd.DataFrame]]]:
+    """
+    Stream meetings together with their keyed results.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+        results_file: Optional results file, or bronze directory whose
+            '<meeting>-results' files are read as their meetings come up
+    
+    Yields:
+        Tuples of (meeting id, features, results as returned by
+        `keyed_results`, or None without a results file)
+    """
+    source = results_source(results_file)
+    for meeting, features in meeting_features(features_path):
+        yield meeting, features, meeting_results(source, [meeting])
+
+def feature_batches(features_path: str) -> Iterator[Tuple[List[str], pd.DataFrame]]:
+    """
+    Read features in batches of whole meetings of about BATCH_ROWS runners.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+    
+    Yields:
+        Tuples of (meeting ids, features of those meetings), in meeting id
+        order and race order within a meeting, with `meeting` set to the id
+    """
+    path = pathlib.Path(features_path)
+    if not path.is_dir():
+        meetings, frames = [], []
+        for meeting, features in meeting_features(path):
+            meetings.append(meeting)
+            frames.append(features.sort_values("race_no", kind="stable").assign(meeting=meeting))
+        if frames:
+            yield meetings, pd.concat(frames, ignore_index=True)
+        return
+    
+    files = meeting_files(path)
+    meetings, tables, rows = [], [], 0
+    for i, (meeting, file) in enumerate(files):
+        table = pq.ParquetFile(file).read(columns=FEATURE_SCHEMA.names, use_threads=False)
+        meetings.append(meeting)
+        tables.append(table)
+        rows += table.num_rows
+        if rows >= BATCH_ROWS or i == len(files) - 1:
+            df = pa.concat_tables(tables).to_pandas()
+            which = np.repeat(np.arange(len(tables)), [t.num_rows for t in tables])
+            df["meeting"] = np.asarray(meetings, dtype=object)[which]
+            order = np.lexsort((df["race_no"].to_numpy(), which))
+            yield meetings, df.iloc[order].reset_index(drop=True)
+            meetings, tables, rows = [], [], 0
+
+def feature_row_count(features_path: str) -> int:
+    """Number of runners in a features file or dataset, from Parquet metadata."""
+    path = pathlib.Path(features_path)
+    if path.is_dir():
+        return sum(pq.read_metadata(file).num_rows for _, file in meeting_files(path))
+    return pq.read_metadata(path).num_rows
+
+def _file_stats(files: Iterable[pathlib.Path], root: pathlib.Path) -> List[str]:
+    """Relative path, size and mtime of data files, for `features_digest`."""
+    return [f"{p.relative_to(root)}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in sorted(files)]
+
+def features_digest(features_path: pathlib.Path, results_file: Optional[pathlib.Path] = None) -> str:
+    """
+    Digest of a features file or dataset (and results), for cache keys.
+    
+    Files in a directory are identified by path, size and mtime, which is
+    enough because meeting files are only ever replaced whole. Only the
+    files that are read count: stage manifests and other files written
+    next to them do not change the digest.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+        results_file: Optional results file or bronze directory
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    parts = []
+    features_path = pathlib.Path(features_path)
+    if features_path.is_dir():
+        parts += _file_stats((f for _, f in meeting_files(features_path)), features_path)
+    else:
+        parts.append(file_digest(features_path)["sha256"] or "")
+    if results_file is not None:
+        results_file = pathlib.Path(results_file)
+        if results_file.is_dir():
+            parts += _file_stats(results_files(results_file).values(), results_file)
+        else:
+            parts.append(file_digest(results_file)["sha256"] or "")
+    return bytes_digest("\n".join(parts).encode())
+
+def remove_stale_caches(cache_dir: pathlib.Path, stem: str, keep: pathlib.Path) -> None:
+    """
+    Delete the cache directories of earlier digests of the same input.
+    
+    Args:
+        cache_dir: Directory of '<stem>-<digest[:16]>' caches
+        stem: Name of the features file or dataset
+        keep: The current cache directory
+    """
+    prefix = f"{stem}-"
+    for path in pathlib.Path(cache_dir).glob(f"{prefix}*"):
+        # Only '<stem>-<16 hex digits>', not the caches of e.g. '<stem>-2024'
+        digest = path.name[len(prefix):]
+        if len(digest) != 16 or digest.strip("0123456789abcdef") or path == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+def column_writer(path: pathlib.Path, dtype: Any, shape: Tuple[int, ...]) -> BinaryIO:
+    """
+    Open a .npy file of the given shape to be filled by appending rows.
+    
+    Appending keeps written data out of the process's memory, which a
+    writable memory map would not.
+    
+    Args:
+        path: File to create
+        dtype: Array dtype
+        shape: Array shape
+        
+    Returns:
+        Binary file positioned after the header
+    """
+    f = open(path, "wb")
+    header = np.lib.format.header_data_from_array_1_0(np.empty(0, dtype=dtype))
+    header["shape"] = tuple(shape)
+    np.lib.format.write_array_header_1_0(f, header)
+    return f
+
+def encode_names(values: pd.Series, table: Dict[str, int]) -> np.ndarray:
+    """
+    Dictionary-encode names against a growing name table.
+    
+    Args:
+        values: Names of one meeting
+        table: Name -> code mapping, extended with new names
+    
+    Returns:
+        int32 codes
+    """
+    codes, uniques = pd.factorize(values.astype(str))
+    lookup = np.array([table.setdefault(name, len(table)) for name in uniques], dtype=np.int32)
+    return lookup[codes]
+
+def meeting_dates(df: pd.DataFrame) -> np.ndarray:
+    """Meeting date per runner, taken from the meeting id when not stored."""
+    if "meeting_date" in df.columns:
+        dates = pd.to_datetime(df["meeting_date"])
+    else:
+        dates = pd.to_datetime(df["meeting"].astype(str).str[:10], errors="coerce")
+    return dates.to_numpy().astype("datetime64[D]")
+
+def _write_batch(df: pd.DataFrame,
+                 results: Optional[pd.DataFrame],
+                 writers: Dict[str, BinaryIO],
+                 tables: Dict[str, Dict[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Join a batch of meetings with their results and append it to the store.
+    
+    Returns:
+        Tuple of (meeting codes, start of every race) within the batch
+    """
+    if results is not None:
+        df = attach_positions(df, results)
+    
+    for c, f in writers.items():
+        if c in DICTIONARY_COLUMNS:
+            values = encode_names(df[c], tables[c])
+        elif c == "meeting_date":
+            values = meeting_dates(df)
+        else:
+            values = df[c].to_numpy()
+        np.asarray(values, dtype=STORE_DTYPES[c]).tofile(f)
+        if c == "meeting":
+            meeting = values
+    
+    if len(df) == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+    race_no = df["race_no"].to_numpy()
+    new_race = np.r_[True, (meeting[1:] != meeting[:-1]) | (race_no[1:] != race_no[:-1])]
+    return meeting, np.flatnonzero(new_race)
+
+def build_feature_store(features_path: str,
+                        directory: pathlib.Path,
+                        results_file: Optional[str] = None,
+                        source: str = "") -> None:
+    """
+    Stream features (and positions) into a columnar store, atomically.
+    
+    Runners are stored meeting by meeting in meeting id order and race by
+    race within a meeting, keeping the file order of each race. Meetings
+    are read and joined with their results in batches of about BATCH_ROWS
+    runners, which bounds the memory used.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+        directory: Output directory (replaced)
+        results_file: Optional results file or bronze directory; adds `pos`
+        source: Digest of the inputs the store is built from
+    """
+    directory = pathlib.Path(directory)
+    tmp = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    
+    columns = [c for c in STORE_DTYPES if c != "pos" or results_file is not None]
+    n = feature_row_count(features_path)
+    writers = {c: column_writer(tmp / f"{c}.npy", STORE_DTYPES[c], (n,)) for c in columns}
+    tables = {c: {} for c in DICTIONARY_COLUMNS}
+    
+    results = results_source(results_file)
+    race_offsets, meeting_offsets = [], []
+    row = 0
+    try:
+        for meetings, df in feature_batches(features_path):
+            # Every meeting gets a code in id order, even without runners
+            codes = encode_names(pd.Series(meetings), tables["meeting"])
+            meeting, races = _write_batch(df, meeting_results(results, meetings), writers, tables)
+            race_offsets.append(row + races)
+            meeting_offsets.append(row + np.searchsorted(meeting, codes))
+            row += len(df)
+    finally:
+        for f in writers.values():
+            f.close()
+    
+    if row != n:
+        raise ValueError(f"Read {row} runners but the Parquet metadata lists {n}")
+    
+    for c, table in tables.items():
+        np.save(tmp / f"{c}_names.npy", np.array(list(table), dtype=str))
+    offsets = np.concatenate(race_offsets) if race_offsets else np.zeros(0)
+    np.save(tmp / "race_offsets.npy", offsets.astype(np.int32))
+    offsets = np.concatenate(meeting_offsets) if meeting_offsets else np.zeros(0)
+    np.save(tmp / "meeting_offsets.npy", offsets.astype(np.int32))
+    meta = {"version": STORE_VERSION, "source": source, "n_rows": n, "columns": columns}
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp.replace(directory)
+
+def open_feature_store(directory: pathlib.Path, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Open a store written by `build_feature_store`.
+    
+    Args:
+        directory: Store directory
+        mmap: Memory-map the arrays instead of reading them
+    
+    Returns:
+        Dictionary with meta.json entries, the store path, one read-only
+        array per column, '<column>_names' tables, race_offsets and
+        meeting_offsets
+    """
+    directory = pathlib.Path(directory)
+    store = json.loads((directory / "meta.json").read_text())
+    store["path"] = str(directory)
+    mode = "r" if mmap else None
+    for path in directory.glob("*.npy"):
+        store[path.stem] = np.load(path, mmap_mode=mode)
+    return store
+
+def cached_feature_store(features_path: str,
+                         results_file: Optional[str] = None,
+                         cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Open the store of a features file or dataset, building it on first use.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+        results_file: Optional results file or bronze directory
+        cache_dir: Directory holding cached stores (default: `store` next to
+            the features)
+    
+    Returns:
+        Memory-mapped feature store
+    """
+    features_path = pathlib.Path(features_path)
+    cache_dir = pathlib.Path(cache_dir) if cache_dir else features_path.parent / "store"
+    source = features_digest(features_path, results_file)
+    directory = cache_dir / f"{features_path.stem}-{source[:16]}"
+    
+    try:
+        store = open_feature_store(directory)
+        if store.get("version") == STORE_VERSION and store.get("source") == source:
+            return store
+    except FileNotFoundError:
+        pass
+    
+    build_feature_store(str(features_path), directory, results_file, source)
+    remove_stale_caches(cache_dir, features_path.stem, directory)
+    return open_feature_store(directory)
+
+def meeting_rows(store: Dict[str, Any], meeting: str) -> Tuple[int, int]:
+    """
+    Row range of one meeting.
+    
+    Args:
+        store: Feature store
+        meeting: Meeting id
+    
+    Returns:
+        Tuple of (start, stop); (0, 0) for an unknown meeting
+    """
+    names = store["meeting_names"]
+    i = int(np.searchsorted(names, meeting))
+    if i == len(names) or names[i] != meeting:
+        return 0, 0
+    offsets = store["meeting_offsets"]
+    stop = int(offsets[i + 1]) if i + 1 < len(offsets) else store["n_rows"]
+    return int(offsets[i]), stop
+
+def store_frame(store: Dict[str, Any],
+                start: int = 0,
+                stop: Optional[int] = None,
+                columns: Optional[list] = None) -> pd.DataFrame:
+    """
+    Decode a row range of the store into a DataFrame.
+    
+    Args:
+        store: Feature store
+        start: First row
+        stop: One past the last row (default: end of the store)
+        columns: Columns to decode (default: all stored columns)
+    
+    Returns:
+        DataFrame with categorical meeting, race_name and horse columns
+        whose categories are the names used in the range
+    """
+    data = {}
+    for c in columns or store["columns"]:
+        values = np.asarray(store[c][start:stop])
+        if c in DICTIONARY_COLUMNS:
+            used, codes = np.unique(values, return_inverse=True)
+            values = pd.Categorical.from_codes(codes, categories=store[f"{c}_names"][used])
+        data[c] = values
+    return pd.DataFrame(data)
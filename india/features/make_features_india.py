@@ -4,13 +4,20 @@ Combine race card and odds data to create features for Indian racing.
 Merges horse information with market probabilities.
 """
 
-import json
+import functools
 import sys
 import pathlib
+import numpy as np
 import pandas as pd
 import re
-from typing import Dict, Any
+from typing import Dict, Optional, Tuple
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.bronze_store import read_bronze
+from india.features.name_matching import reconcile_keys
+
+@functools.lru_cache(maxsize=65536)
 def normalize_horse_name(s: str) -> str:
     """
     Normalize horse name for matching between datasets.
@@ -23,54 +30,149 @@ def normalize_horse_name(s: str) -> str:
     """
     return "".join(ch for ch in s.lower() if ch.isalnum())
 
-def create_features(card_file: str, odds_file: str, output_file: str) -> None:
+def normalize_horse_names(names: pd.Series) -> pd.Series:
     """
-    Create features by combining race card and odds data.
+    Vectorized `normalize_horse_name` over a Series of names.
+    
+    Each distinct name is normalized once, so repeated runners cost an
+    array lookup.
     
     Args:
-        card_file: Path to race card JSON file
-        odds_file: Path to odds JSON file
-        output_file: Path to output Parquet file
+        names: Horse name strings
+        
+    Returns:
+        Normalized names (lowercase, alphanumeric only), NaN for missing names
+    """
+    # Missing names factorize to code -1 rather than to the string 'nan'
+    codes, uniques = pd.factorize(names)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+    normalized = uniques.str.lower().str.replace(r"[\W_]+", "", regex=True)
+    
+    # Code -1 (missing name) picks the trailing NaN
+    lookup = np.append(normalized.to_numpy(dtype=object), np.nan)
+    return pd.Series(lookup[codes], index=names.index, dtype="str")
+
+def apply_odds_corrections(features: pd.DataFrame, corrections: pd.DataFrame) -> pd.DataFrame:
+    """
+    Override opening probabilities with manually corrected odds.
+    
+    Args:
+        features: Features for a single meeting
+        corrections: Rows of the India odds corrections file for the
+            meeting, with race_no, horse names and decimal odds
+            
+    Returns:
+        Features with corrected p_opening where a runner matches
     """
-    # Read race card data
-    card = pd.read_json(card_file)
+    corrections = corrections.dropna(subset=["race_no", "horse", "odds"])
+    if corrections.empty or features.empty:
+        return features
     
-    # Read odds data
-    with open(odds_file, 'r') as f:
-        odds = json.load(f)
+    index = pd.MultiIndex.from_arrays([corrections["race_no"].astype(int).to_numpy(),
+                                       normalize_horse_names(corrections["horse"]).to_numpy()])
+    odds = pd.Series(corrections["odds"].astype(float).to_numpy(), index=index)
+    odds = odds[~odds.index.duplicated(keep="last")]
+    runners = pd.MultiIndex.from_arrays([features["race_no"].astype(int).to_numpy(),
+                                         normalize_horse_names(features["horse"]).to_numpy()])
+    corrected = odds.reindex(runners).to_numpy()
     
-    rows = []
+    features = features.copy()
+    features["p_opening"] = np.where(np.isnan(corrected), features["p_opening"], 1 / corrected)
+    return features
+
+def merge_card_odds(card: pd.DataFrame, odds: pd.DataFrame,
+                    aliases: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Join flat race card and odds rows on (race_no, normalized horse name).
     
-    # Process each race
-    for race in odds:
-        rno = race["race_no"]
-        
-        # Create mapping of normalized horse names to odds
-        odds_map = {normalize_horse_name(r["horse"]): r for r in race["runners"]}
-        
-        # Get race card data for this race
-        race_card = card[card.race_no == rno].copy()
+    Card runners are kept for every race that has an odds sheet, in odds
+    race order and card order within a race; a horse listed twice in one
+    race's odds takes its last prices. Odds names with no exact card match
+    are reconciled through the alias table and fuzzy matching first.
+    
+    Args:
+        card: Flat race card, one row per entry
+        odds: Flat odds, one row per runner (null horse for a race without
+            runners)
+        aliases: Alias key -> canonical key mapping
         
-        # Combine data for each horse
-        for _, entry in race_card.iterrows():
-            key = normalize_horse_name(entry.horse)
-            odds_entry = odds_map.get(key, {})
+    Returns:
+        Tuple of (features, unmatched, matches); unmatched lists race_no,
+        horse and source ('card' for entries without odds, 'odds' for
+        runners missing from the card), matches lists odds names renamed
+        by `reconcile_keys`
+    """
+    races = pd.unique(odds["race_no"])
+    entries = card.assign(horse_key=normalize_horse_names(card["horse"]))
+    
+    runners = odds[odds["horse"].notna()].assign(horse_key=normalize_horse_names(odds["horse"]))
+    runners["horse_key"], matches = reconcile_keys(entries, runners, ["race_no"], aliases)
+    runners = runners.drop_duplicates(["race_no", "horse_key"], keep="last")
+    
+    entries["race_order"] = entries["race_no"].map(pd.Series(range(len(races)), index=races))
+    
+    merged = entries.merge(runners.drop(columns="horse"), on=["race_no", "horse_key"],
+                           how="left", indicator=True)
+    features = merged[merged["race_order"].notna()].sort_values("race_order", kind="stable")
+    
+    unmatched = pd.concat([
+        merged.loc[merged["_merge"] == "left_only", ["race_no", "horse"]].assign(source="card"),
+        runners.loc[~runners.set_index(["race_no", "horse_key"]).index.isin(
+            entries.set_index(["race_no", "horse_key"]).index), ["race_no", "horse"]].assign(source="odds"),
+    ], ignore_index=True)
+    
+    columns = ["race_no", "race_name", "dist_m", "horse", "age", "rating", "weight_kg",
+               "p_night", "p_morning", "p_opening"]
+    return features[columns].reset_index(drop=True), unmatched, matches
+
+def build_features(card_file: str, odds_file: str,
+                   corrections: Optional[pd.DataFrame] = None,
+                   unmatched_file: Optional[str] = None,
+                   aliases: Optional[Dict[str, str]] = None,
+                   matches_file: Optional[str] = None) -> pd.DataFrame:
+    """
+    Combine race card and odds data into one row per runner.
+    
+    Args:
+        card_file: Path to race card bronze file (Parquet, Arrow IPC or JSON)
+        odds_file: Path to odds bronze file (Parquet, Arrow IPC or JSON)
+        corrections: Optional odds corrections for this meeting
+        unmatched_file: Optional CSV path for runners found only on the card
+            or only in the odds
+        aliases: Alias key -> canonical key mapping
+        matches_file: Optional CSV path for odds names matched by alias or
+            fuzzy matching
             
-            rows.append({
-                "race_no": rno,
-                "race_name": entry.race_name,
-                "dist_m": entry.dist_m,
-                "horse": entry.horse,
-                "age": entry.age,
-                "rating": entry.rating,
-                "weight_kg": entry.weight_kg,
-                "p_night": odds_entry.get("p_night"),
-                "p_morning": odds_entry.get("p_morning"),
-                "p_opening": odds_entry.get("p_opening")
-            })
-    
-    # Create features DataFrame
-    features = pd.DataFrame(rows)
+    Returns:
+        Features DataFrame
+    """
+    # Read flat race card and odds (one row per runner)
+    card = read_bronze(card_file, "card")
+    odds = read_bronze(odds_file, "odds")
+    
+    features, unmatched, matches = merge_card_odds(card, odds, aliases)
+    if unmatched_file is not None:
+        unmatched.to_csv(unmatched_file, index=False)
+    if matches_file is not None:
+        matches.to_csv(matches_file, index=False)
+    
+    if corrections is not None:
+        features = apply_odds_corrections(features, corrections)
+    
+    return features
+
+def create_features(card_file: str, odds_file: str, output_file: str,
+                    corrections: Optional[pd.DataFrame] = None) -> None:
+    """
+    Create features by combining race card and odds data.
+    
+    Args:
+        card_file: Path to race card bronze file
+        odds_file: Path to odds bronze file
+        output_file: Path to output Parquet file
+        corrections: Optional odds corrections for this meeting
+    """
+    features = build_features(card_file, odds_file, corrections)
     
     # Save to Parquet
     features.to_parquet(output_file, index=False)
@@ -81,7 +183,7 @@ def create_features(card_file: str, odds_file: str, output_file: str) -> None:
 def main():
     """Main function to parse command line arguments and process files."""
     if len(sys.argv) != 4:
-        print("Usage: python make_features_india.py <card_json> <odds_json> <output_parquet>")
+        print("Usage: python make_features_india.py <card_bronze> <odds_bronze> <output_parquet>")
         sys.exit(1)
     
     card_file = sys.argv[1]
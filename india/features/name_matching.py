@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Fuzzy horse-name reconciliation between card, odds and results.
+Exact matches on normalized names are taken first. Leftover names are paired
+only within the same race and first letters and scored by edit distance,
+and resolved pairs are kept in a persistent alias table.
+"""
+
+import functools
+import pathlib
+import sys
+import pandas as pd
+from typing import List, Dict, Optional, Tuple
+
+# Minimum similarity (1 - edit distance / longer length) for a fuzzy match
+MATCH_THRESHOLD = 0.8
+
+# Leading characters of the normalized name that must agree
+BLOCK_PREFIX = 1
+
+# Alias table under data/silver
+ALIAS_FILE = "horse_aliases.csv"
+
+ALIAS_COLUMNS = ["alias", "canonical", "score"]
+
+@functools.lru_cache(maxsize=65536)
+def name_similarity(a: str, b: str) -> float:
+    """
+    Similarity of two normalized names from their Levenshtein distance.
+    
+    Args:
+        a: First normalized name
+        b: Second normalized name
+        
+    Returns:
+        1 - distance / length of the longer name, in [0, 1]
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return 1 - prev[-1] / max(len(a), len(b))
+
+def load_aliases(path: pathlib.Path) -> Dict[str, str]:
+    """
+    Read the alias table.
+    
+    Args:
+        path: Alias CSV with alias, canonical and score columns
+        
+    Returns:
+        Mapping of alias key to canonical key (empty if the file is missing)
+    """
+    if not path.exists():
+        return {}
+    table = pd.read_csv(path, dtype={"alias": str, "canonical": str})
+    return dict(zip(table["alias"], table["canonical"]))
+
+def save_aliases(path: pathlib.Path, matches: pd.DataFrame) -> int:
+    """
+    Add resolved fuzzy matches to the alias table.
+    
+    Existing rows are kept; a new pair only replaces an alias whose recorded
+    score is lower.
+    
+    Args:
+        path: Alias CSV
+        matches: Rows with alias, canonical and score columns
+        
+    Returns:
+        Number of aliases in the table
+    """
+    matches = matches.loc[matches["alias"] != matches["canonical"]]
+    frames = [matches[ALIAS_COLUMNS]]
+    if path.exists():
+        frames.insert(0, pd.read_csv(path, dtype={"alias": str, "canonical": str}))
+    table = pd.concat(frames, ignore_index=True)
+    table = table.sort_values("score", kind="stable").drop_duplicates("alias", keep="last")
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    table.sort_values("alias").to_csv(tmp, index=False)
+    tmp.replace(path)
+    return len(table)
+
+def reconcile_keys(left: pd.DataFrame,
+                   right: pd.DataFrame,
+                   keys: List[str],
+                   aliases: Optional[Dict[str, str]] = None,
+                   threshold: float = MATCH_THRESHOLD) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Map the right side's horse keys onto the left side's within each block.
+    
+    Exact key matches are taken first. Right rows without an exact partner
+    are translated through the alias table when the alias target is an
+    unclaimed left key of the same block; the rest are paired with
+    unclaimed left keys of the same block and first letters, and the
+    best-scoring pairs above the threshold are taken one-to-one. A key is
+    never recorded as an alias of itself.
+    
+    Args:
+        left: Reference rows (e.g. the race card) with `keys` and horse_key
+        right: Rows to reconcile (e.g. odds or results) with `keys` and
+            horse_key
+        keys: Block columns such as ['race_no'] or ['meeting', 'race_no']
+        aliases: Alias key -> canonical key mapping
+        threshold: Minimum similarity for a fuzzy match
+        
+    Returns:
+        Tuple of (right horse keys mapped onto left keys, aligned with
+        `right`; matches with `keys`, alias, canonical, score and method
+        ('alias' or 'fuzzy') for every renamed key)
+    """
+    columns = keys + ["alias", "canonical", "score", "method"]
+    original = right["horse_key"]
+    mapped = original.copy()
+    
+    # Exact partners win over any alias
+    left_index = pd.MultiIndex.from_frame(left[keys + ["horse_key"]])
+    found = pd.MultiIndex.from_frame(right[keys + ["horse_key"]]).isin(left_index)
+    claimed = pd.MultiIndex.from_frame(right.loc[found, keys + ["horse_key"]])
+    
+    # Aliases only rename rows without an exact partner, onto unclaimed left keys
+    renamed = pd.Series(False, index=right.index)
+    if aliases:
+        target = original.map(aliases)
+        renamed = ~found & target.notna() & (target != original)
+        target_index = pd.MultiIndex.from_frame(right[keys].assign(horse_key=target))
+        renamed &= target_index.isin(left_index) & ~target_index.isin(claimed)
+        first = ~right.loc[renamed, keys].assign(horse_key=target[renamed]).duplicated()
+        renamed[renamed] = first.to_numpy()
+        mapped[renamed] = target[renamed]
+        found = found | renamed.to_numpy()
+        claimed = pd.MultiIndex.from_frame(right.loc[found, keys].assign(horse_key=mapped[found]))
+    by_alias = right.loc[renamed, keys].assign(
+        alias=original[renamed], canonical=mapped[renamed], score=1.0, method="alias")
+    
+    # Left keys no right row claimed, and right rows without a partner
+    free_left = left.loc[~left_index.isin(claimed), keys + ["horse_key"]].drop_duplicates()
+    free_right = right.loc[~found & original.notna(), keys + ["horse_key"]]
+    if free_left.empty or free_right.empty:
+        return mapped, by_alias[columns].reset_index(drop=True)
+    
+    # Candidate pairs share the block and the first letters of the name
+    block = keys + ["prefix"]
+    free_right = free_right.assign(prefix=free_right["horse_key"].str[:BLOCK_PREFIX])
+    free_left = free_left.assign(prefix=free_left["horse_key"].str[:BLOCK_PREFIX])
+    candidates = free_right.rename_axis("row").reset_index().merge(
+        free_left, on=block, suffixes=("", "_left"))
+    candidates["score"] = [name_similarity(a, b) for a, b in
+                           zip(candidates["horse_key"], candidates["horse_key_left"])]
+    candidates = candidates[(candidates["score"] >= threshold)
+                            & (candidates["horse_key"] != candidates["horse_key_left"])]
+    candidates = candidates.sort_values("score", ascending=False, kind="stable")
+    
+    # Greedy one-to-one assignment, best score first
+    used_right, used_left, rows = set(), set(), []
+    for row in candidates.itertuples(index=False):
+        left_id = tuple(getattr(row, k) for k in keys) + (row.horse_key_left,)
+        if row.row in used_right or left_id in used_left:
+            continue
+        used_right.add(row.row)
+        used_left.add(left_id)
+        rows.append(row)
+    
+    fuzzy = pd.DataFrame(rows, columns=candidates.columns)
+    mapped.loc[fuzzy["row"]] = fuzzy["horse_key_left"].to_numpy()
+    fuzzy = fuzzy.rename(columns={"horse_key": "alias", "horse_key_left": "canonical"}).assign(method="fuzzy")
+    
+    matches = pd.concat([by_alias[columns], fuzzy[columns]], ignore_index=True)
+    return mapped, matches
+
+def main():
+    """Main function to show the alias table."""
+    if len(sys.argv) != 2:
+        print("Usage: python name_matching.py <alias_csv>")
+        sys.exit(1)
+    
+    aliases = load_aliases(pathlib.Path(sys.argv[1]))
+    print(f"{len(aliases)} aliases")
+    for alias, canonical in sorted(aliases.items()):
+        print(f"  {alias} -> {canonical}")
+
+if __name__ == "__main__":
+    main()
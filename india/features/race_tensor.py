@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Race-batched tensors of silver features for repeated model evaluation.
+Runners are stored race by race in date order as a contiguous float32
+feature matrix with int32 race offsets and horse codes, saved as .npy files
+and memory-mapped back, so backtests build them once and never go through
+pandas again. Cached tensors are built chunk by chunk from the feature store.
+"""
+
+import json
+import pathlib
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import RACE_KEYS, race_segments
+from india.features.feature_store import cached_feature_store, column_writer, features_digest, remove_stale_caches
+
+# Feature columns of the matrix; all are exact in float32 (see FEATURE_SCHEMA)
+TENSOR_COLUMNS = ("rating", "dist_m", "weight_kg", "age", "p_night", "p_morning", "p_opening")
+
+# Bump when the on-disk layout changes
+TENSOR_VERSION = 2
+
+# Arrays saved as .npy files; the rest of a tensor goes to meta.json
+TENSOR_ARRAYS = ("X", "offsets", "horse", "row", "pos", "race_meeting", "race_no", "race_date",
+                 "horse_names", "meeting_names")
+
+# Runners copied per step when building a tensor from a feature store
+CHUNK_ROWS = 1 << 20
+
+def build_race_tensor(features: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Build a race tensor from a features frame.
+    
+    Races are ordered by meeting id (which starts with the meeting date) and
+    race number, so any range of dates is a contiguous range of races.
+    
+    Args:
+        features: Silver features, optionally with a `pos` column
+    
+    Returns:
+        Dictionary with X (runners x TENSOR_COLUMNS, float32), offsets (start
+        of every race, int32), horse (int32 code per runner), row (input row
+        per runner), pos (int16, if known), race_meeting, race_no and
+        race_date per race, plus columns, horse_names and meeting_names
+    """
+    # Meeting ids sort by date; categories of a dataset read do not
+    keys = features[[k for k in RACE_KEYS if k in features.columns]]
+    if "meeting" in keys.columns:
+        keys = keys.assign(meeting=keys["meeting"].astype(str))
+    order, offsets = race_segments(keys, RACE_KEYS)
+    df = features.iloc[order]
+    horse, horse_names = pd.factorize(df["horse"].astype(str))
+    if "meeting" in df.columns:
+        meeting, meeting_names = pd.factorize(df["meeting"].astype(str).to_numpy()[offsets])
+    else:
+        meeting, meeting_names = np.zeros(len(offsets), dtype=int), pd.Index([""])
+    
+    if "meeting_date" in df.columns:
+        race_date = pd.to_datetime(df["meeting_date"].to_numpy()[offsets])
+    else:
+        race_date = pd.to_datetime(pd.Series(meeting_names.to_numpy()[meeting]).str[:10], errors="coerce")
+    
+    tensor = {
+        "X": np.ascontiguousarray(df[list(TENSOR_COLUMNS)].to_numpy(dtype=np.float32)),
+        "offsets": offsets.astype(np.int32),
+        "horse": horse.astype(np.int32),
+        "row": order.astype(np.int32),
+        "race_meeting": meeting.astype(np.int32),
+        "race_no": df["race_no"].to_numpy()[offsets].astype(np.int16),
+        "race_date": np.asarray(race_date, dtype="datetime64[D]"),
+        "columns": list(TENSOR_COLUMNS),
+        "horse_names": np.asarray(horse_names, dtype=str),
+        "meeting_names": np.asarray(meeting_names, dtype=str),
+    }
+    if "pos" in df.columns:
+        tensor["pos"] = df["pos"].to_numpy().astype(np.int16)
+    return tensor
+
+def tensor_column(tensor: Dict[str, Any], name: str) -> np.ndarray:
+    """
+    One feature column as float64.
+    
+    Args:
+        tensor: Race tensor
+        name: Column name from TENSOR_COLUMNS
+    
+    Returns:
+        Column values in tensor order
+    """
+    return tensor["X"][:, tensor["columns"].index(name)].astype(float)
+
+def race_slice(tensor: Dict[str, Any], start: int, stop: int) -> Dict[str, Any]:
+    """
+    View of races start..stop-1 without copying.
+    
+    Args:
+        tensor: Race tensor
+        start: First race
+        stop: One past the last race
+    
+    Returns:
+        Race tensor over the selected races with rebased offsets
+    """
+    offsets = tensor["offsets"]
+    n = len(tensor["horse"])
+    lo = int(offsets[start]) if start < len(offsets) else n
+    hi = int(offsets[stop]) if stop < len(offsets) else n
+    out = dict(tensor)
+    for key in ("X", "horse", "row", "pos"):
+        if key in tensor:
+            out[key] = tensor[key][lo:hi]
+    out["offsets"] = offsets[start:stop] - np.int32(lo)
+    for key in ("race_meeting", "race_no", "race_date"):
+        out[key] = tensor[key][start:stop]
+    return out
+
+def save_race_tensor(tensor: Dict[str, Any], directory: pathlib.Path, source: str = "") -> None:
+    """
+    Write a tensor as one .npy file per array plus meta.json, atomically.
+    
+    Args:
+        tensor: Race tensor
+        directory: Output directory (replaced)
+        source: Digest of the inputs the tensor was built from
+    """
+    directory = pathlib.Path(directory)
+    tmp = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for key in TENSOR_ARRAYS:
+        if key in tensor:
+            np.save(tmp / f"{key}.npy", np.ascontiguousarray(tensor[key]))
+    _finish_tensor(tmp, directory, tensor["columns"], source)
+
+def _finish_tensor(tmp: pathlib.Path, directory: pathlib.Path, columns: list, source: str) -> None:
+    """Write meta.json and move a completed tensor into place."""
+    meta = {"version": TENSOR_VERSION, "source": source, "columns": list(columns)}
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp.replace(directory)
+
+def store_race_tensor(store: Dict[str, Any], directory: pathlib.Path, source: str = "") -> None:
+    """
+    Write the tensor of a feature store without loading the store.
+    
+    The feature matrix is filled CHUNK_ROWS runners at a time; horse codes,
+    positions and name tables are copies of the store's files, since the
+    store is already in race order. Such tensors have no `row` array.
+    
+    Args:
+        store: Feature store (see features/feature_store.py)
+        directory: Output directory (replaced)
+        source: Digest of the inputs the store was built from
+    """
+    directory = pathlib.Path(directory)
+    tmp = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    
+    n = store["n_rows"]
+    with column_writer(tmp / "X.npy", np.float32, (n, len(TENSOR_COLUMNS))) as f:
+        for start in range(0, n, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, n)
+            X = np.empty((stop - start, len(TENSOR_COLUMNS)), dtype=np.float32)
+            for j, name in enumerate(TENSOR_COLUMNS):
+                X[:, j] = store[name][start:stop]
+            X.tofile(f)
+    
+    offsets = np.asarray(store["race_offsets"])
+    np.save(tmp / "offsets.npy", offsets)
+    np.save(tmp / "race_meeting.npy", store["meeting"][offsets])
+    np.save(tmp / "race_no.npy", store["race_no"][offsets])
+    np.save(tmp / "race_date.npy", store["meeting_date"][offsets])
+    for key in ("horse", "pos", "horse_names", "meeting_names"):
+        if key in store:
+            shutil.copyfile(pathlib.Path(store["path"]) / f"{key}.npy", tmp / f"{key}.npy")
+    _finish_tensor(tmp, directory, TENSOR_COLUMNS, source)
+
+def load_race_tensor(directory: pathlib.Path, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Open a tensor written by `save_race_tensor`.
+    
+    Args:
+        directory: Tensor directory
+        mmap: Memory-map the arrays instead of reading them
+    
+    Returns:
+        Race tensor with read-only arrays and its directory as `path`
+    """
+    directory = pathlib.Path(directory)
+    tensor = json.loads((directory / "meta.json").read_text())
+    tensor["path"] = str(directory)
+    for key in TENSOR_ARRAYS:
+        path = directory / f"{key}.npy"
+        if path.exists():
+            tensor[key] = np.load(path, mmap_mode="r" if mmap else None)
+    return tensor
+
+def cached_race_tensor(features_path: str,
+                       results_file: Optional[str] = None,
+                       cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Memory-map the tensor of a features file, building it on first use.
+    
+    Args:
+        features_path: Features Parquet file or silver dataset directory
+        results_file: Optional results file or bronze directory whose
+            positions are attached
+        cache_dir: Directory holding cached tensors, and the feature store
+            under `store` (default: `tensors` and `store` next to the
+            features)
+    
+    Returns:
+        Memory-mapped race tensor
+    """
+    features_path = pathlib.Path(features_path)
+    store_dir = cache_dir and str(pathlib.Path(cache_dir) / "store")
+    cache_dir = pathlib.Path(cache_dir) if cache_dir else features_path.parent / "tensors"
+    source = features_digest(features_path, results_file)
+    directory = cache_dir / f"{features_path.stem}-{source[:16]}"
+    
+    try:
+        tensor = load_race_tensor(directory)
+        if tensor.get("version") == TENSOR_VERSION and tensor.get("source") == source:
+            return tensor
+    except FileNotFoundError:
+        pass
+    
+    store = cached_feature_store(str(features_path), results_file, store_dir)
+    store_race_tensor(store, directory, source)
+    remove_stale_caches(cache_dir, features_path.stem, directory)
+    return load_race_tensor(directory)
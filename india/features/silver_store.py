@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Partitioned Parquet dataset for silver features.
+Writes one file per meeting under venue=/year=/month= directories and reads
+them back with partition pruning, predicate pushdown and column pruning.
+"""
+
+import datetime
+import pathlib
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from typing import List, Optional, Tuple
+
+# Dataset directory under data/silver
+DATASET_NAME = "features"
+
+# Hive partition columns, encoded in the directory path
+PARTITION_SCHEMA = pa.schema([
+    ("venue", pa.string()),
+    ("year", pa.int16()),
+    ("month", pa.int8()),
+])
+
+# Column types stored in every meeting file
+FEATURE_SCHEMA = pa.schema([
+    ("meeting", pa.dictionary(pa.int32(), pa.string())),
+    ("meeting_date", pa.date32()),
+    ("race_no", pa.int16()),
+    ("race_name", pa.dictionary(pa.int32(), pa.string())),
+    ("dist_m", pa.int32()),
+    ("horse", pa.dictionary(pa.int32(), pa.string())),
+    ("age", pa.int8()),
+    ("rating", pa.int16()),
+    ("weight_kg", pa.float64()),
+    ("p_night", pa.float32()),
+    ("p_morning", pa.float32()),
+    ("p_opening", pa.float32()),
+])
+
+def parse_meeting_id(meeting: str) -> Tuple[datetime.date, str]:
+    """
+    Split a meeting id into its date and venue.
+    
+    Args:
+        meeting: Meeting id such as '2025-08-27-kolkata'
+        
+    Returns:
+        Tuple of (meeting date, venue); venue is 'unknown' for ids without one
+    """
+    date = datetime.date.fromisoformat(meeting[:10])
+    venue = meeting[11:] or "unknown"
+    return date, venue
+
+def dataset_root(data_root: pathlib.Path) -> pathlib.Path:
+    """Location of the silver features dataset."""
+    return data_root / "silver" / DATASET_NAME
+
+def meeting_partition_path(root: pathlib.Path, meeting: str) -> pathlib.Path:
+    """
+    File holding one meeting's features inside the dataset.
+    
+    Args:
+        root: Dataset root directory
+        meeting: Meeting id
+        
+    Returns:
+        Path of the meeting's Parquet file
+    """
+    date, venue = parse_meeting_id(meeting)
+    return root / f"venue={venue}" / f"year={date.year}" / f"month={date.month}" / f"{meeting}.parquet"
+
+def write_meeting_features(features: pd.DataFrame, meeting: str, root: pathlib.Path) -> pathlib.Path:
+    """
+    Write one meeting's features into the dataset, replacing any earlier file.
+    
+    Args:
+        features: Features for a single meeting
+        meeting: Meeting id
+        root: Dataset root directory
+        
+    Returns:
+        Path of the written file
+    """
+    date, _ = parse_meeting_id(meeting)
+    df = features.copy()
+    df["meeting"] = meeting
+    df["meeting_date"] = date
+    
+    table = pa.Table.from_pandas(df[FEATURE_SCHEMA.names], schema=FEATURE_SCHEMA, preserve_index=False)
+    path = meeting_partition_path(root, meeting)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Dot-prefixed files are ignored by dataset discovery while being written
+    tmp = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp)
+    tmp.replace(path)
+    return path
+
+def feature_filter(venue: Optional[str] = None,
+                   year: Optional[int] = None,
+                   month: Optional[int] = None,
+                   meeting: Optional[str] = None,
+                   dist_m: Optional[int] = None) -> Optional[ds.Expression]:
+    """
+    Build a dataset filter; partition keys prune files, the rest are pushed
+    down to row-group statistics.
+    
+    Args:
+        venue: Venue name
+        year: Meeting year
+        month: Meeting month
+        meeting: Meeting id (also prunes its venue/year/month partition)
+        dist_m: Race distance in metres
+        
+    Returns:
+        Combined filter expression, or None for no filter
+    """
+    if meeting is not None:
+        date, meeting_venue = parse_meeting_id(meeting)
+        venue, year, month = venue or meeting_venue, year or date.year, month or date.month
+    
+    expr = None
+    for name, value in (("venue", venue), ("year", year), ("month", month),
+                        ("meeting", meeting), ("dist_m", dist_m)):
+        if value is not None:
+            term = ds.field(name) == value
+            expr = term if expr is None else expr & term
+    return expr
+
+def read_features(root: pathlib.Path,
+                  columns: Optional[List[str]] = None,
+                  **filters) -> pd.DataFrame:
+    """
+    Read features from the dataset, touching only matching files and columns.
+    
+    Args:
+        root: Dataset root directory
+        columns: Columns to read (default: all, including partition columns)
+        **filters: Keyword filters accepted by `feature_filter`
+        
+    Returns:
+        DataFrame with categorical horse, race_name and meeting columns
+    """
+    root = pathlib.Path(root)
+    if not root.exists():
+        return pd.DataFrame(columns=columns or FEATURE_SCHEMA.names + PARTITION_SCHEMA.names)
+    
+    dataset = ds.dataset(root, format="parquet",
+                         partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"))
+    table = dataset.to_table(columns=columns, filter=feature_filter(**filters))
+    return table.to_pandas()
+
+def load_features(path: str, meeting: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load features from either the dataset or a legacy single Parquet file.
+    
+    Args:
+        path: Dataset root directory or Parquet file
+        meeting: Optional meeting id to restrict a dataset read to
+        
+    Returns:
+        Features DataFrame
+    """
+    path = pathlib.Path(path)
+    if path.is_dir():
+        return read_features(path, meeting=meeting)
+    return pd.read_parquet(path)
+
+def migrate_legacy_silver(silver_dir: pathlib.Path) -> List[str]:
+    """
+    Copy legacy '<meeting>-features.parquet' files into the dataset.
+    
+    Args:
+        silver_dir: The data/silver directory
+        
+    Returns:
+        Meeting ids that were migrated
+    """
+    migrated = []
+    for path in sorted(silver_dir.glob("*-features.parquet")):
+        meeting = path.name[:-len("-features.parquet")]
+        write_meeting_features(pd.read_parquet(path), meeting, silver_dir / DATASET_NAME)
+        migrated.append(meeting)
+    return migrated
+
+def main():
+    """Main function to migrate legacy silver files into the dataset."""
+    if len(sys.argv) != 2:
+        print("Usage: python silver_store.py <silver_dir>")
+        sys.exit(1)
+    
+    silver_dir = pathlib.Path(sys.argv[1])
+    
+    try:
+        migrated = migrate_legacy_silver(silver_dir)
+        print(f"Migrated {len(migrated)} meetings into {silver_dir / DATASET_NAME}")
+    except Exception as e:
+        print(f"Error migrating silver files: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
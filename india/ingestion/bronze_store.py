@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Columnar bronze storage for parsed racecard, odds and results records.
+Stores each document as a flat Parquet or Arrow IPC table (odds runners and
+result placings flattened to one row each) and keeps indented JSON as an
+export format.
+"""
+
+import json
+import pathlib
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import List, Dict, Any, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.tokenizer import MEETING_DOCUMENTS
+
+# File suffix of each bronze format, in the order readers look for them
+BRONZE_FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "json": ".json",
+}
+
+DEFAULT_BRONZE_FORMAT = "parquet"
+
+# Flat column types of each document
+BRONZE_SCHEMAS = {
+    "card": pa.schema([
+        ("race_no", pa.int16()),
+        ("race_name", pa.dictionary(pa.int32(), pa.string())),
+        ("dist_m", pa.int32()),
+        ("horse", pa.string()),
+        ("age", pa.int8()),
+        ("rating", pa.int16()),
+        ("weight_kg", pa.float64()),
+    ]),
+    "odds": pa.schema([
+        ("race_no", pa.int16()),
+        ("horse", pa.string()),
+        ("p_night", pa.float64()),
+        ("p_morning", pa.float64()),
+        ("p_opening", pa.float64()),
+    ]),
+    "results": pa.schema([
+        ("race_no", pa.int16()),
+        ("pos", pa.int8()),
+        ("horse", pa.string()),
+    ]),
+}
+
+# Nested list flattened into rows for per-race documents
+NESTED_FIELDS = {"odds": "runners", "results": "placings"}
+
+def bronze_path(bronze_dir: pathlib.Path, meeting: str, doc: str,
+                fmt: str = DEFAULT_BRONZE_FORMAT) -> pathlib.Path:
+    """
+    Location of one bronze document of a meeting.
+    
+    Args:
+        bronze_dir: The data/bronze directory
+        meeting: Meeting id
+        doc: Document type ('card', 'odds' or 'results')
+        fmt: Bronze format name
+        
+    Returns:
+        Path like '<meeting>-<doc>.parquet'
+    """
+    return bronze_dir / f"{meeting}-{doc}{BRONZE_FORMATS[fmt]}"
+
+def find_bronze_file(bronze_dir: pathlib.Path, meeting: str, doc: str) -> pathlib.Path:
+    """
+    Locate an existing bronze document in any format.
+    
+    Args:
+        bronze_dir: The data/bronze directory
+        meeting: Meeting id
+        doc: Document type
+        
+    Returns:
+        First existing file in BRONZE_FORMATS order, or the default-format
+        path when none exists
+    """
+    for fmt in BRONZE_FORMATS:
+        path = bronze_path(bronze_dir, meeting, doc, fmt)
+        if path.exists():
+            return path
+    return bronze_path(bronze_dir, meeting, doc)
+
+def bronze_format(path: pathlib.Path) -> str:
+    """Format name of a bronze file, from its suffix."""
+    for fmt, suffix in BRONZE_FORMATS.items():
+        if path.suffix == suffix:
+            return fmt
+    raise ValueError(f"Unknown bronze format: {path.name}")
+
+def document_type(path: pathlib.Path) -> str:
+    """Document type of a bronze file named '<meeting>-<doc>.<ext>'."""
+    for doc in MEETING_DOCUMENTS:
+        if path.stem == doc or path.stem.endswith(f"-{doc}"):
+            return doc
+    raise ValueError(f"Cannot tell document type of {path.name}")
+
+def flatten_records(doc: str, records: List[Dict[str, Any]]) -> pa.Table:
+    """
+    Convert parser records into a flat table.
+    
+    Races without runners or placings keep one row with a null horse, so
+    the race itself is not lost.
+    
+    Args:
+        doc: Document type
+        records: Records as yielded by the tokenizer
+        
+    Returns:
+        Table with the document's BRONZE_SCHEMAS schema
+    """
+    nested = NESTED_FIELDS.get(doc)
+    if nested is None:
+        rows = records
+    else:
+        rows = [{"race_no": r["race_no"], **item}
+                for r in records for item in (r[nested] or [{}])]
+    return pa.Table.from_pylist(rows, schema=BRONZE_SCHEMAS[doc])
+
+def nest_records(doc: str, table: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a flat document back into the parser's nested records.
+    
+    Args:
+        doc: Document type
+        table: Flat DataFrame as returned by `read_bronze`
+        
+    Returns:
+        Records in the shape written by the ingestion scripts
+    """
+    # Plain Python values (None rather than NaN) for JSON
+    table = table.astype(object).where(table.notna(), None)
+    nested = NESTED_FIELDS.get(doc)
+    if nested is None:
+        return table.to_dict("records")
+    
+    records = []
+    for rno, rows in table.groupby("race_no", sort=False):
+        items = rows[rows["horse"].notna()].drop(columns="race_no").to_dict("records")
+        records.append({"race_no": int(rno), nested: items})
+    return records
+
+def write_bronze(records: List[Dict[str, Any]], doc: str, path: pathlib.Path) -> None:
+    """
+    Write parser records in the format given by the file suffix.
+    
+    Args:
+        records: Records as yielded by the tokenizer
+        doc: Document type
+        path: Output file ending in .parquet, .arrow or .json
+    """
+    path = pathlib.Path(path)
+    fmt = bronze_format(path)
+    if fmt == "json":
+        path.write_text(json.dumps(records, indent=2))
+        return
+    
+    table = flatten_records(doc, records)
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def read_bronze_table(path: pathlib.Path, doc: Optional[str] = None) -> pa.Table:
+    """
+    Read a bronze file of any format as a flat Arrow table.
+    
+    Args:
+        path: Bronze file
+        doc: Document type (default: from the file name)
+        
+    Returns:
+        Table with the document's BRONZE_SCHEMAS schema
+    """
+    path = pathlib.Path(path)
+    doc = doc or document_type(path)
+    fmt = bronze_format(path)
+    if fmt == "parquet":
+        return pq.read_table(path)
+    if fmt == "arrow":
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+    
+    with open(path, 'r') as f:
+        return flatten_records(doc, json.load(f))
+
+def read_bronze(path: pathlib.Path, doc: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a bronze file of any format as a flat DataFrame.
+    
+    Args:
+        path: Bronze file
+        doc: Document type (default: from the file name)
+        
+    Returns:
+        One row per card entry, odds runner or result placing
+    """
+    return read_bronze_table(path, doc).to_pandas()
+
+def convert_bronze(input_file: pathlib.Path, output_file: pathlib.Path) -> int:
+    """
+    Convert a bronze file between formats, e.g. Parquet to JSON for export.
+    
+    Args:
+        input_file: Existing bronze file
+        output_file: Output file; its suffix selects the format
+        
+    Returns:
+        Number of records written
+    """
+    doc = document_type(input_file)
+    records = nest_records(doc, read_bronze(input_file, doc))
+    write_bronze(records, doc, output_file)
+    return len(records)
+
+def main():
+    """Main function to convert a bronze file to another format."""
+    if len(sys.argv) != 3:
+        print("Usage: python bronze_store.py <input_bronze> <output_bronze>")
+        sys.exit(1)
+    
+    input_file = pathlib.Path(sys.argv[1])
+    output_file = pathlib.Path(sys.argv[2])
+    
+    try:
+        n_records = convert_bronze(input_file, output_file)
+        print(f"Converted {n_records} records")
+        print(f"Output saved to: {output_file}")
+    except Exception as e:
+        print(f"Error converting file: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
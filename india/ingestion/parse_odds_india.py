@@ -1,38 +1,17 @@
 #!/usr/bin/env python3
 """
-Parse Indian odds PDF text into structured JSON data.
+Parse Indian odds PDF text into structured bronze data.
 Extracts odds for night, morning, and opening prices.
 """
 
-import re
-import json
 import sys
 import pathlib
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
-def frac_to_prob(s: str) -> Optional[float]:
-    """
-    Convert fractional odds to implied probability.
-    
-    Args:
-        s: Fractional odds string like "3/1" or "5/2"
-        
-    Returns:
-        Implied probability as float, or None if invalid
-    """
-    if not s:
-        return None
-        
-    m = re.match(r"(\d+)\s*/\s*(\d+)", s)
-    if not m:
-        return None
-        
-    a, b = map(int, m.groups())
-    if b == 0:
-        return None
-        
-    # Implied probability from fractional odds
-    return b / (a + b)
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.bronze_store import write_bronze
+from india.ingestion.tokenizer import iter_lines, tokenize_odds
 
 def parse_odds(txt: str) -> List[Dict[str, Any]]:
     """
@@ -44,51 +23,23 @@ def parse_odds(txt: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing race and odds information
     """
-    races = []
-    cur = None
-    
-    for line in txt.splitlines():
-        # Match race headers like "THE KOLKATA CUP"
-        if re.match(r"\s*THE\s+", line):
-            cur = {
-                "race_no": len(races) + 1,
-                "runners": []
-            }
-            races.append(cur)
-            continue
-            
-        # Match horse odds like "1  HORSE NAME  3/1  5/2  2/1"
-        m = re.match(r"\s*(\d+)\s+([A-Za-z'(). -]+)\s+([0-9/]+)\s*([0-9/]+)?\s*([0-9/]+)?", line)
-        if m and cur:
-            _, name, night, morn, open_ = m.groups()
-            
-            cur["runners"].append({
-                "horse": name.strip(),
-                "p_night": frac_to_prob(night),
-                "p_morning": frac_to_prob(morn),
-                "p_opening": frac_to_prob(open_)
-            })
-    
-    return races
+    return list(tokenize_odds(txt.splitlines()))
 
 def main():
     """Main function to parse command line arguments and process file."""
     if len(sys.argv) != 3:
-        print("Usage: python parse_odds_india.py <input_txt> <output_json>")
+        print("Usage: python parse_odds_india.py <input_txt> <output_bronze>")
         sys.exit(1)
     
     input_file = sys.argv[1]
     output_file = sys.argv[2]
     
     try:
-        # Read input text file
-        txt = pathlib.Path(input_file).read_text(errors="ignore")
-        
-        # Parse the odds
-        parsed_data = parse_odds(txt)
+        # Stream the input text file through the tokenizer
+        parsed_data = list(tokenize_odds(iter_lines(input_file)))
         
-        # Write output JSON
-        pathlib.Path(output_file).write_text(json.dumps(parsed_data, indent=2))
+        # Write output as Parquet, Arrow IPC or JSON, by file suffix
+        write_bronze(parsed_data, "odds", output_file)
         
         print(f"Successfully parsed odds for {len(parsed_data)} races")
         print(f"Output saved to: {output_file}")
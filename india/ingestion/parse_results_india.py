@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 """
-Parse Indian race results PDF text into structured JSON data.
+Parse Indian race results PDF text into structured bronze data.
 Extracts finishing positions and horse names.
 """
 
-import re
-import json
 import sys
 import pathlib
 from typing import List, Dict, Any
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.ingestion.bronze_store import write_bronze
+from india.ingestion.tokenizer import iter_lines, tokenize_results
+
 def parse_results(txt: str) -> List[Dict[str, Any]]:
     """
     Parse results text and extract structured data.
@@ -20,49 +23,23 @@ def parse_results(txt: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing race results
     """
-    out = []
-    cur = None
-    
-    for line in txt.splitlines():
-        # Match race headers like "RACE 1" or "RACE 1:"
-        if re.match(r"\s*RACE\s*\d+", line):
-            cur = {
-                "race_no": len(out) + 1,
-                "placings": []
-            }
-            out.append(cur)
-            continue
-            
-        # Match finishing positions like "1st : HORSE NAME" or "1st: HORSE NAME"
-        m = re.match(r"\s*(\d)(st|nd|rd|th)\s*:?\s*([A-Za-z'(). -]+)", line)
-        if m and cur:
-            pos, suffix, horse = m.groups()
-            
-            cur["placings"].append({
-                "pos": int(pos),
-                "horse": horse.strip()
-            })
-    
-    return out
+    return list(tokenize_results(txt.splitlines()))
 
 def main():
     """Main function to parse command line arguments and process file."""
     if len(sys.argv) != 3:
-        print("Usage: python parse_results_india.py <input_txt> <output_json>")
+        print("Usage: python parse_results_india.py <input_txt> <output_bronze>")
         sys.exit(1)
     
     input_file = sys.argv[1]
     output_file = sys.argv[2]
     
     try:
-        # Read input text file
-        txt = pathlib.Path(input_file).read_text(errors="ignore")
-        
-        # Parse the results
-        parsed_data = parse_results(txt)
+        # Stream the input text file through the tokenizer
+        parsed_data = list(tokenize_results(iter_lines(input_file)))
         
-        # Write output JSON
-        pathlib.Path(output_file).write_text(json.dumps(parsed_data, indent=2))
+        # Write output as Parquet, Arrow IPC or JSON, by file suffix
+        write_bronze(parsed_data, "results", output_file)
         
         print(f"Successfully parsed results for {len(parsed_data)} races")
         print(f"Output saved to: {output_file}")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Streaming line tokenizer shared by the Indian racing parsers.
+Reads text files line by line and yields racecard, odds and results records
+using patterns compiled once at import time.
+"""
+
+import re
+import pathlib
+from typing import Iterable, Iterator, Dict, Any, Optional, Tuple
+
+# Race headers like "THE KOLKATA CUP (1600m)"
+RACE_HEADER = re.compile(r"\s*THE\s+(.+)")
+DISTANCE = re.compile(r"\((\d+)m\)")
+
+# Horse entries like "1  SPEED DEMON, 3y R-45 55.5"
+CARD_ENTRY = re.compile(r"\s*(\d+)\s+([A-Za-z'(). -]+),\s*(\d+)y\s+R-(\d+)\s+(\d+\.\d{1,2})")
+
+# Horse odds like "1  HORSE NAME  3/1  5/2  2/1"
+ODDS_ENTRY = re.compile(r"\s*(\d+)\s+([A-Za-z'(). -]+)\s+([0-9/]+)\s*([0-9/]+)?\s*([0-9/]+)?")
+FRACTION = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+# Results headers like "RACE 1" and placings like "1st : HORSE NAME"
+RESULTS_HEADER = re.compile(r"\s*RACE\s*\d+")
+PLACING = re.compile(r"\s*(\d)(st|nd|rd|th)\s*:?\s*([A-Za-z'(). -]+)")
+
+# Text file stem for each document type of a meeting
+MEETING_DOCUMENTS = {
+    "card": "racecard",
+    "odds": "odds_opening",
+    "results": "results",
+}
+
+def iter_lines(path: str) -> Iterator[str]:
+    """
+    Read a text file lazily, one line at a time.
+    
+    Lines are split exactly like `str.splitlines`, so form feeds emitted by
+    pdftotext between pages still start a new line.
+    
+    Args:
+        path: Path to the text file
+    
+    Yields:
+        Lines without line terminators
+    """
+    with open(path, "r", errors="ignore") as f:
+        for line in f:
+            yield from line.splitlines()
+
+def frac_to_prob(s: Optional[str]) -> Optional[float]:
+    """
+    Convert fractional odds to implied probability.
+    
+    Args:
+        s: Fractional odds string like "3/1" or "5/2"
+    
+    Returns:
+        Implied probability as float, or None if invalid
+    """
+    if not s:
+        return None
+    
+    m = FRACTION.match(s)
+    if not m:
+        return None
+    
+    a, b = map(int, m.groups())
+    if b == 0:
+        return None
+    
+    # Implied probability from fractional odds
+    return b / (a + b)
+
+def tokenize_racecard(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per horse entry of a race card.
+    
+    Args:
+        lines: Lines of racecard text
+    
+    Yields:
+        Dictionaries with race and horse information
+    """
+    race_no = 0
+    race_name = None
+    dist = None
+    
+    for line in lines:
+        m_race = RACE_HEADER.match(line)
+        if m_race:
+            race_no += 1
+            race_name = m_race.group(1).strip()
+            
+            # Extract distance from the same line if present
+            m_dist = DISTANCE.search(line)
+            if m_dist:
+                dist = int(m_dist.group(1))
+            continue
+        
+        m = CARD_ENTRY.match(line)
+        if m and race_name and dist:
+            _, horse, age, rating, wt = m.groups()
+            yield {
+                "race_no": race_no,
+                "race_name": race_name,
+                "dist_m": dist,
+                "horse": horse.strip(),
+                "age": int(age),
+                "rating": int(rating),
+                "weight_kg": float(wt)
+            }
+
+def tokenize_odds(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per race of an odds sheet, with its runners.
+    
+    Args:
+        lines: Lines of odds text
+    
+    Yields:
+        Dictionaries with race number and runner odds
+    """
+    cur = None
+    race_no = 0
+    
+    for line in lines:
+        if RACE_HEADER.match(line):
+            if cur is not None:
+                yield cur
+            race_no += 1
+            cur = {
+                "race_no": race_no,
+                "runners": []
+            }
+            continue
+        
+        m = ODDS_ENTRY.match(line)
+        if m and cur:
+            _, name, night, morn, open_ = m.groups()
+            
+            cur["runners"].append({
+                "horse": name.strip(),
+                "p_night": frac_to_prob(night),
+                "p_morning": frac_to_prob(morn),
+                "p_opening": frac_to_prob(open_)
+            })
+    
+    if cur is not None:
+        yield cur
+
+def tokenize_results(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per race of a results sheet, with its placings.
+    
+    Args:
+        lines: Lines of results text
+    
+    Yields:
+        Dictionaries with race number and placings
+    """
+    cur = None
+    race_no = 0
+    
+    for line in lines:
+        if RESULTS_HEADER.match(line):
+            if cur is not None:
+                yield cur
+            race_no += 1
+            cur = {
+                "race_no": race_no,
+                "placings": []
+            }
+            continue
+        
+        m = PLACING.match(line)
+        if m and cur:
+            pos, suffix, horse = m.groups()
+            
+            cur["placings"].append({
+                "pos": int(pos),
+                "horse": horse.strip()
+            })
+    
+    if cur is not None:
+        yield cur
+
+TOKENIZERS = {
+    "card": tokenize_racecard,
+    "odds": tokenize_odds,
+    "results": tokenize_results,
+}
+
+def meeting_text_file(txt_dir: pathlib.Path, stem: str) -> pathlib.Path:
+    """
+    Locate the converted text file for one document of a meeting.
+    
+    Args:
+        txt_dir: Directory with the meeting's converted text files
+        stem: Document stem such as 'racecard'
+    
+    Returns:
+        Path to `<stem>.txt`, or to `<stem>.pdf` when only that exists
+    """
+    path = txt_dir / f"{stem}.txt"
+    return path if path.exists() else txt_dir / f"{stem}.pdf"
+
+def parse_meeting(txt_dir: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse every document of a meeting, one pass over each file.
+    
+    Args:
+        txt_dir: Directory with the meeting's converted text files
+    
+    Yields:
+        (document type, record) pairs, document type being 'card', 'odds'
+        or 'results'
+    """
+    txt_dir = pathlib.Path(txt_dir)
+    for doc, stem in MEETING_DOCUMENTS.items():
+        for record in TOKENIZERS[doc](iter_lines(meeting_text_file(txt_dir, stem))):
+            yield doc, record
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Content-hash manifests for incremental pipeline stages.
+Each stage records the hashes of its inputs, its parameters and the hashes
+of its outputs, so a re-run can skip stages whose upstream did not change.
+"""
+
+import hashlib
+import json
+import pathlib
+from typing import Dict, Any, Optional
+
+# Bump to invalidate every manifest written by an older layout
+MANIFEST_VERSION = 1
+
+def bytes_digest(data: bytes) -> str:
+    """
+    Hash an in-memory payload.
+    
+    Args:
+        data: Bytes to hash
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def file_digest(path: pathlib.Path, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Hash a file, reusing the previous digest when size and mtime are unchanged.
+    
+    Args:
+        path: File to hash
+        previous: Digest recorded for this file by an earlier run
+    
+    Returns:
+        Dictionary with sha256, size and mtime_ns; sha256 is None for a
+        missing file
+    """
+    if not path.exists():
+        return {"sha256": None, "size": None, "mtime_ns": None}
+    
+    stat = path.stat()
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return {"sha256": h.hexdigest(), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def load_manifest(path: pathlib.Path) -> Dict[str, Any]:
+    """
+    Read a manifest, returning an empty one if it is missing or outdated.
+    
+    Args:
+        path: Manifest JSON file
+    
+    Returns:
+        Manifest dictionary keyed by stage name
+    """
+    try:
+        manifest = json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("stages", {})
+
+def save_manifest(path: pathlib.Path, stages: Dict[str, Any]) -> None:
+    """
+    Write a manifest atomically.
+    
+    Args:
+        path: Manifest JSON file
+        stages: Manifest entries keyed by stage name
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "stages": stages}, indent=2, sort_keys=True))
+    tmp.replace(path)
+
+def digests_match(recorded: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """
+    Compare two name -> digest mappings by content hash only.
+    
+    Args:
+        recorded: Digests from the manifest
+        current: Digests computed now
+    
+    Returns:
+        True if both cover the same names with the same hashes
+    """
+    if recorded.keys() != current.keys():
+        return False
+    return all(recorded[k]["sha256"] == current[k]["sha256"] for k in current)
+
+def is_current(entry: Optional[Dict[str, Any]],
+               inputs: Dict[str, Any],
+               params: Dict[str, Any],
+               outputs: Dict[str, Any]) -> bool:
+    """
+    Decide whether a stage can be skipped.
+    
+    Args:
+        entry: Manifest entry recorded by the stage's last run
+        inputs: Current input digests
+        params: Current stage parameters
+        outputs: Current output digests
+    
+    Returns:
+        True if inputs and parameters are unchanged and the recorded outputs
+        are still on disk untouched
+    """
+    if not entry:
+        return False
+    if entry.get("params") != json.loads(json.dumps(params)):
+        return False
+    if any(d["sha256"] is None for d in outputs.values()):
+        return False
+    return digests_match(entry.get("inputs", {}), inputs) and digests_match(entry.get("outputs", {}), outputs)
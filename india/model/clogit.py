@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Conditional logit (clogit) for the Benter model.
+Fits the fundamental model and the market-combination weights by maximum
+likelihood with one stratum per race, like R's survival::clogit.
+"""
+
+import json
+import pathlib
+import sys
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Sequence, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.combiner_india import RACE_KEYS, market_and_prior, posterior_tensor, race_segments
+
+def segment_softmax(eta: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Softmax of linear predictors within each race.
+    
+    Args:
+        eta: Linear predictors, ordered so that each race is contiguous
+        offsets: Start offset of each race in `eta`
+    
+    Returns:
+        Tuple of (probabilities, log of each race's normalizing sum)
+    """
+    counts = np.diff(np.r_[offsets, len(eta)])
+    top = np.maximum.reduceat(eta, offsets)
+    w = np.exp(eta - np.repeat(top, counts))
+    sums = np.add.reduceat(w, offsets)
+    return w / np.repeat(sums, counts), top + np.log(sums)
+
+def clogit_strata(X: np.ndarray,
+                  won: np.ndarray,
+                  offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rows and races that enter the likelihood.
+    
+    Runners with a missing feature are dropped (na.omit), then races that
+    are left without exactly one winner, as they carry no information (no
+    winner) or would need the exact tie correction (dead heats).
+    
+    Args:
+        X: Design matrix, ordered so that each race is contiguous
+        won: Winner indicator per row
+        offsets: Start offset of each race
+    
+    Returns:
+        Tuple of (kept row indexes, race offsets within the kept rows,
+        winning row of every kept race within the kept rows)
+    """
+    n = len(won)
+    race = np.repeat(np.arange(len(offsets)), np.diff(np.r_[offsets, n]))
+    rows = np.flatnonzero(~np.isnan(X).any(axis=1))
+    wins = np.bincount(race[rows], weights=won[rows], minlength=len(offsets))
+    rows = rows[wins[race[rows]] == 1]
+    race = race[rows]
+    starts = np.flatnonzero(np.r_[True, race[1:] != race[:-1]]) if len(rows) else np.arange(0)
+    winners = np.flatnonzero(won[rows])
+    return rows, starts, winners
+
+def clogit_derivatives(coef: np.ndarray,
+                       X: np.ndarray,
+                       offsets: np.ndarray,
+                       winners: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Log-likelihood, gradient and Hessian of the conditional logit.
+    
+    With p the within-race softmax of X @ coef, the log-likelihood is
+    sum(eta[winner] - log sum exp(eta)) over races, the gradient
+    X'(y - p) and the Hessian -(X' diag(p) X - sum_r m_r m_r') with m_r the
+    p-weighted mean of race r's rows.
+    
+    Args:
+        coef: Coefficients
+        X: Design matrix of the kept rows (see `clogit_strata`)
+        offsets: Start offset of each race
+        winners: Winning row of each race
+    
+    Returns:
+        Tuple of (log-likelihood, gradient, Hessian)
+    """
+    eta = X @ coef
+    p, lognorm = segment_softmax(eta, offsets)
+    loglik = eta[winners].sum() - lognorm.sum()
+    px = p[:, None] * X
+    means = np.add.reduceat(px, offsets, axis=0)
+    grad = X[winners].sum(axis=0) - means.sum(axis=0)
+    hess = means.T @ means - X.T @ px
+    return loglik, grad, hess
+
+def varies_within_races(X: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Columns that vary within at least one race.
+    
+    Args:
+        X: Design matrix, ordered so that each race is contiguous
+        offsets: Start offset of each race
+        
+    Returns:
+        Boolean mask of identifiable columns
+    """
+    counts = np.diff(np.r_[offsets, len(X)])
+    means = np.repeat(np.add.reduceat(X, offsets, axis=0) / counts[:, None], counts, axis=0)
+    return (np.abs(X - means) > 1e-12 * np.maximum(np.abs(X), 1)).any(axis=0)
+
+def clogit_newton(X: np.ndarray,
+                  offsets: np.ndarray,
+                  winners: np.ndarray,
+                  coef: np.ndarray,
+                  max_iter: int = 50,
+                  tol: float = 1e-9) -> Tuple[np.ndarray, float, np.ndarray, int, bool]:
+    """
+    Newton-Raphson on prepared strata.
+    
+    Steps are halved while they lower the log-likelihood, and iteration
+    stops once its relative change is below `tol` (as in survival::coxph).
+    
+    Args:
+        X: Design matrix of the kept rows (see `clogit_strata`)
+        offsets: Start offset of each race
+        winners: Winning row of each race
+        coef: Starting coefficients
+        max_iter: Maximum Newton iterations
+        tol: Convergence tolerance on the log-likelihood
+        
+    Returns:
+        Tuple of (coefficients, log-likelihood, Hessian, iterations,
+        converged)
+    """
+    loglik, grad, hess = clogit_derivatives(coef, X, offsets, winners)
+    converged = False
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        try:
+            step = np.linalg.solve(-hess, grad)
+        except np.linalg.LinAlgError:
+            step = np.linalg.lstsq(-hess, grad, rcond=None)[0]
+        
+        # Halve the step until the likelihood does not get worse
+        for _ in range(30):
+            new = clogit_derivatives(coef + step, X, offsets, winners)
+            if new[0] >= loglik or not np.isfinite(loglik):
+                break
+            step = step / 2
+        previous = loglik
+        coef = coef + step
+        loglik, grad, hess = new
+        if abs(loglik - previous) <= tol * abs(loglik):
+            converged = True
+            break
+    return coef, loglik, hess, n_iter, converged
+
+def fit_clogit(X: np.ndarray,
+               won: np.ndarray,
+               offsets: np.ndarray,
+               names: Sequence[str] = None,
+               init: np.ndarray = None,
+               max_iter: int = 50,
+               tol: float = 1e-9) -> Dict[str, Any]:
+    """
+    Fit a conditional logit with one stratum per race by Newton-Raphson.
+    
+    Args:
+        X: Design matrix, ordered so that each race is contiguous
+        won: Winner indicator per row
+        offsets: Start offset of each race (see `race_segments`)
+        names: Coefficient names
+        init: Starting coefficients, e.g. from an earlier fit (zeros if None)
+        max_iter: Maximum Newton iterations
+        tol: Convergence tolerance on the log-likelihood
+    
+    Returns:
+        Dictionary with coef, se (NaN for features constant within every
+        race), names, loglik, loglik_null, aic, n_iter, converged, n_races
+        and n_runners
+        
+    Raises:
+        ValueError: If no race can enter the likelihood
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    k = X.shape[1]
+    names = list(names) if names is not None else [f"x{i}" for i in range(k)]
+    rows, offsets, winners = clogit_strata(X, np.asarray(won, dtype=float), offsets)
+    X = X[rows]
+    if len(X) == 0:
+        raise ValueError("No race with exactly one winner and complete features")
+    counts = np.diff(np.r_[offsets, len(X)])
+    
+    # Features constant within every race drop out of the likelihood; like
+    # R, report NA for them and fit the rest
+    fitted = varies_within_races(X, offsets)
+    X = X[:, fitted]
+    
+    coef = np.zeros(k) if init is None else np.nan_to_num(np.asarray(init, dtype=float))
+    coef, loglik, hess, n_iter, converged = clogit_newton(
+        X, offsets, winners, coef[fitted], max_iter, tol)
+    
+    se = np.full(k, np.nan)
+    try:
+        se[fitted] = np.sqrt(np.diag(np.linalg.inv(-hess)))
+    except np.linalg.LinAlgError:
+        pass
+    full = np.full(k, np.nan)
+    full[fitted] = coef
+    return {
+        "coef": full,
+        "se": se,
+        "names": names,
+        "loglik": float(loglik),
+        "loglik_null": float(-np.log(counts).sum()),
+        "aic": float(2 * fitted.sum() - 2 * loglik),
+        "n_iter": n_iter,
+        "converged": converged,
+        "n_races": len(offsets),
+        "n_runners": len(X),
+    }
+
+def coef_table(fit: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Coefficient summary like R's summary(clogit).
+    
+    Args:
+        fit: Result of `fit_clogit`
+    
+    Returns:
+        DataFrame with coef, exp(coef), se and z per coefficient
+    """
+    return pd.DataFrame({
+        "coef": fit["coef"],
+        "exp_coef": np.exp(fit["coef"]),
+        "se": fit["se"],
+        "z": fit["coef"] / fit["se"],
+    }, index=fit["names"])
+
+def fit_fundamental(df: pd.DataFrame,
+                    features: Sequence[str],
+                    keys: Sequence[str] = RACE_KEYS,
+                    init: np.ndarray = None) -> Dict[str, Any]:
+    """
+    Fit the fundamental (first stage) model on feature columns.
+    
+    Args:
+        df: DataFrame with one row per runner, the features and `pos`
+        features: Feature columns
+        keys: Columns identifying a race; missing columns are ignored
+        init: Starting coefficients
+    
+    Returns:
+        Fit dictionary (see `fit_clogit`) with `features` added
+    """
+    order, offsets = race_segments(df, keys)
+    X = df[list(features)].to_numpy(dtype=float)[order]
+    won = (df["pos"].to_numpy() == 1)[order]
+    fit = fit_clogit(X, won, offsets, names=features, init=init)
+    fit["features"] = list(features)
+    return fit
+
+def fundamental_probs(df: pd.DataFrame,
+                      fit: Dict[str, Any],
+                      keys: Sequence[str] = RACE_KEYS) -> np.ndarray:
+    """
+    Win probabilities of the fundamental model.
+    
+    Args:
+        df: DataFrame with the fitted feature columns
+        fit: Result of `fit_fundamental`
+        keys: Columns identifying a race; missing columns are ignored
+    
+    Returns:
+        Probabilities in the input row order (NaN in races with a missing
+        feature), e.g. for `posterior_batch(..., prior_col=...)`
+    """
+    order, offsets = race_segments(df, keys)
+    X = df[fit["features"]].to_numpy(dtype=float)[order]
+    p, _ = segment_softmax(X @ np.nan_to_num(fit["coef"]), offsets) if len(X) else (np.zeros(0), None)
+    out = np.empty(len(df), dtype=float)
+    out[order] = p
+    return out
+
+def fit_benter(df: pd.DataFrame,
+               use: str = "p_opening",
+               keys: Sequence[str] = RACE_KEYS,
+               prior_col: str = None) -> Dict[str, Any]:
+    """
+    Fit the second-stage weights of p ~ ppri^alpha * pmkt^beta.
+    
+    Args:
+        df: DataFrame with horse features, market odds and `pos`
+        use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        keys: Columns identifying a race; missing columns are ignored
+        prior_col: Column with fundamental probabilities; the hand-set
+            prior is used when None
+    
+    Returns:
+        Fit dictionary (see `fit_clogit`) with `alpha` and `beta` added
+    """
+    order, offsets = race_segments(df, keys)
+    pmkt, ppri = market_and_prior(df, order, offsets, use, prior_col)
+    with np.errstate(divide="ignore"):
+        X = np.column_stack([np.log(ppri), np.log(pmkt)])
+    # A zero probability cannot enter the log-likelihood
+    X[~np.isfinite(X)] = np.nan
+    won = (df["pos"].to_numpy() == 1)[order]
+    fit = fit_clogit(X, won, offsets, names=["log_p_prior", "log_p_market"])
+    fit["alpha"], fit["beta"] = (float(c) for c in fit["coef"])
+    return fit
+
+def fit_benter_tensor(tensor: Dict[str, Any],
+                      use: str = "p_opening",
+                      prior: np.ndarray = None) -> Dict[str, Any]:
+    """
+    Fit the second-stage weights on the races of a race tensor.
+    
+    Args:
+        tensor: Race tensor (or `race_slice`) with finishing positions
+        use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        prior: Fundamental probabilities in tensor order; the hand-set
+            prior is used when None
+    
+    Returns:
+        Fit dictionary as returned by `fit_benter`
+    """
+    post = posterior_tensor(tensor, use=use, prior=prior)
+    with np.errstate(divide="ignore"):
+        X = np.column_stack([np.log(post["p_prior"]), np.log(post["p_market"])])
+    X[~np.isfinite(X)] = np.nan
+    won = np.asarray(tensor["pos"]) == 1
+    fit = fit_clogit(X, won, np.asarray(tensor["offsets"]), names=["log_p_prior", "log_p_market"])
+    fit["alpha"], fit["beta"] = (float(c) for c in fit["coef"])
+    return fit
+
+def main():
+    """Fit the Benter weights on a features file with results."""
+    if len(sys.argv) < 3:
+        print("Usage: python clogit.py <features_parquet> <results_json> [output_json]")
+        sys.exit(1)
+    
+    from india.features.silver_store import load_features
+    from india.backtest.results_join import load_results, attach_positions
+    
+    features = attach_positions(load_features(sys.argv[1]), load_results(sys.argv[2]))
+    start = time.perf_counter()
+    fit = fit_benter(features)
+    elapsed = time.perf_counter() - start
+    
+    print(coef_table(fit).to_string())
+    print(f"\nalpha={fit['alpha']:.4f} beta={fit['beta']:.4f}  "
+          f"loglik={fit['loglik']:.2f} (null {fit['loglik_null']:.2f})  AIC={fit['aic']:.2f}")
+    print(f"{fit['n_races']:,} races, {fit['n_runners']:,} runners, "
+          f"{fit['n_iter']} iterations in {elapsed:.2f}s")
+    
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], "w") as f:
+            json.dump({"alpha": fit["alpha"], "beta": fit["beta"]}, f, indent=2)
+        print(f"Weights saved to: {sys.argv[3]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,51 @@
 #!/usr/bin/env python3
 """
 Benter-style combiner for Indian racing.
-Combines prior probabilities with market odds using geometric mean.
+Combines prior probabilities with market odds as ppri^alpha * pmkt^beta
+(the geometric mean by default, or weights fitted with model/clogit.py).
 """
 
+import json
+import pathlib
 import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+# Columns identifying a single race when several meetings share one frame
+RACE_KEYS = ("meeting", "race_no")
+
+# Prior coefficients, named as in racing.features (and the floor as in
+# racing.defaults) of config/settings.yaml
+PRIOR_PARAMS = {
+    "base_prior": 0.20,
+    "rating_weight": 0.006,
+    "weight_penalty_route": 0.010,
+    "weight_penalty_sprint": 0.006,
+    "age_bonus_3yo_route": 0.02,
+    "min_prior_prob": 0.01,
+}
+
+# Fitted Benter weights written by model/clogit.py, under data/silver
+WEIGHTS_FILE = "benter_weights.json"
+
+# Weights used until a fit exists (the geometric mean)
+DEFAULT_WEIGHTS = (0.5, 0.5)
+
+def load_weights(path: Optional[pathlib.Path]) -> Tuple[float, float]:
+    """
+    Read fitted Benter weights.
+    
+    Args:
+        path: JSON file with alpha and beta, as written by `clogit.py`
+        
+    Returns:
+        Tuple of (alpha, beta); DEFAULT_WEIGHTS if there is no fit
+    """
+    if path is None or not pathlib.Path(path).exists():
+        return DEFAULT_WEIGHTS
+    with open(path) as f:
+        weights = json.load(f)
+    return float(weights["alpha"]), float(weights["beta"])
 
 def normalize(x: np.ndarray) -> np.ndarray:
     """
@@ -31,94 +70,470 @@ def prior_row(r: pd.Series) -> float:
     Returns:
         Prior probability
     """
+    k = PRIOR_PARAMS
+    
     # Base prior from rating
-    base = 0.20 + 0.006 * r["rating"]
+    base = k["base_prior"] + k["rating_weight"] * r["rating"]
     
     # Weight penalty (heavier horses are disadvantaged)
     if r["dist_m"] >= 1600:  # Route race
-        base -= 0.010 * (r["weight_kg"] - 55.0)
+        base -= k["weight_penalty_route"] * (r["weight_kg"] - 55.0)
     else:  # Sprint race
-        base -= 0.006 * (r["weight_kg"] - 55.0)
+        base -= k["weight_penalty_sprint"] * (r["weight_kg"] - 55.0)
     
     # Age bonus for 3-year-olds in route races
     if r["age"] == 3 and r["dist_m"] >= 1600:
-        base += 0.02
+        base += k["age_bonus_3yo_route"]
     
-    return max(0.01, base)
+    return max(k["min_prior_prob"], base)
 
-def posterior_for_race(df: pd.DataFrame, use: str = "p_opening") -> pd.DataFrame:
+def prior_vector(rating: np.ndarray,
+                 dist_m: np.ndarray,
+                 weight_kg: np.ndarray,
+                 age: np.ndarray,
+                 params: Dict[str, float] = None) -> np.ndarray:
     """
-    Calculate posterior probabilities for a race using Benter method.
+    Vectorized version of `prior_row` over arrays of runners.
+    
+    Args:
+        rating: Official ratings
+        dist_m: Race distances in metres
+        weight_kg: Carried weights
+        age: Horse ages
+        params: Coefficients overriding PRIOR_PARAMS
+        
+    Returns:
+        Unnormalized prior probabilities, identical to `prior_row` per runner
+        with the default coefficients
+    """
+    k = dict(PRIOR_PARAMS, **(params or {}))
+    rating = np.asarray(rating, dtype=float)
+    dist_m = np.asarray(dist_m, dtype=float)
+    weight_kg = np.asarray(weight_kg, dtype=float)
+    age = np.asarray(age, dtype=float)
+    route = dist_m >= 1600
+    
+    base = k["base_prior"] + k["rating_weight"] * rating
+    base = base - np.where(route, k["weight_penalty_route"], k["weight_penalty_sprint"]) * (weight_kg - 55.0)
+    base = np.where((age == 3) & route, base + k["age_bonus_3yo_route"], base)
+    
+    # Same semantics as max(floor, base), including NaN -> floor
+    return np.where(base > k["min_prior_prob"], base, k["min_prior_prob"])
+
+def race_segments(df: pd.DataFrame,
+                  keys: Sequence[str] = RACE_KEYS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group runners into contiguous race segments.
+    
+    Args:
+        df: DataFrame with one row per runner
+        keys: Columns identifying a race; missing columns are ignored
+        
+    Returns:
+        Tuple of (order, offsets): a stable permutation that makes each race
+        contiguous, and the start offset of every race within that order
+    """
+    n = len(df)
+    cols = [k for k in keys if k in df.columns]
+    if n == 0:
+        return np.arange(0), np.arange(0)
+    if not cols:
+        return np.arange(n), np.zeros(1, dtype=np.intp)
+    
+    codes = df.groupby(cols, sort=True, dropna=False, observed=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    offsets = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    return order, offsets
+
+def segment_sum(x: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Sum each segment exactly as `ndarray.sum` would sum it on its own.
+    
+    Segments of equal length are gathered into one 2-D block and reduced along
+    the last axis, so every race goes through the same summation order as a
+    standalone 1-D sum and batch results stay bit-identical to `normalize`.
+    
+    Args:
+        x: Values ordered so that each segment is contiguous
+        offsets: Start offset of each segment in `x`
+        
+    Returns:
+        Sum of every segment
+    """
+    counts = np.diff(np.r_[offsets, len(x)])
+    sums = np.empty(len(offsets), dtype=float)
+    for k in np.unique(counts):
+        segs = np.flatnonzero(counts == k)
+        block = x[offsets[segs][:, None] + np.arange(k)]
+        sums[segs] = block.sum(axis=1)
+    return sums
+
+def segment_normalize(x: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Normalize probabilities to sum to 1 within each segment.
+    
+    Args:
+        x: Probabilities ordered so that each race is contiguous
+        offsets: Start offset of each race in `x`
+        
+    Returns:
+        Normalized probabilities; segments with a non-positive sum become uniform
+    """
+    if len(x) == 0:
+        return x.astype(float)
+    counts = np.diff(np.r_[offsets, len(x)])
+    sums = np.repeat(segment_sum(x, offsets), counts)
+    sizes = np.repeat(counts, counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(sums > 0, x / sums, 1.0 / sizes)
+
+def market_and_prior(df: pd.DataFrame,
+                     order: np.ndarray,
+                     offsets: np.ndarray,
+                     use: str = "p_opening",
+                     prior_col: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Market and prior probabilities normalized within races.
     
     Args:
         df: DataFrame with horse features and market odds
+        order: Permutation making each race contiguous (see `race_segments`)
+        offsets: Start offset of each race within `order`
         use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        prior_col: Column with fitted fundamental probabilities; the
+            hand-set `prior_vector` is used when None
         
     Returns:
-        DataFrame with market, prior, and posterior probabilities
+        Tuple of (p_market, p_prior) in race order
     """
-    df = df.copy()
-    
     # Get market probabilities, fallback to morning then night
     pmkt = (df[use]
             .fillna(df["p_morning"])
             .fillna(df["p_night"])
             .fillna(0.08)
-            .to_numpy())
+            .to_numpy(dtype=float))
+    if prior_col is None:
+        ppri = prior_vector(df["rating"].to_numpy(dtype=float),
+                            df["dist_m"].to_numpy(dtype=float),
+                            df["weight_kg"].to_numpy(dtype=float),
+                            df["age"].to_numpy(dtype=float))
+    else:
+        ppri = df[prior_col].to_numpy(dtype=float)
+    return segment_normalize(pmkt[order], offsets), segment_normalize(ppri[order], offsets)
+
+def combine(ppri: np.ndarray,
+            pmkt: np.ndarray,
+            alpha: float = 0.5,
+            beta: float = 0.5) -> np.ndarray:
+    """
+    Unnormalized Benter combination ppri^alpha * pmkt^beta.
     
-    # Normalize market probabilities
-    pmkt = normalize(pmkt)
+    Args:
+        ppri: Prior (fundamental) probabilities
+        pmkt: Market probabilities
+        alpha: Weight of the prior, e.g. fitted by `clogit.fit_benter`
+        beta: Weight of the market
+        
+    Returns:
+        Combined scores, to be normalized within races
+    """
+    if alpha == 0.5 and beta == 0.5:
+        # Geometric mean, as used before the weights were fitted
+        return np.sqrt(pmkt * ppri)
+    with np.errstate(divide="ignore"):
+        return np.exp(alpha * np.log(ppri) + beta * np.log(pmkt))
+
+def posterior_batch(df: pd.DataFrame,
+                    use: str = "p_opening",
+                    keys: Sequence[str] = RACE_KEYS,
+                    alpha: float = 0.5,
+                    beta: float = 0.5,
+                    prior_col: str = None) -> pd.DataFrame:
+    """
+    Calculate posterior probabilities for every race in a frame in one pass.
     
-    # Calculate prior probabilities
-    ppri = np.array([prior_row(r) for _, r in df.iterrows()])
-    ppri = normalize(ppri)
+    Args:
+        df: DataFrame with horse features and market odds for any number of
+            meetings and races
+        use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        keys: Columns identifying a race; missing columns are ignored
+        alpha: Weight of the prior in the combination
+        beta: Weight of the market in the combination
+        prior_col: Column with fitted fundamental probabilities to use as
+            the prior instead of `prior_vector`
+        
+    Returns:
+        DataFrame in the input row order with market, prior, and posterior
+        probabilities added
+    """
+    df = df.copy()
+    order, offsets = race_segments(df, keys)
     
-    # Combine using geometric mean (Benter method)
-    post = normalize(np.sqrt(pmkt * ppri))
+    # Normalize within races, combine with the Benter weights
+    pmkt, ppri = market_and_prior(df, order, offsets, use, prior_col)
+    post = segment_normalize(combine(ppri, pmkt, alpha, beta), offsets)
     
-    # Add all probabilities to DataFrame
-    df["p_market"] = pmkt
-    df["p_prior"] = ppri
-    df["p_posterior"] = post
+    # Scatter back to the input row order
+    for col, values in (("p_market", pmkt), ("p_prior", ppri), ("p_posterior", post)):
+        out = np.empty_like(values)
+        out[order] = values
+        df[col] = out
     
     return df
 
+def posterior_for_race(df: pd.DataFrame,
+                       use: str = "p_opening",
+                       alpha: float = 0.5,
+                       beta: float = 0.5,
+                       prior_col: str = None) -> pd.DataFrame:
+    """
+    Calculate posterior probabilities for a race using Benter method.
+    
+    Args:
+        df: DataFrame with horse features and market odds
+        use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        alpha: Weight of the prior, e.g. from `clogit.fit_benter`
+        beta: Weight of the market
+        prior_col: Column with fitted fundamental probabilities, if any
+        
+    Returns:
+        DataFrame with market, prior, and posterior probabilities
+    """
+    # A single race is one segment of the batch engine
+    return posterior_batch(df, use=use, keys=(), alpha=alpha, beta=beta,
+                           prior_col=prior_col)
+
+def market_vector(p_use: np.ndarray,
+                  p_morning: np.ndarray,
+                  p_night: np.ndarray) -> np.ndarray:
+    """
+    Market probabilities with the morning, night and 0.08 fallbacks.
+    
+    Args:
+        p_use: Preferred market probabilities (NaN where missing)
+        p_morning: Morning-line probabilities
+        p_night: Night-before probabilities
+        
+    Returns:
+        Market probabilities, as `market_and_prior` takes them from a frame
+    """
+    pmkt = np.where(np.isnan(p_use), p_morning, p_use)
+    pmkt = np.where(np.isnan(pmkt), p_night, pmkt)
+    return np.where(np.isnan(pmkt), 0.08, pmkt)
+
+def posterior_tensor(tensor: Dict[str, Any],
+                     use: str = "p_opening",
+                     alpha: float = 0.5,
+                     beta: float = 0.5,
+                     prior: np.ndarray = None) -> Dict[str, np.ndarray]:
+    """
+    Posterior probabilities for every race of a race tensor.
+    
+    Args:
+        tensor: Race tensor (see features/race_tensor.py)
+        use: Which market odds to use ('p_night', 'p_morning', 'p_opening')
+        alpha: Weight of the prior in the combination
+        beta: Weight of the market in the combination
+        prior: Fitted fundamental probabilities in tensor order, used
+            instead of `prior_vector`
+        
+    Returns:
+        Dictionary with p_market, p_prior and p_posterior in tensor order,
+        equal to what `posterior_batch` gives for the same runners
+    """
+    X, columns, offsets = tensor["X"], tensor["columns"], tensor["offsets"]
+    col = lambda name: X[:, columns.index(name)].astype(float)
+    pmkt = market_vector(col(use), col("p_morning"), col("p_night"))
+    if prior is None:
+        prior = prior_vector(col("rating"), col("dist_m"), col("weight_kg"), col("age"))
+    pmkt = segment_normalize(pmkt, offsets)
+    ppri = segment_normalize(np.asarray(prior, dtype=float), offsets)
+    return {
+        "p_market": pmkt,
+        "p_prior": ppri,
+        "p_posterior": segment_normalize(combine(ppri, pmkt, alpha, beta), offsets),
+    }
+
+# Staking modes supported by `calculate_kelly_stakes`
+KELLY_MODES = ("single", "fractional", "simultaneous")
+
+def segment_cumsum(x: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum restarting at every segment.
+    
+    Args:
+        x: Values ordered so that each segment is contiguous
+        offsets: Start offset of each segment in `x`
+        
+    Returns:
+        Running total within each segment
+    """
+    counts = np.diff(np.r_[offsets, len(x)])
+    out = np.empty(len(x), dtype=float)
+    for k in np.unique(counts):
+        idx = offsets[counts == k][:, None] + np.arange(k)
+        out[idx] = x[idx].cumsum(axis=1)
+    return out
+
+def single_kelly(p: np.ndarray, p_market: np.ndarray) -> np.ndarray:
+    """
+    Kelly fraction for each runner backed on its own.
+    
+    Args:
+        p: Our win probabilities
+        p_market: Market probabilities (inverse decimal odds)
+        
+    Returns:
+        Uncapped Kelly fractions; NaN where the odds are unusable
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Kelly formula: (bp - q) / b
+        # where b = odds-1, p = our probability, q = 1-p
+        b = 1 / p_market - 1
+        q = 1 - p
+        kelly = (b * p - q) / b
+    return np.where(b > 0, kelly, 0.0)
+
+def simultaneous_kelly(p: np.ndarray,
+                       p_market: np.ndarray,
+                       offsets: np.ndarray,
+                       eligible: np.ndarray = None) -> np.ndarray:
+    """
+    Optimal Kelly fractions for backing several runners in the same race.
+    
+    Runners are mutually exclusive outcomes, so stakes are solved jointly per
+    race: runners are added in order of expected return p * odds while that
+    exceeds the reserve rate R = (1 - sum p) / (1 - sum 1/odds) of the set
+    chosen so far, and each chosen runner gets p - R / odds.
+    
+    Args:
+        p: Our win probabilities, ordered so that each race is contiguous
+        p_market: Market probabilities (inverse decimal odds), same order
+        offsets: Start offset of each race
+        eligible: Optional mask of runners that may be backed
+        
+    Returns:
+        Kelly fractions of bankroll for every runner
+    """
+    n = len(p)
+    if n == 0:
+        return np.zeros(0)
+    counts = np.diff(np.r_[offsets, n])
+    seg = np.repeat(np.arange(len(offsets)), counts)
+    if eligible is None:
+        eligible = np.ones(n, dtype=bool)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge = np.where(eligible & (p_market > 0), p / p_market, -np.inf)
+    edge = np.nan_to_num(edge, nan=-np.inf)
+    
+    # Best expected return first within each race
+    rank = np.lexsort((-edge, seg))
+    ps, bs, es = p[rank], p_market[rank], edge[rank]
+    P = segment_cumsum(ps, offsets)
+    B = segment_cumsum(bs, offsets)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reserve_prev = (1 - (P - ps)) / (1 - (B - bs))
+    # The last runner of a fair book only ties the reserve; leave it out
+    # rather than let rounding pick between equally good stakes
+    take = (es > reserve_prev + 1e-12) & (B < 1 - 1e-12)
+    
+    # The optimal set is the prefix before the first rejected runner
+    pos = np.arange(n) - offsets[seg]
+    n_taken = np.minimum(np.minimum.reduceat(np.where(take, n, pos), offsets), counts)
+    last = offsets + np.maximum(n_taken - 1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reserve = np.where(n_taken > 0, (1 - P[last]) / (1 - B[last]), 1.0)
+    # Backing every runner of a fair book keeps nothing in reserve
+    reserve = np.where(1 - P[last] <= 1e-12, 0.0, np.clip(reserve, 0.0, 1.0))
+    
+    stakes = np.where(pos < n_taken[seg], np.maximum(ps - reserve[seg] * bs, 0.0), 0.0)
+    out = np.empty(n, dtype=float)
+    out[rank] = stakes
+    return out
+
 def calculate_kelly_stakes(df: pd.DataFrame, 
                           confidence_threshold: float = 0.15,
-                          max_stake: float = 0.10) -> pd.DataFrame:
+                          max_stake: float = 0.10,
+                          mode: str = "single",
+                          fraction: float = 0.5,
+                          keys: Sequence[str] = RACE_KEYS) -> pd.DataFrame:
     """
     Calculate Kelly criterion stakes for betting.
     
     Args:
         df: DataFrame with posterior probabilities
         confidence_threshold: Minimum probability to consider betting
-        max_stake: Maximum stake as fraction of bankroll
+        max_stake: Maximum stake as fraction of bankroll; per runner for the
+            single and fractional modes, per race for the simultaneous mode
+        mode: 'single' (each runner on its own), 'fractional' (single Kelly
+            scaled by `fraction`) or 'simultaneous' (joint Kelly per race)
+        fraction: Kelly multiplier for the fractional mode
+        keys: Columns identifying a race; missing columns are ignored
         
     Returns:
         DataFrame with Kelly stakes
     """
+    if mode not in KELLY_MODES:
+        raise ValueError(f"Unknown Kelly mode: {mode}")
+    
     df = df.copy()
+    p = df["p_posterior"].to_numpy(dtype=float)
+    pm = df["p_market"].to_numpy(dtype=float)
     
-    # Calculate Kelly stakes
-    stakes = []
-    for _, row in df.iterrows():
-        if row["p_posterior"] > confidence_threshold:
-            # Kelly formula: (bp - q) / b
-            # where b = odds-1, p = our probability, q = 1-p
-            market_odds = 1 / row["p_market"]
-            b = market_odds - 1
-            p = row["p_posterior"]
-            q = 1 - p
-            
-            if b > 0:
-                kelly = (b * p - q) / b
-                kelly = max(0, min(kelly, max_stake))  # Cap at max_stake
-            else:
-                kelly = 0
-        else:
-            kelly = 0
-            
-        stakes.append(kelly)
-    
-    df["kelly_stake"] = stakes
+    if mode == "simultaneous":
+        order, offsets = race_segments(df, keys)
+        kelly = np.empty(len(df), dtype=float)
+        kelly[order] = kelly_stakes(p[order], pm[order], offsets, confidence_threshold,
+                                    max_stake, mode, fraction)
+    else:
+        # Single-runner modes do not need the races
+        kelly = kelly_stakes(p, pm, None, confidence_threshold, max_stake, mode, fraction)
+    
+    df["kelly_stake"] = kelly
     return df
+
+def kelly_stakes(p: np.ndarray,
+                 p_market: np.ndarray,
+                 offsets: np.ndarray,
+                 confidence_threshold: float = 0.15,
+                 max_stake: float = 0.10,
+                 mode: str = "single",
+                 fraction: float = 0.5) -> np.ndarray:
+    """
+    Kelly stakes on arrays, e.g. the posterior of a race tensor.
+    
+    Args:
+        p: Posterior probabilities, ordered so that each race is contiguous
+        p_market: Market probabilities, same order
+        offsets: Start offset of each race (only used by the simultaneous mode)
+        confidence_threshold: Minimum probability to consider betting
+        max_stake: Maximum stake as fraction of bankroll (see
+            `calculate_kelly_stakes`)
+        mode: 'single', 'fractional' or 'simultaneous'
+        fraction: Kelly multiplier for the fractional mode
+        
+    Returns:
+        Stake per runner as a fraction of bankroll
+    """
+    if mode not in KELLY_MODES:
+        raise ValueError(f"Unknown Kelly mode: {mode}")
+    eligible = p > confidence_threshold
+    
+    if mode == "simultaneous":
+        kelly = simultaneous_kelly(p, p_market, offsets, eligible)
+        
+        # Scale the whole race down rather than capping runners on their own
+        if len(p):
+            totals = np.repeat(segment_sum(kelly, offsets), np.diff(np.r_[offsets, len(p)]))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                kelly = kelly * np.where(totals > max_stake, max_stake / totals, 1.0)
+    else:
+        kelly = single_kelly(p, p_market)
+        if mode == "fractional":
+            kelly = fraction * kelly
+        kelly = np.where(max_stake < kelly, max_stake, kelly)  # Cap at max_stake
+    
+    return np.where(eligible & (kelly > 0), kelly, 0.0)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Forward feature selection by AIC over conditional logit models.
+Python counterpart of scripts/variable_selection_aic_clogit_agliv.R: at
+every step each remaining feature is added to the current model, the
+candidates are fitted in parallel, and the one with the lowest AIC is kept
+until no candidate improves the AIC.
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Sequence, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.model.clogit import clogit_newton, clogit_strata, varies_within_races
+from india.model.combiner_india import RACE_KEYS, race_segments
+
+# Design shared by every candidate fit of a selection run
+_DESIGN: Dict[str, Any] = {}
+
+def prepare_design(df: pd.DataFrame,
+                   features: Sequence[str],
+                   keys: Sequence[str] = RACE_KEYS,
+                   win_col: str = "pos") -> Dict[str, Any]:
+    """
+    Build the race-ordered design matrix once for all candidate fits.
+    
+    Runners with any missing candidate feature are dropped up front, so
+    every candidate model is fitted (and its AIC compared) on the same races.
+    
+    Args:
+        df: DataFrame with one row per runner
+        features: Candidate feature columns
+        keys: Columns identifying a race; missing columns are ignored
+        win_col: Column equal to 1 for the winner
+    
+    Returns:
+        Dictionary with X, offsets, winners, names and usable (features
+        that vary within races)
+    """
+    order, offsets = race_segments(df, keys)
+    X = df[list(features)].to_numpy(dtype=float)[order]
+    won = (df[win_col].to_numpy() == 1)[order]
+    rows, offsets, winners = clogit_strata(X, won, offsets)
+    if len(rows) == 0:
+        raise ValueError("No race with exactly one winner and complete features")
+    X = X[rows]
+    return {
+        "X": X,
+        "offsets": offsets,
+        "winners": winners,
+        "names": list(features),
+        "usable": varies_within_races(X, offsets),
+    }
+
+def _init_worker(design: Dict[str, Any]) -> None:
+    """Install the shared design in a worker process."""
+    global _DESIGN
+    _DESIGN = design
+
+def fit_candidate(columns: List[int], init: np.ndarray) -> Tuple[int, float, np.ndarray, bool]:
+    """
+    Fit the model with the given design columns, warm-started from `init`.
+    
+    Args:
+        columns: Design columns; the last one is the candidate
+        init: Starting coefficients (current model plus 0 for the candidate)
+    
+    Returns:
+        Tuple of (candidate column, AIC, coefficients, converged)
+    """
+    d = _DESIGN
+    coef, loglik, _, _, converged = clogit_newton(
+        d["X"][:, columns], d["offsets"], d["winners"], init)
+    return columns[-1], float(2 * len(columns) - 2 * loglik), coef, converged
+
+def _fit_task(task: Tuple[List[int], np.ndarray]) -> Tuple[int, float, np.ndarray, bool]:
+    return fit_candidate(*task)
+
+def forward_select(df: pd.DataFrame,
+                   features: Sequence[str],
+                   keys: Sequence[str] = RACE_KEYS,
+                   win_col: str = "pos",
+                   workers: int = None,
+                   max_features: int = None) -> Dict[str, Any]:
+    """
+    Greedy forward selection of clogit features by AIC.
+    
+    Like the R script, the first step always adds the best feature and the
+    search stops when no remaining feature lowers the AIC; ties go to the
+    feature listed first.
+    
+    Args:
+        df: DataFrame with one row per runner
+        features: Candidate feature columns
+        keys: Columns identifying a race; missing columns are ignored
+        win_col: Column equal to 1 for the winner
+        workers: Worker processes; defaults to the CPU count, 1 fits in-process
+        max_features: Stop after selecting this many features
+    
+    Returns:
+        Dictionary with selected, coef, aic, steps (one row per step) and
+        candidates (AIC of every candidate fit)
+    """
+    design = prepare_design(df, features, keys, win_col)
+    names = design["names"]
+    remaining = [i for i in range(len(names)) if design["usable"][i]]
+    max_features = max_features or len(remaining)
+    workers = workers or os.cpu_count() or 1
+    
+    if workers == 1:
+        _init_worker(design)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(design,))
+    
+    selected: List[int] = []
+    coef = np.zeros(0)
+    best_aic = np.inf
+    steps = []
+    candidates = []
+    try:
+        while remaining and len(selected) < max_features:
+            start = time.perf_counter()
+            tasks = [(selected + [c], np.r_[coef, 0.0]) for c in remaining]
+            if pool is None:
+                fits = [_fit_task(t) for t in tasks]
+            else:
+                fits = list(pool.map(_fit_task, tasks))
+            elapsed = time.perf_counter() - start
+    
+            step = len(selected) + 1
+            for column, aic, _, converged in fits:
+                candidates.append({"step": step, "feature": names[column],
+                                   "aic": aic, "converged": converged})
+            column, aic, new_coef, _ = min(fits, key=lambda fit: fit[1])
+            if aic >= best_aic:
+                break
+    
+            selected.append(column)
+            remaining.remove(column)
+            coef = new_coef
+            best_aic = aic
+            steps.append({"step": step, "feature": names[column], "aic": aic,
+                          "n_candidates": len(fits), "seconds": elapsed})
+            print(f"  Step {step}: {names[column]:<24} AIC={aic:.2f} "
+                  f"({len(fits)} candidates, {elapsed:.2f}s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    return {
+        "selected": [names[c] for c in selected],
+        "coef": coef,
+        "aic": best_aic,
+        "steps": pd.DataFrame(steps, columns=["step", "feature", "aic", "n_candidates", "seconds"]),
+        "candidates": pd.DataFrame(candidates, columns=["step", "feature", "aic", "converged"]),
+    }
+
+def main():
+    """Main function to run forward selection on a features file."""
+    parser = argparse.ArgumentParser(description="Forward selection of clogit features by AIC")
+    parser.add_argument("data", help="Runner-level Parquet or CSV file")
+    parser.add_argument("features", nargs="+", help="Candidate feature columns")
+    parser.add_argument("--race-keys", default=",".join(RACE_KEYS),
+                        help="Comma-separated columns identifying a race (e.g. dg_raceid)")
+    parser.add_argument("--win-col", default="pos", help="Column equal to 1 for the winner")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-features", type=int, default=None, help="Maximum features to select")
+    parser.add_argument("--report", default=None, help="CSV with the AIC of every candidate fit")
+    args = parser.parse_args()
+    
+    if args.data.endswith(".csv"):
+        df = pd.read_csv(args.data)
+    else:
+        df = pd.read_parquet(args.data)
+    
+    print(f"Forward selection over {len(args.features)} features, {len(df):,} runners")
+    start = time.perf_counter()
+    result = forward_select(df, args.features, args.race_keys.split(","), args.win_col,
+                            args.workers, args.max_features)
+    print(f"\nSelected: {', '.join(result['selected'])}")
+    print(f"AIC: {result['aic']:.2f} in {time.perf_counter() - start:.1f}s")
+    print(pd.Series(result["coef"], index=result["selected"], name="coef").to_string())
+    
+    if args.report:
+        result["candidates"].to_csv(args.report, index=False)
+        print(f"Candidate report saved to: {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the block bootstrap of betting earnings.
+"""
+
+import pathlib
+import sys
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.backtest import bootstrap
+from india.backtest.bootstrap import bet_earnings, bootstrap_earnings
+
+def make_bets(n: int = 300, seed: int = 5):
+    """Random stakes, odds and outcomes of `n` bets in races of 3."""
+    rng = np.random.default_rng(seed)
+    stake = rng.uniform(0.01, 0.1, n)
+    p_market = rng.uniform(0.05, 0.5, n)
+    won = rng.random(n) < p_market
+    return stake, p_market, won, np.arange(n) // 3
+
+def test_bet_earnings_match_loop():
+    """Array earnings equal a bet-by-bet settlement."""
+    stake, p_market, won, _ = make_bets()
+    expected = [s * (1 / p - 1) if w else -s for s, p, w in zip(stake, p_market, won)]
+    
+    np.testing.assert_allclose(bet_earnings(stake, p_market, won), expected)
+
+def test_replicates_match_per_replicate_loop(monkeypatch):
+    """Blocks give the totals of resampling each replicate on its own."""
+    monkeypatch.setattr(bootstrap, "BLOCK_CELLS", 3000)
+    stake, p_market, won, _ = make_bets()
+    earnings = bet_earnings(stake, p_market, won)
+    result = bootstrap_earnings(earnings, stake, n_replicates=25, seed=7)
+    
+    # Blocks of 10 replicates, each drawn from its own child seed
+    expected = []
+    for seed, size in zip(np.random.SeedSequence(7).spawn(3), (10, 10, 5)):
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, len(earnings), size=(size, len(earnings)), dtype=np.int32)
+        expected += [earnings[row].sum() for row in idx]
+    np.testing.assert_allclose(result["replicates"], expected)
+    assert result["observed"] == pytest.approx(earnings.sum())
+
+def test_results_do_not_depend_on_workers(monkeypatch):
+    """The same seed gives the same replicates in-process and on a pool."""
+    monkeypatch.setattr(bootstrap, "BLOCK_CELLS", 1000)
+    stake, p_market, won, races = make_bets()
+    earnings = bet_earnings(stake, p_market, won)
+    
+    for kwargs in ({}, {"races": races}):
+        one = bootstrap_earnings(earnings, stake, n_replicates=40, workers=1, **kwargs)
+        two = bootstrap_earnings(earnings, stake, n_replicates=40, workers=2, **kwargs)
+        np.testing.assert_array_equal(one["replicates"], two["replicates"])
+        assert one["p_value"] == two["p_value"]
+
+def test_race_bootstrap_resamples_race_totals():
+    """A race bootstrap equals a bet bootstrap of the race totals."""
+    stake, p_market, won, races = make_bets()
+    earnings = bet_earnings(stake, p_market, won)
+    by_race = bootstrap_earnings(earnings, stake, races=races, n_replicates=50)
+    totals = bootstrap_earnings(np.bincount(races, earnings), np.bincount(races, stake), n_replicates=50)
+    
+    assert by_race["n_units"] == races.max() + 1
+    np.testing.assert_allclose(by_race["replicates"], totals["replicates"])
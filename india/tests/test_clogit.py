@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the conditional logit fitter against a per-race reference.
+"""
+
+import json
+import pathlib
+import sys
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.clogit import fit_benter, fit_benter_tensor, fit_clogit
+from india.features.race_tensor import build_race_tensor
+from india.model.combiner_india import DEFAULT_WEIGHTS, load_weights
+
+def race_loglik(coef: np.ndarray, X: np.ndarray, won: np.ndarray, offsets: np.ndarray) -> float:
+    """Conditional log-likelihood summed race by race."""
+    total = 0.0
+    for start, stop in zip(offsets, np.r_[offsets[1:], len(X)]):
+        eta = X[start:stop] @ coef
+        total += eta[won[start:stop]].sum() - np.log(np.exp(eta).sum())
+    return total
+
+def small_design(seed: int = 5):
+    """Two features over 300 races of 4-9 runners with one winner each."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(4, 10, 300)
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    X = rng.normal(size=(sizes.sum(), 2))
+    won = np.zeros(len(X), dtype=bool)
+    for start, size in zip(offsets, sizes):
+        p = np.exp(X[start:start + size] @ [0.8, -0.4])
+        won[start + rng.choice(size, p=p / p.sum())] = True
+    return X, won, offsets
+
+def test_fit_maximizes_per_race_likelihood():
+    """The fit's log-likelihood is the per-race one, at a stationary point."""
+    X, won, offsets = small_design()
+    fit = fit_clogit(X, won, offsets)
+    
+    assert fit["converged"]
+    assert np.isclose(fit["loglik"], race_loglik(fit["coef"], X, won, offsets))
+    for j in range(2):
+        step = np.eye(2)[j] * 1e-5
+        slope = (race_loglik(fit["coef"] + step, X, won, offsets)
+                 - race_loglik(fit["coef"] - step, X, won, offsets)) / 2e-5
+        assert abs(slope) < 1e-4
+
+def test_constant_feature_is_not_fitted():
+    """A feature constant within every race gets NaN, like R's clogit."""
+    X, won, offsets = small_design()
+    race_constant = np.repeat(np.arange(len(offsets)), np.diff(np.r_[offsets, len(X)]))
+    fit = fit_clogit(np.column_stack([X, race_constant]), won, offsets)
+    
+    assert np.isnan(fit["coef"][2]) and np.isnan(fit["se"][2])
+    assert np.allclose(fit["coef"][:2], fit_clogit(X, won, offsets)["coef"])
+
+def test_benter_fit_on_tensor_matches_frame():
+    """Fitting the weights on a race tensor gives the frame fit."""
+    df = make_features_frame(3000, seed=2)
+    frame = fit_benter(df)
+    tensor = fit_benter_tensor(build_race_tensor(df))
+    
+    assert np.isclose(frame["alpha"], tensor["alpha"], atol=1e-5)
+    assert np.isclose(frame["beta"], tensor["beta"], atol=1e-5)
+
+def test_saved_weights_are_loaded(tmp_path):
+    """Weights saved as clogit.py writes them are read back; no file gives the default."""
+    path = tmp_path / "benter_weights.json"
+    assert load_weights(path) == DEFAULT_WEIGHTS
+    
+    path.write_text(json.dumps({"alpha": 0.31, "beta": 0.92}))
+    assert load_weights(path) == (0.31, 0.92)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped feature store and its cache.
+"""
+
+import os
+import pathlib
+import sys
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.features.feature_store import cached_feature_store, features_digest, store_frame
+from india.features.silver_store import load_features, write_meeting_features
+
+def write_dataset(root: pathlib.Path) -> None:
+    """Write a small synthetic history as a silver dataset."""
+    df = make_features_frame(1000, seed=2)
+    for meeting, group in df.groupby("meeting", sort=False):
+        write_meeting_features(group.drop(columns=["pos"]), meeting, root)
+
+def test_store_matches_dataset(tmp_path):
+    """The store holds the dataset's runners in meeting and race order."""
+    root = tmp_path / "features"
+    write_dataset(root)
+    store = cached_feature_store(str(root), cache_dir=str(tmp_path / "store"))
+    frame = store_frame(store)
+    
+    expected = load_features(str(root))
+    expected = expected.assign(meeting=expected["meeting"].astype(str))
+    expected = expected.sort_values(["meeting", "race_no"], kind="stable").reset_index(drop=True)
+    assert len(frame) == len(expected)
+    for col in ("meeting", "horse", "race_name"):
+        np.testing.assert_array_equal(frame[col].astype(str), expected[col].astype(str))
+    for col in ("race_no", "dist_m", "age", "rating"):
+        np.testing.assert_array_equal(frame[col], expected[col])
+    for col in ("p_night", "p_morning", "p_opening"):
+        np.testing.assert_array_equal(frame[col], expected[col].to_numpy(dtype=np.float32))
+
+def test_digest_ignores_other_files(tmp_path):
+    """Manifests next to the meeting files leave the digest alone."""
+    root = tmp_path / "features"
+    write_dataset(root)
+    digest = features_digest(root)
+    
+    (root / "_manifest.json").write_text("{}")
+    assert features_digest(root) == digest
+    
+    # Replacing a meeting file does change it
+    file = next(root.rglob("*.parquet"))
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert features_digest(root) != digest
+
+def test_rebuild_removes_stale_caches(tmp_path):
+    """A rebuilt store replaces the cache of the old digest only."""
+    root = tmp_path / "features"
+    cache = tmp_path / "store"
+    write_dataset(root)
+    old = pathlib.Path(cached_feature_store(str(root), cache_dir=str(cache))["path"])
+    other = cache / "features-2024"
+    other.mkdir()
+    
+    file = next(root.rglob("*.parquet"))
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    new = pathlib.Path(cached_feature_store(str(root), cache_dir=str(cache))["path"])
+    
+    assert new != old and new.exists()
+    assert not old.exists()
+    assert other.exists()
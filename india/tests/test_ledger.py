@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the compounding bet ledger against a bet-by-bet settlement.
+"""
+
+import pathlib
+import sys
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.backtest.ledger import ledger_summary, simulate_ledger, tensor_ledger
+from india.benchmarks.synthetic import make_features_frame
+from india.features.race_tensor import build_race_tensor
+from india.model.combiner_india import kelly_stakes, posterior_tensor
+
+def settle_bets(stake, p_market, won, offsets, bankroll=1.0, max_exposure=1.0):
+    """Bankroll after every race, settling one bet at a time."""
+    ends = np.r_[offsets[1:], len(stake)]
+    path = []
+    for lo, hi in zip(offsets, ends):
+        total = stake[lo:hi].sum()
+        scale = max_exposure / total if total > max_exposure else 1.0
+        start = bankroll
+        for i in range(lo, hi):
+            if stake[i] > 0:
+                amount = stake[i] * scale * start
+                bankroll += amount / p_market[i] - amount if won[i] else -amount
+        path.append(bankroll)
+    return np.array(path)
+
+def test_ledger_matches_bet_loop():
+    """The cumulative-product path equals settling every bet in turn."""
+    tensor = build_race_tensor(make_features_frame(3000, seed=6))
+    offsets = tensor["offsets"]
+    post = posterior_tensor(tensor, use="p_opening")
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], offsets, 0.05, mode="simultaneous")
+    won = tensor["pos"] == 1
+    
+    for max_exposure in (1.0, 0.05):
+        ledger = simulate_ledger(stake, post["p_market"], won, offsets, 2.0, max_exposure)
+        path = settle_bets(stake, post["p_market"], won, offsets, 2.0, max_exposure)
+        np.testing.assert_allclose(ledger["bankroll"], path, rtol=1e-9)
+        
+        peak = np.maximum.accumulate(np.r_[2.0, path])[1:]
+        np.testing.assert_allclose(ledger["drawdown"], 1 - path / peak, atol=1e-12)
+        np.testing.assert_array_equal(ledger["bets"], np.add.reduceat(stake > 0, offsets))
+    assert (ledger["bets"] > 1).any()
+    assert ledger["exposure"].max() <= 0.05 + 1e-12
+
+def test_tensor_ledger_has_one_row_per_race():
+    """A tensor ledger covers every race in order and summarises its path."""
+    tensor = build_race_tensor(make_features_frame(1000, seed=6))
+    ledger = tensor_ledger(tensor, bankroll=10.0)
+    summary = ledger_summary({c: ledger[c].to_numpy() for c in ledger.columns}, bankroll=10.0)
+    
+    assert len(ledger) == len(tensor["offsets"])
+    np.testing.assert_array_equal(ledger["race_no"], tensor["race_no"])
+    assert summary["final_bankroll"] == ledger["bankroll"].iloc[-1]
+    assert summary["total_return"] == ledger["bankroll"].iloc[-1] / 10.0 - 1
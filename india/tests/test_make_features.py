@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Tests for card and odds feature building.
+"""
+
+import pathlib
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.features.make_features_india import normalize_horse_name, normalize_horse_names
+
+def test_normalize_horse_names_matches_scalar():
+    """The vectorized path agrees with `normalize_horse_name` per name."""
+    names = pd.Series(["Golden Star", "GOLDEN-STAR", "Sea_Breeze (IRE)", "Nan", "None"])
+    
+    assert normalize_horse_names(names).tolist() == [normalize_horse_name(s) for s in names]
+
+def test_missing_names_stay_missing():
+    """None and NaN normalize to NaN, not to the strings 'none' and 'nan'."""
+    names = pd.Series(["Golden Star", None, np.nan], index=[10, 11, 12])
+    keys = normalize_horse_names(names)
+    
+    assert keys.index.tolist() == [10, 11, 12]
+    assert keys.isna().tolist() == [False, True, True]
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the array metrics against the per-race pandas functions.
+"""
+
+import pathlib
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.backtest.metrics import calculate_logloss, calculate_roi, calibration_table, frame_metrics
+from india.benchmarks.synthetic import make_features_frame
+from india.model.combiner_india import calculate_kelly_stakes, posterior_batch
+
+def replay_frame() -> pd.DataFrame:
+    """Synthetic replay with stakes, and a few races that lost their winner."""
+    df = calculate_kelly_stakes(posterior_batch(make_features_frame(2000, seed=4)), 0.1)
+    no_result = df["race_no"] == 3
+    df.loc[no_result, "pos"] = 0
+    return df
+
+def test_overall_matches_per_race_functions():
+    """Overall metrics equal the per-race pandas functions averaged over races."""
+    df = replay_frame()
+    overall = frame_metrics(df)["overall"]
+    races = df.groupby(["meeting", "race_no"])
+    top = df.loc[races["p_posterior"].idxmax()]
+    
+    assert overall["races"] == races.ngroups
+    assert overall["logloss"] == pytest.approx(races.apply(calculate_logloss).mean())
+    assert overall["hit_rate"] == pytest.approx((top["pos"] == 1).mean())
+    assert overall["roi"] == pytest.approx(races.apply(calculate_roi).mean())
+    assert overall["staked"] == pytest.approx(df["kelly_stake"].sum())
+    assert (races.apply(calculate_roi) == -1).any()
+
+def test_group_tables_match_groupby():
+    """Per-distance tables equal a pandas groupby of the per-race numbers."""
+    df = replay_frame()
+    table = frame_metrics(df)["dist_m"]
+    races = df.groupby(["meeting", "race_no"])
+    per_race = pd.DataFrame({
+        "dist_m": races["dist_m"].first(),
+        "logloss": races.apply(calculate_logloss),
+        "roi": races.apply(calculate_roi),
+        "staked": races["kelly_stake"].sum(),
+    })
+    expected = per_race.groupby("dist_m").agg(races=("roi", "size"), logloss=("logloss", "mean"),
+                                              roi=("roi", "mean"), staked=("staked", "sum"))
+    
+    np.testing.assert_array_equal(table.index, expected.index)
+    np.testing.assert_array_equal(table["races"], expected["races"])
+    for col in ("logloss", "roi", "staked"):
+        np.testing.assert_allclose(table[col], expected[col])
+
+def test_calibration_matches_pd_cut():
+    """Calibration bins equal those of `pd.cut` with the same bin count."""
+    df = replay_frame()
+    p = df["p_posterior"].to_numpy()
+    won = (df["pos"] == 1).to_numpy()
+    table = calibration_table(p, won, n_bins=10)
+    
+    bins = pd.cut(p, 10, labels=False)
+    expected = pd.DataFrame({"p": p, "won": won}).groupby(bins).agg(
+        avg_predicted=("p", "mean"), actual_rate=("won", "mean"), count=("p", "size"))
+    np.testing.assert_array_equal(table["bin"], expected.index)
+    np.testing.assert_array_equal(table["count"], expected["count"])
+    np.testing.assert_allclose(table["avg_predicted"], expected["avg_predicted"])
+    np.testing.assert_allclose(table["actual_rate"], expected["actual_rate"])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for horse-name reconciliation.
+"""
+
+import pathlib
+import sys
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.features.name_matching import reconcile_keys, save_aliases
+
+KEYS = ["race_no"]
+
+def test_exact_match_beats_alias():
+    """An alias must not steal a runner that has an exact partner."""
+    left = pd.DataFrame({"race_no": [1, 1, 2], "horse_key": ["goldenstar", "goldenstars", "goldenstars"]})
+    right = pd.DataFrame({"race_no": [1, 1, 2], "horse_key": ["goldenstar", "goldenstars", "goldenstars"],
+                          "odds": [3.0, 5.0, 7.0]})
+    
+    mapped, matches = reconcile_keys(left, right, KEYS, {"goldenstars": "goldenstar"})
+    
+    assert mapped.tolist() == ["goldenstar", "goldenstars", "goldenstars"]
+    assert matches.empty
+
+def test_alias_applies_without_exact_partner():
+    """Aliases rename runners that have no exact partner."""
+    left = pd.DataFrame({"race_no": [1, 1], "horse_key": ["goldenstar", "silverarrow"]})
+    right = pd.DataFrame({"race_no": [1, 1], "horse_key": ["goldenstars", "silverarrow"]})
+    
+    mapped, matches = reconcile_keys(left, right, KEYS, {"goldenstars": "goldenstar"})
+    
+    assert mapped.tolist() == ["goldenstar", "silverarrow"]
+    assert matches[["alias", "canonical", "method"]].values.tolist() == [["goldenstars", "goldenstar", "alias"]]
+
+def test_fuzzy_match_never_records_self(tmp_path):
+    """Fuzzy pairs are one-to-one and a key is never saved as its own alias."""
+    left = pd.DataFrame({"race_no": [1, 1], "horse_key": ["goldenstar", "goldenstars"]})
+    right = pd.DataFrame({"race_no": [1, 1], "horse_key": ["goldenstarr", "goldenstars"]})
+    
+    mapped, matches = reconcile_keys(left, right, KEYS)
+    
+    assert mapped.tolist() == ["goldenstar", "goldenstars"]
+    assert (matches["alias"] != matches["canonical"]).all()
+    
+    matches = pd.concat([matches, pd.DataFrame({"alias": ["x"], "canonical": ["x"], "score": [1.0]})])
+    assert save_aliases(tmp_path / "aliases.csv", matches) == 1
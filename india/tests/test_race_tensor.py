@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for race tensors and the array posterior and Kelly paths against
+their frame and per-race references.
+"""
+
+import pathlib
+import sys
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.benchmarks.synthetic import make_features_frame
+from india.model.combiner_india import (calculate_kelly_stakes, kelly_stakes, posterior_batch,
+                                        posterior_for_race, posterior_tensor)
+from india.features.race_tensor import build_race_tensor, cached_race_tensor, race_slice
+from india.features.silver_store import load_features, write_meeting_features
+
+def race_kelly(p: np.ndarray, p_market: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+    """Simultaneous Kelly for one race, adding runners one at a time."""
+    stakes = np.zeros(len(p))
+    chosen, P, B = [], 0.0, 0.0
+    for i in sorted(np.flatnonzero(eligible), key=lambda i: -p[i] / p_market[i]):
+        if p[i] / p_market[i] <= (1 - P) / (1 - B) + 1e-12 or B + p_market[i] >= 1 - 1e-12:
+            break
+        chosen.append(i)
+        P, B = P + p[i], B + p_market[i]
+    reserve = 0.0 if 1 - P <= 1e-12 else min(max((1 - P) / (1 - B), 0.0), 1.0)
+    for i in chosen:
+        stakes[i] = max(p[i] - reserve * p_market[i], 0.0)
+    return stakes
+
+def test_posterior_batch_matches_per_race():
+    """One pass over a frame equals `posterior_for_race` race by race."""
+    df = make_features_frame(2000, seed=1)
+    batch = posterior_batch(df)
+    for _, race in df.groupby(["meeting", "race_no"]):
+        single = posterior_for_race(race)
+        np.testing.assert_allclose(batch.loc[race.index, "p_posterior"], single["p_posterior"])
+
+def test_posterior_tensor_matches_frame():
+    """The tensor posterior equals the frame posterior of the same runners."""
+    df = make_features_frame(2000, seed=1)
+    tensor = build_race_tensor(df)
+    post = posterior_tensor(tensor, alpha=0.4, beta=0.8)
+    frame = posterior_batch(df, alpha=0.4, beta=0.8).iloc[tensor["row"]]
+    
+    for col in ("p_market", "p_prior", "p_posterior"):
+        np.testing.assert_allclose(post[col], frame[col], rtol=1e-5)
+
+def test_kelly_stakes_match_loops():
+    """Array Kelly equals the row loop (single) and the per-race loop (simultaneous)."""
+    df = make_features_frame(2000, seed=1)
+    tensor = build_race_tensor(df)
+    post = posterior_tensor(tensor)
+    p, pm, offsets = post["p_posterior"], post["p_market"], tensor["offsets"]
+    
+    single = kelly_stakes(p, pm, offsets, 0.12, 0.1)
+    b = 1 / pm - 1
+    expected = np.where((p > 0.12) & (b > 0), np.clip((b * p - (1 - p)) / b, 0, 0.1), 0.0)
+    np.testing.assert_allclose(single, expected)
+    
+    joint = kelly_stakes(p, pm, offsets, 0.05, 0.1, mode="simultaneous")
+    bounds = np.r_[offsets, len(p)]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        stakes = race_kelly(p[start:stop], pm[start:stop], p[start:stop] > 0.05)
+        if stakes.sum() > 0.1:
+            stakes *= 0.1 / stakes.sum()
+        np.testing.assert_allclose(joint[start:stop], stakes, atol=1e-12)
+    assert (joint > 0).any()
+    
+    # The frame path regroups runners itself
+    frame = calculate_kelly_stakes(posterior_batch(df), 0.05, 0.1, mode="simultaneous")
+    for _, race in frame.groupby(["meeting", "race_no"]):
+        p, pm = race["p_posterior"].to_numpy(), race["p_market"].to_numpy()
+        stakes = race_kelly(p, pm, p > 0.05)
+        if stakes.sum() > 0.1:
+            stakes *= 0.1 / stakes.sum()
+        np.testing.assert_allclose(race["kelly_stake"], stakes, atol=1e-12)
+    
+    # Fair-book ties are not left to rounding, so the
+    # float32 tensor stakes the same runners as the frame
+    np.testing.assert_allclose(frame["kelly_stake"].to_numpy()[tensor["row"]], joint, atol=1e-6)
+
+def test_race_slice_is_a_view_of_races():
+    """A slice holds exactly the runners of its races."""
+    tensor = build_race_tensor(make_features_frame(2000, seed=1))
+    part = race_slice(tensor, 10, 20)
+    lo, hi = tensor["offsets"][10], tensor["offsets"][20]
+    
+    np.testing.assert_array_equal(part["X"], tensor["X"][lo:hi])
+    np.testing.assert_array_equal(part["offsets"], tensor["offsets"][10:20] - lo)
+    np.testing.assert_array_equal(part["race_no"], tensor["race_no"][10:20])
+
+def test_store_tensor_matches_frame_tensor(tmp_path):
+    """A tensor streamed through the feature store equals one built in memory."""
+    root = tmp_path / "silver" / "features"
+    df = make_features_frame(2000, seed=1)
+    for meeting, group in df.groupby("meeting", sort=False):
+        write_meeting_features(group.drop(columns=["pos"]), meeting, root)
+    
+    cached = cached_race_tensor(str(root), cache_dir=str(tmp_path / "cache"))
+    built = build_race_tensor(load_features(str(root)))
+    for key in ("X", "offsets", "race_no", "race_date"):
+        np.testing.assert_array_equal(np.asarray(cached[key]), built[key])
+    np.testing.assert_array_equal(np.asarray(cached["horse_names"])[cached["horse"]],
+                                  built["horse_names"][built["horse"]])
+    
+    # A second call reuses the cache
+    again = cached_race_tensor(str(root), cache_dir=str(tmp_path / "cache"))
+    assert again["path"] == cached["path"]
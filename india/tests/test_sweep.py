@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched parameter sweep against one set at a time.
+"""
+
+import pathlib
+import sys
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.backtest import sweep
+from india.backtest.metrics import race_metrics
+from india.backtest.sweep import MODEL_PARAMS, STAKE_PARAMS, evaluate_grid, parameter_grid, rank_grid
+from india.benchmarks.synthetic import make_features_frame
+from india.features.race_tensor import build_race_tensor, tensor_column
+from india.model.combiner_india import kelly_stakes, posterior_tensor, prior_vector
+
+# Two values of a prior coefficient, the combination weights and both
+# staking parameters: 32 sets over 4 distinct models
+GRID = {
+    "rating_weight": [0.004, 0.008],
+    "alpha": [0.3, 0.6],
+    "beta": [0.5, 1.0],
+    "confidence_threshold": [0.1, 0.2],
+    "max_stake": [0.05, 0.1],
+}
+
+def one_at_a_time(tensor, row, mode="single", fraction=0.5):
+    """Per-race metrics of one parameter set through the per-set functions."""
+    prior = prior_vector(*(tensor_column(tensor, c) for c in ("rating", "dist_m", "weight_kg", "age")),
+                         params={k: row[k] for k in MODEL_PARAMS[:6]})
+    post = posterior_tensor(tensor, alpha=row["alpha"], beta=row["beta"], prior=prior)
+    stake = kelly_stakes(post["p_posterior"], post["p_market"], tensor["offsets"],
+                         *(row[k] for k in STAKE_PARAMS), mode, fraction)
+    return race_metrics(post["p_posterior"], tensor["pos"], tensor["offsets"], stake, post["p_market"])
+
+@pytest.mark.parametrize("mode", ["single", "fractional", "simultaneous"])
+def test_grid_matches_one_set_at_a_time(monkeypatch, mode):
+    """Every grid point equals evaluating its parameter set on its own."""
+    tensor = build_race_tensor(make_features_frame(2000, seed=7))
+    # Two models per batch, so the grid takes several batches
+    monkeypatch.setattr(sweep, "BATCH_CELLS", 2 * len(tensor["horse"]))
+    grid = parameter_grid({}, grid=GRID)
+    results = evaluate_grid(tensor, grid, mode=mode)
+    
+    for i, row in grid.iterrows():
+        race = one_at_a_time(tensor, row, mode)
+        assert results.loc[i, "logloss"] == pytest.approx(race["logloss"].mean())
+        assert results.loc[i, "hit_rate"] == pytest.approx(race["hit"].mean())
+        assert results.loc[i, "roi"] == pytest.approx(race["roi"].mean(), abs=1e-12)
+        assert results.loc[i, "staked"] == pytest.approx(race["staked"].sum(), abs=1e-12)
+        assert results.loc[i, "profit"] == pytest.approx(race["profit"].sum(), abs=1e-12)
+    assert (results["bets"] > 0).all()
+
+def test_rank_grid_orders_best_first():
+    """Rank 1 is the highest ROI, or the lowest logloss."""
+    tensor = build_race_tensor(make_features_frame(1000, seed=7))
+    results = evaluate_grid(tensor, parameter_grid({}, grid=GRID))
+    
+    assert rank_grid(results)["roi"].iloc[0] == results["roi"].max()
+    assert rank_grid(results, "logloss")["logloss"].iloc[0] == results["logloss"].min()
+    np.testing.assert_array_equal(rank_grid(results)["rank"], np.arange(1, len(results) + 1))
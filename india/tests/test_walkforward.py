@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for walkforward date folds and fold evaluation.
+"""
+
+import pathlib
+import sys
+import numpy as np
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent))
+from india.backtest.metrics import calculate_logloss, calculate_roi
+from india.backtest.walkforward import date_fold_bounds, evaluate_races, expanding_folds, peak_rss_mb, run_fold
+from india.benchmarks.synthetic import make_features_frame
+from india.features.race_tensor import build_race_tensor, save_race_tensor
+from india.model.combiner_india import calculate_kelly_stakes, posterior_batch
+
+def test_folds_cut_on_date_boundaries():
+    """Every date falls in one fold and folds cover all races in order."""
+    race_date = np.repeat(np.arange("2025-01-01", "2025-01-11", dtype="datetime64[D]"), 3)
+    bounds = date_fold_bounds(race_date, n_folds=3)
+    
+    assert bounds == [(0, 9), (9, 18), (18, 30)]
+    assert expanding_folds(race_date, n_folds=3) == bounds[1:]
+
+def test_undated_history_splits_by_position():
+    """A history without any dates is cut by race position."""
+    bounds = date_fold_bounds(np.full(10, np.datetime64("NaT"), dtype="datetime64[D]"), n_folds=2)
+    
+    assert bounds == [(0, 5), (5, 10)]
+
+def test_partly_dated_history_is_rejected():
+    """One undated race must not silently switch every fold to position order."""
+    race_date = np.arange("2025-01-01", "2025-01-11", dtype="datetime64[D]")
+    race_date[-1] = np.datetime64("NaT")
+    
+    with pytest.raises(ValueError, match="1 of 10 races"):
+        date_fold_bounds(race_date, n_folds=2)
+
+def test_folds_match_in_and_out_of_process(tmp_path):
+    """Folds run in worker processes give the in-process metrics."""
+    tensor = build_race_tensor(make_features_frame(3000, seed=3))
+    save_race_tensor(tensor, tmp_path / "tensor")
+    folds = expanding_folds(tensor["race_date"], n_folds=3)
+    tasks = [(str(tmp_path / "tensor"), i + 1, start, stop, "p_opening")
+             for i, (start, stop) in enumerate(folds)]
+    
+    local = [run_fold(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = list(pool.map(run_fold, tasks))
+    for a, b in zip(local, pooled):
+        for key in ("logloss", "hit_rate", "roi", "alpha", "beta", "train_races", "val_entries"):
+            assert a[key] == b[key]
+
+def test_evaluate_races_matches_frame_metrics():
+    """Tensor evaluation equals the per-race frame metrics of the same runners."""
+    df = make_features_frame(2000, seed=3)
+    tensor = build_race_tensor(df)
+    metrics = evaluate_races(tensor, alpha=0.4, beta=0.7)
+    
+    frame = posterior_batch(df, use="p_opening", alpha=0.4, beta=0.7)
+    frame = calculate_kelly_stakes(frame)
+    races = frame.groupby(["meeting", "race_no"])
+    top = frame.loc[races["p_posterior"].idxmax()]
+    assert metrics["logloss"] == pytest.approx(races.apply(calculate_logloss).mean(), rel=1e-5)
+    assert metrics["hit_rate"] == pytest.approx((top["pos"] == 1).mean())
+    assert metrics["roi"] == pytest.approx(races.apply(calculate_roi).mean(), rel=1e-4, abs=1e-6)
+
+def test_fold_peak_excludes_earlier_work(tmp_path):
+    """A fold run in-process reports its own peak, not the process's."""
+    tensor = build_race_tensor(make_features_frame(1000, seed=3))
+    save_race_tensor(tensor, tmp_path / "tensor")
+    start, stop = expanding_folds(tensor["race_date"], n_folds=2)[0]
+    
+    # Touch 400 MB before the fold
+    np.ones(50_000_000).sum()
+    peak = peak_rss_mb()
+    metrics = run_fold((str(tmp_path / "tensor"), 1, start, stop, "p_opening"))
+    if not metrics["peak_is_fold"]:
+        pytest.skip("peak memory cannot be reset here")
+    assert metrics["peak_mb"] < peak - 200
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import pandas as pd
 from pathlib import Path
@@ -7,6 +8,13 @@ from flask_cors import CORS
 import plotly.graph_objects as go
 import plotly.utils
 
+# Make the india package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from india.backtest.results_join import load_results, attach_positions
+from india.features.silver_store import dataset_root, read_features
+from india.ingestion.bronze_store import find_bronze_file
+from india.features.name_matching import ALIAS_FILE, load_aliases
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
 
@@ -77,71 +85,49 @@ def api_race_detail(meeting_id, race_no):
 
 def get_available_meetings():
     """Get list of available meetings from data directory."""
-    meetings = []
-    
-    # Check silver directory for processed data
     silver_dir = DATA_ROOT / "silver"
+    
+    # Meetings in the partitioned dataset (reads only the meeting column)
+    names = set(read_features(dataset_root(DATA_ROOT), columns=["meeting"])["meeting"].astype(str).unique())
+    
+    # Legacy one-file-per-meeting silver output
     if silver_dir.exists():
-        for file_path in silver_dir.glob("*-features.parquet"):
-            meeting_name = file_path.stem.replace("-features", "")
-            
-            # Check if we have all required data
-            features_file = silver_dir / f"{meeting_name}-features.parquet"
-            card_file = DATA_ROOT / "bronze" / f"{meeting_name}-card.json"
-            odds_file = DATA_ROOT / "bronze" / f"{meeting_name}-odds.json"
-            
-            if features_file.exists():
-                meetings.append({
-                    'id': meeting_name,
-                    'name': meeting_name.replace('-', ' ').title(),
-                    'date': meeting_name.split('-')[:3] if '-' in meeting_name else [meeting_name],
-                    'has_data': True
-                })
-            else:
-                meetings.append({
-                    'id': meeting_name,
-                    'name': meeting_name.replace('-', ' ').title(),
-                    'date': meeting_name.split('-')[:3] if '-' in meeting_name else [meeting_name],
-                    'has_data': False
-                })
+        names.update(p.stem.replace("-features", "") for p in silver_dir.glob("*-features.parquet"))
+    
+    meetings = [{
+        'id': meeting_name,
+        'name': meeting_name.replace('-', ' ').title(),
+        'date': meeting_name.split('-')[:3] if '-' in meeting_name else [meeting_name],
+        'has_data': True
+    } for meeting_name in names]
     
     return sorted(meetings, key=lambda x: x['id'], reverse=True)
 
 def load_meeting_data(meeting_id):
     """Load all data for a specific meeting."""
     try:
-        # Load features
-        features_file = DATA_ROOT / "silver" / f"{meeting_id}-features.parquet"
-        # Also check for the alternative naming convention
-        if not features_file.exists():
-            features_file = DATA_ROOT / "silver" / f"{meeting_id.split('-')[-1]}-features.parquet"
-        
-        if not features_file.exists():
-            return None
+        # Load features from the dataset, touching only this meeting's partition
+        try:
+            features = read_features(dataset_root(DATA_ROOT), meeting=meeting_id)
+        except ValueError:
+            features = pd.DataFrame()  # Not a dated meeting id
         
-        features = pd.read_parquet(features_file)
+        if features.empty:
+            features_file = DATA_ROOT / "silver" / f"{meeting_id}-features.parquet"
+            # Also check for the alternative naming convention
+            if not features_file.exists():
+                features_file = DATA_ROOT / "silver" / f"{meeting_id.split('-')[-1]}-features.parquet"
+            
+            if not features_file.exists():
+                return None
+            
+            features = pd.read_parquet(features_file)
         
         # Load results if available
-        results_file = DATA_ROOT / "bronze" / f"{meeting_id}-results.json"
+        results_file = find_bronze_file(DATA_ROOT / "bronze", meeting_id, "results")
         if results_file.exists():
-            with open(results_file, 'r') as f:
-                results = json.load(f)
-            
-            # Create results mapping
-            res_map = {}
-            for r in results:
-                race_no = r["race_no"]
-                horse_positions = {}
-                for p in r["placings"]:
-                    horse_positions[p["horse"].lower()] = p["pos"]
-                res_map[race_no] = horse_positions
-            
-            # Add results to features
-            features["pos"] = (features["horse"]
-                             .str.lower()
-                             .map(lambda x: res_map.get(features.loc[features["horse"] == x, "race_no"].iloc[0], {}).get(x, 99))
-                             .fillna(99)
-                             .astype(int))
+            aliases = load_aliases(DATA_ROOT / "silver" / ALIAS_FILE)
+            features = attach_positions(features, load_results(results_file), aliases)
         
         return features
     except Exception as e: